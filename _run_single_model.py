@@ -2,16 +2,70 @@
 Worker script: loads ONE model, runs it on all dataset categories, outputs JSON results.
 Called by run_evaluation.py as a subprocess to isolate memory usage.
 
+Each finished image is printed immediately as a "ROW:<json>" line, with the
+worker's RSS and (optionally) tracemalloc heap figures. When the worker has
+processed `max_images` images or its RSS has grown more than
+`max_rss_growth_mb` beyond its size right after loading the model, it prints
+"NEXT:<index>" and exits with config.WORKER_RECYCLE_EXIT_CODE; the parent
+then starts a fresh worker with "start" set to that index.
+
+Images flow through a three-stage pipeline (evaluation/pipeline.py): a
+thread pool reads and decodes the next `prefetch` images (model.preprocess),
+the main thread only runs inference (model.recognize), and a writer thread
+computes metrics and prints rows. Stage utilization is reported at the end.
+
+With "text_height" set, images are first rescaled so their text has that
+x-height (models/preprocessing.py); rows record the scale as "resize_scale".
+
+Each image runs under a watchdog (evaluation/watchdog.py). An
+image that overruns its time limit is reported as "TIMEOUT:<json row>" and
+the worker exits with config.WORKER_TIMEOUT_EXIT_CODE; the parent decides
+whether to retry it. Images quarantined for this model are not run at all.
+Every row carries a "status": ok, error, timeout or quarantined.
+
+With "profiler" set to "cprofile" or "sampling", model.load_model() and
+every model.recognize() run under evaluation/profiling.py and the worker
+writes its hotspot summary (and .prof or collapsed stacks + flamegraph)
+to results/profiles/.
+
+With "adaptive" set (evaluation/sequential.py), each category is visited in
+a seeded random order and the worker stops a category once its CER and
+latency intervals are narrow enough or the model is dominated by one of
+the "references"; it prints "STOP:<json>" and skips that category's rest.
+
+With "dedup" set ({"mode": "flag" or "reuse", "max_distance": N}), the
+worker hashes its images first (evaluation/dedup.py). Rows of near-duplicate
+images get "duplicate_of"; in reuse mode a duplicate whose original this
+worker or an earlier one ("known", a file from the parent) has already run
+is not run again (status "reused").
+
 Usage:
-    python _run_single_model.py '{"module":"models.easy_ocr","cls":"EasyOCRModel","kwargs":{}}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{}}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},
+                                  "start":120,"max_images":100,"max_rss_growth_mb":2000,"tracemalloc":true}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},
+                                  "image_timeout":60,"ignore_quarantine":true,"prefetch":4}'
+    python _run_single_model.py '{"model":"TesseractOCR","kwargs":{},"text_height":20}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},"shard":[0,4]}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},"profiler":"sampling"}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},
+                                  "adaptive":{"min_images":10,"batch":5,...}}'
+    python _run_single_model.py '{"model":"EasyOCRModel","kwargs":{},
+                                  "dedup":{"mode":"reuse","max_distance":4}}'
+
+"model" is a name from models.MODEL_REGISTRY; an explicit
+"module"/"cls" pair is still accepted for wrappers outside the registry.
+Rows of registry models record [name, kwargs] as JSON in "model_spec", so
+tools such as train_router.py can recreate the model from its results.
 """
 
 import importlib
 import json
 import os
+import re
 import sys
+import threading
 import time
-from pathlib import Path
 
 os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
 os.environ["FLAGS_enable_pir_api"] = "0"
@@ -22,68 +76,321 @@ if sys.platform == "win32":
     sys.stderr.reconfigure(encoding="utf-8", errors="replace")
 
 import config
-from evaluation.metrics import compute_cer, compute_wer, compute_accuracy
-
-
-def get_dataset_pairs(images_dir: Path, gt_dir: Path) -> list[tuple[Path, str]]:
-    pairs = []
-    for img_path in sorted(images_dir.glob("*.png")):
-        gt_path = gt_dir / f"{img_path.stem}.txt"
-        if gt_path.exists():
-            gt_text = gt_path.read_text(encoding="utf-8").strip()
-            pairs.append((img_path, gt_text))
-    return pairs
-
-
-def evaluate(model, dataset, category):
-    rows = []
-    for img_path, gt_text in dataset:
-        start = time.perf_counter()
-        try:
-            prediction = model.extract_text(str(img_path))
-        except Exception as e:
-            print(f"INFO: [FAIL] {img_path.name}: {e}", flush=True)
-            prediction = ""
-        elapsed = time.perf_counter() - start
-
-        rows.append({
-            "model": model.get_name(),
-            "category": category,
-            "image": img_path.name,
-            "cer": round(compute_cer(prediction, gt_text), 4),
-            "wer": round(compute_wer(prediction, gt_text), 4),
-            "accuracy": round(compute_accuracy(prediction, gt_text), 2),
-            "time_sec": round(elapsed, 3),
-            "prediction": prediction[:200],
-            "ground_truth": gt_text[:200],
-        })
-        print(f"INFO: {model.get_name()} | {category} | {img_path.name} | "
-              f"CER={rows[-1]['cer']:.3f} | {elapsed:.1f}s", flush=True)
-    return rows
+from evaluation.dataset import get_tasks, sample_key
+from evaluation.dedup import Deduplicator
+from evaluation.memory import HeapTracker, peak_rss_mb, rss_mb
+from evaluation.metrics import METRIC_VERSION, score_prediction
+from evaluation.pipeline import ResultWriter, StageClock, prefetch
+from evaluation.profiling import Profiler
+from evaluation.sequential import SequentialEstimator, adaptive_order
+from evaluation.watchdog import (
+    STATUS_ERROR, STATUS_OK, STATUS_QUARANTINED, STATUS_REUSED, STATUS_TIMEOUT,
+    ImageWatchdog, image_time_limit, quarantined_keys,
+)
+from models import get_model_class
+from models.preprocessing import ResolutionNormalizer
+
+_stdout_lock = threading.Lock()
+
+
+def emit(line: str) -> None:
+    """Print one protocol line; several pipeline threads share stdout."""
+    with _stdout_lock:
+        print(line, flush=True)
+
+
+def measure(decode_sec: float | None = None, infer_sec: float | None = None,
+            rss_before: float | None = None, heap_peak: float | None = None,
+            stages: dict | None = None, scale: float | None = None) -> dict:
+    """Timing and memory columns, sampled on the model thread. `stages` is
+    the model's detect/recognize split of infer_sec, when it has one."""
+    current = rss_mb()
+    elapsed = None if infer_sec is None else (decode_sec or 0.0) + infer_sec
+    stages = stages or {}
+    return {
+        "time_sec": None if elapsed is None else round(elapsed, 3),
+        "decode_sec": None if decode_sec is None else round(decode_sec, 3),
+        "infer_sec": None if infer_sec is None else round(infer_sec, 3),
+        **{key: round(stages[key], 3) if key in stages else None
+           for key in ("detect_sec", "recognize_sec")},
+        "resize_scale": scale,
+        "rss_mb": round(current, 1),
+        "rss_delta_mb": 0.0 if rss_before is None else round(current - rss_before, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "py_heap_peak_mb": heap_peak,
+    }
+
+
+def make_row(model, task: tuple, prediction: str, status: str,
+             measured: dict, extra: dict) -> dict:
+    # Full texts are kept here; the orchestrator truncates them for the CSV
+    # and stores the originals so metrics can be recomputed offline.
+    category, img_path, gt_text = task
+    return {
+        "model": model.get_name(),
+        "category": category,
+        "image": img_path.name,
+        **score_prediction(prediction, gt_text),
+        **measured,
+        "metric_version": METRIC_VERSION,
+        "status": status,
+        "prediction": prediction,
+        "ground_truth": gt_text,
+        **extra,
+    }
+
+
+def write_row(model, task: tuple, prediction: str, status: str,
+              measured: dict, extra: dict, on_row=None) -> None:
+    """Writer-thread job: score one image and print its ROW line."""
+    row = make_row(model, task, prediction, status, measured, extra)
+    if on_row is not None:
+        on_row(row)
+    if status != STATUS_QUARANTINED:
+        emit(f"INFO: {model.get_name()} | {row['category']} | {row['image']} | "
+             f"CER={row['cer']:.3f} | {row['time_sec']:.1f}s | RSS={row['rss_mb']:.0f}MB")
+    # One line per image so nothing is lost if the worker dies later
+    emit(f"ROW:{json.dumps(row)}")
+
+
+def evaluate_one(model, task: tuple, future, heap: HeapTracker, watchdog: ImageWatchdog,
+                 limit: float, index: int, extra: dict, writer: ResultWriter,
+                 infer_clock: StageClock, profiler: Profiler,
+                 on_row=None) -> tuple[dict, float]:
+    """Model-thread stage for one image; returns (measurements, seconds
+    spent waiting for the prefetched input)."""
+    img_path = task[1]
+
+    def on_timeout():
+        writer.drain()  # earlier images first
+        row = make_row(model, task, "", STATUS_TIMEOUT, measure(infer_sec=limit), extra)
+        emit(f"INFO: [TIMEOUT] {img_path.name} exceeded {limit:.0f}s")
+        if profiler.mode == "sampling":
+            # The samples show where the stuck image is spending its time
+            _write_profile(profiler, model, extra["worker"])
+        emit(f"TIMEOUT:{json.dumps({**row, 'index': index})}")
+
+    rss_before = rss_mb()
+    heap.start_image()
+    status = STATUS_OK
+    prediction = ""
+    decode_sec = infer_sec = waited = 0.0
+    scale = None
+    watchdog.arm(limit, on_timeout)
+    try:
+        wait_start = time.perf_counter()
+        (prepared, scale), decode_sec = future.result()
+        waited = time.perf_counter() - wait_start
+        infer_start = time.perf_counter()
+        model.stage_times = {}
+        with infer_clock.track(), profiler.section("recognize"):
+            prediction = model.recognize(prepared)
+        infer_sec = time.perf_counter() - infer_start
+    except Exception as e:
+        emit(f"INFO: [FAIL] {img_path.name}: {e}")
+        status = STATUS_ERROR
+    finally:
+        watchdog.disarm()
+    heap_peak = heap.end_image()
+
+    measured = measure(decode_sec, infer_sec, rss_before, heap_peak,
+                       model.stage_times, scale)
+    writer.submit(lambda: write_row(model, task, prediction, status, measured, extra,
+                                    on_row))
+    return measured, waited
 
 
 def main():
     spec = json.loads(sys.argv[1])
-    module = importlib.import_module(spec["module"])
-    cls = getattr(module, spec["cls"])
+    if "model" in spec:
+        cls = get_model_class(spec["model"])
+    else:
+        cls = getattr(importlib.import_module(spec["module"]), spec["cls"])
     model = cls(**spec.get("kwargs", {}))
 
-    print(f"INFO: Loading {model.get_name()} ...", flush=True)
-    model.load_model()
-    print(f"INFO: {model.get_name()} loaded.", flush=True)
+    start = spec.get("start", 0)
+    worker = spec.get("worker", 0)
+    max_images = spec.get("max_images", config.WORKER_MAX_IMAGES)
+    max_growth = spec.get("max_rss_growth_mb", config.WORKER_MAX_RSS_GROWTH_MB)
+    depth = spec.get("prefetch", config.PREFETCH_IMAGES)
+    heap = HeapTracker(spec.get("tracemalloc", False))
+    profiler = Profiler(spec.get("profiler"))
+    watchdog = ImageWatchdog()
+    quarantine = set() if spec.get("ignore_quarantine") else quarantined_keys(model.get_name())
+    model_spec = json.dumps([spec["model"], spec.get("kwargs", {})]) if "model" in spec else None
+
+    emit(f"INFO: Loading {model.get_name()} ...")
+    load_start = time.perf_counter()
+    watchdog.arm(config.LOAD_TIMEOUT_SEC, lambda: emit(
+        f"INFO: [FAIL] Model load exceeded {config.LOAD_TIMEOUT_SEC}s"))
+    with profiler.section("load_model"):
+        model.load_model()
+    watchdog.disarm()
+    load_sec = round(time.perf_counter() - load_start, 3)
+    # The recycle budget is growth beyond the loaded model, not its size
+    load_rss = rss_mb()
+    emit(f"INFO: {model.get_name()} loaded from {model.load_source} in {load_sec:.1f}s "
+         f"(RSS={load_rss:.0f}MB).")
+
+    # Run on ALL categories dynamically (restricted to this shard, if any)
+    shard = tuple(spec["shard"]) if spec.get("shard") else None
+    tasks = get_tasks(shard)
+    adaptive = spec.get("adaptive")
+    seq, stopped, hooks = None, set(), []
+    if adaptive:
+        tasks = adaptive_order(tasks, adaptive["seed"])
+        # A model never counts as its own reference (e.g. from --reference)
+        refs = {cat: [r for r in found if r["model"] != model.get_name()]
+                for cat, found in (adaptive.get("references") or {}).items()}
+        seq = SequentialEstimator(adaptive, refs, adaptive.get("seen"))
+        stopped = set(adaptive.get("stopped", []))
+        # Images run per category, including those of earlier workers
+        used = {cat: len(v["cer"]) for cat, v in (adaptive.get("seen") or {}).items()}
+
+        def add_sample(row: dict) -> None:
+            if row["status"] == STATUS_OK:
+                seq.add(row["category"], row["cer"], row["time_sec"])
+        hooks.append(add_sample)
+
+    dedup = None
+    if spec.get("dedup"):
+        dedup = Deduplicator(tasks, spec["dedup"]["mode"],
+                             spec["dedup"].get("max_distance", config.DEDUP_MAX_DISTANCE))
+        hooks.append(dedup.remember)
+        if spec["dedup"].get("known"):
+            dedup.load_known(spec["dedup"]["known"])
+        emit(f"INFO: [DEDUP] {len(dedup.duplicates)} of {dedup.total} images are "
+             f"near-duplicates (hashed in {dedup.hash_sec:.1f}s, mode {dedup.mode})")
+
+    def on_row(row: dict) -> None:
+        for hook in hooks:
+            hook(row)
+
+    counts = {}
+    for cat_key, _, _ in tasks:
+        counts[cat_key] = counts.get(cat_key, 0) + 1
+
+    def is_quarantined(task: tuple) -> bool:
+        return sample_key(task[0], task[1].name) in quarantine
+
+    normalizer = ResolutionNormalizer(spec["text_height"]) if spec.get("text_height") else None
+
+    def load(task: tuple):
+        """Prefetch stage: optional rescale, then the model's own decode."""
+        if is_quarantined(task) or task[0] in stopped:
+            return None, None
+        path, scale = normalizer.apply(str(task[1])) if normalizer else (str(task[1]), None)
+        return model.preprocess(path), scale
+
+    decode_clock = StageClock(max(depth, 1))
+    infer_clock = StageClock()
+    writer = ResultWriter(StageClock())
+    waited = 0.0
+    pipeline_start = time.perf_counter()
+
+    def finish() -> None:
+        writer.drain()
+        _report_pipeline(time.perf_counter() - pipeline_start, depth,
+                         decode_clock, infer_clock, writer.clock, waited)
+        _write_heap_report(heap, model, worker)
+        _write_profile(profiler, model, worker)
+
+    done = 0
+    current_cat = None
+    stream = prefetch(load, tasks[start:], depth, decode_clock)
+    for index, (task, future) in enumerate(stream, start):
+        cat_key, img_path, gt_text = task
+        if cat_key in stopped:
+            continue
+        if cat_key != current_cat:
+            current_cat = cat_key
+            emit(f"INFO: Running on {cat_key} ({counts[cat_key]} images) ...")
+
+        extra = {"worker": worker, "load_sec": load_sec, "load_source": model.load_source,
+                 "model_spec": model_spec}
+        key = sample_key(cat_key, img_path.name)
+        reused = None
+        if dedup is not None:
+            extra.update(dedup.columns(key))
+            if dedup.expects(key, start):
+                writer.drain()  # the original's row may still be in the writer
+            reused = dedup.reusable(key)
+        if is_quarantined(task):
+            emit(f"INFO: [SKIP] {img_path.name} is quarantined for {model.get_name()}")
+            measured = measure()
+            writer.submit(lambda task=task, measured=measured, extra=extra: write_row(
+                model, task, "", STATUS_QUARANTINED, measured, extra))
+        elif reused is not None:
+            emit(f"INFO: [DEDUP] {img_path.name} reuses the prediction for "
+                 f"{extra['duplicate_of']}")
+            measured = measure(decode_sec=0.0, infer_sec=0.0)
+            extra["saved_sec"] = reused[1]
+            writer.submit(lambda task=task, measured=measured, extra=extra, text=reused[0]:
+                          write_row(model, task, text, STATUS_REUSED, measured, extra))
+        else:
+            limit = image_time_limit(model.get_name(), cat_key, spec.get("image_timeout"))
+            measured, wait = evaluate_one(model, task, future, heap, watchdog, limit,
+                                          index, extra, writer, infer_clock,
+                                          profiler, on_row if hooks else None)
+            waited += wait
+            if seq is not None:
+                used[cat_key] = used.get(cat_key, 0) + 1
+                if seq.due(used[cat_key]):
+                    _check_stop(seq, model, cat_key, writer, stopped)
+        done += 1
+
+        remaining = index + 1 < len(tasks)
+        over_count = max_images and done >= max_images
+        growth = measured["rss_mb"] - load_rss
+        over_rss = max_growth and growth > max_growth
+        if remaining and (over_count or over_rss):
+            reason = f"RSS growth {growth:.0f}MB > {max_growth}MB since load" if over_rss \
+                else f"{done} images"
+            emit(f"INFO: Recycling worker after {reason}")
+            finish()
+            emit(f"NEXT:{index + 1}")
+            sys.exit(config.WORKER_RECYCLE_EXIT_CODE)
+
+    finish()
+
+
+def _check_stop(seq: SequentialEstimator, model, category: str,
+                writer: ResultWriter, stopped: set) -> None:
+    """Apply the stopping rule to one category once its rows are scored."""
+    writer.drain()
+    reason, est = seq.check(category)
+    if reason is None:
+        return
+    stopped.add(category)
+    emit(f"INFO: [ADAPTIVE] {category}: stopped after {est['n']} images ({reason}); "
+         f"CER {est['cer']:.3f} [{est['cer_lo']:.3f}, {est['cer_hi']:.3f}], "
+         f"{est['time']:.2f}s [{est['time_lo']:.2f}, {est['time_hi']:.2f}]")
+    emit(f"STOP:{json.dumps({'model': model.get_name(), 'category': category, 'reason': reason})}")
+
+
+def _report_pipeline(wall: float, depth: int, decode: StageClock, infer: StageClock,
+                     write: StageClock, waited: float) -> None:
+    emit(f"INFO: Pipeline over {wall:.1f}s ({depth} prefetch thread(s)): "
+         f"decode {decode.utilization(wall):.0%}, inference {infer.utilization(wall):.0%}, "
+         f"scoring {write.utilization(wall):.0%}; inference waited {waited:.1f}s for input")
+
+
+def _slug(model) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", model.get_name().lower()).strip("_")
+
 
-    results = []
+def _write_heap_report(heap: HeapTracker, model, worker: int) -> None:
+    path = heap.write_report(config.MEMORY_DIR / f"{_slug(model)}_worker{worker}.txt")
+    if path:
+        emit(f"INFO: Heap growth report saved to {path}")
 
-    # Run on ALL categories dynamically
-    for cat_key in config.CATEGORIES:
-        img_dir, gt_dir = config.get_category_dirs(cat_key)
-        pairs = get_dataset_pairs(img_dir, gt_dir)
-        if pairs:
-            print(f"INFO: Running on {cat_key} ({len(pairs)} images) ...", flush=True)
-            results.extend(evaluate(model, pairs, cat_key))
 
-    # Output results as JSON on a special line the parent process reads
-    print(f"RESULT:{json.dumps(results)}", flush=True)
+def _write_profile(profiler: Profiler, model, worker: int) -> None:
+    paths = profiler.write(config.PROFILE_DIR / f"{_slug(model)}_worker{worker}",
+                           f"{model.get_name()} (worker {worker})")
+    if paths:
+        emit(f"INFO: Profile ({profiler.mode}) saved to "
+             + ", ".join(str(p) for p in paths))
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Offline benchmarks for the project's own code (run with python -m benchmarks.<name>)."""
@@ -0,0 +1,119 @@
+"""
+Import-time benchmark: startup cost of each entry point.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+several times, and the median cumulative import time of the module is
+reported together with the number of modules it pulled in. With --rev the
+same measurement is taken on another git revision (extracted with
+`git archive` into a temporary directory), giving a before/after table.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --rev HEAD~1 --repeat 7
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+import config
+
+ENTRY_POINTS = [
+    "config",
+    "models",
+    "evaluation",
+    "evaluation.visualize",
+    "_run_single_model",
+    "run_evaluation",
+    "run_api_models",
+    "rescore",
+    "compare",
+]
+
+
+def measure(module: str, cwd: Path, repeat: int) -> dict:
+    """Median cumulative import time (ms) and module count for one module."""
+    times, counts, error = [], [], None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=str(cwd),
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+            break
+        # Lines look like: "import time:  self [us] | cumulative | imported package"
+        entries = [line.split("|") for line in proc.stderr.splitlines()
+                   if line.startswith("import time:") and "[us]" not in line]
+        cumulative = {e[2].strip(): int(e[1]) for e in entries if len(e) == 3}
+        times.append(cumulative.get(module, 0) / 1000)
+        counts.append(len(cumulative))
+    if error:
+        return {"module": module, "error": error}
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(times), 1),
+        "min_ms": round(min(times), 1),
+        "modules_imported": int(statistics.median(counts)),
+    }
+
+
+def _checkout(rev: str, dest: Path) -> None:
+    archive = subprocess.run(["git", "archive", rev], capture_output=True,
+                             cwd=str(config.BASE_DIR), check=True).stdout
+    tar_path = dest / "rev.tar"
+    tar_path.write_bytes(archive)
+    with tarfile.open(tar_path) as tar:
+        tar.extractall(dest, filter="data")
+
+
+def _fmt(result: dict | None) -> str:
+    if result is None:
+        return "-"
+    if "error" in result:
+        return "error"
+    return f"{result['median_ms']:.0f} ms ({result['modules_imported']} mods)"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rev", help="also measure this git revision (the 'before')")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    current = {m: measure(m, config.BASE_DIR, args.repeat) for m in ENTRY_POINTS}
+    before = {}
+    if args.rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            _checkout(args.rev, Path(tmp))
+            before = {m: measure(m, Path(tmp), args.repeat) for m in ENTRY_POINTS}
+
+    header = f"{'Entry point':<24}" + (f"{args.rev:>28}" if args.rev else "") + f"{'current':>28}"
+    print(header)
+    print("-" * len(header))
+    for m in ENTRY_POINTS:
+        line = f"{m:<24}"
+        if args.rev:
+            line += f"{_fmt(before.get(m)):>28}"
+        line += f"{_fmt(current[m]):>28}"
+        print(line)
+    for m, r in {**before, **current}.items():
+        if "error" in r:
+            print(f"  [FAIL] {m}: {r['error']}")
+
+    out_dir = config.RESULTS_DIR / "benchmarks"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"import_time_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.write_text(json.dumps({"rev": args.rev, "before": before, "current": current},
+                                   indent=2), encoding="utf-8")
+    print(f"\nSaved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
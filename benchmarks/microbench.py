@@ -0,0 +1,317 @@
+"""
+Microbenchmarks for the project's own per-image and per-chart code paths.
+
+Every case runs offline on synthetic inputs of growing size: text
+normalization and CER / WER, the row projection behind the line splitter,
+image base64 encoding for the API, the pandas aggregation behind the
+charts, and the worker's row serialization. Cases whose framework is not
+installed (TrOCR needs torch) are reported as skipped.
+
+Each (case, size) is timed like timeit: the call is looped until a round
+takes at least --min-time seconds, for several rounds, and the median and
+best time per call are kept. Baselines are compared on the best time,
+which is the least sensitive to other load on the machine. Results go to
+results/benchmarks/microbench_<tier>_<timestamp>.json and are compared with
+a baseline of the same tier; a case more than --tolerance slower than the
+baseline is flagged and the exit code is 1.
+
+Tiers:
+    quick  two smallest sizes, short rounds (a few seconds; run on every change)
+    full   every size, more rounds
+
+Usage:
+    python -m benchmarks.microbench --tier quick
+    python -m benchmarks.microbench --tier full --update-baseline
+    python -m benchmarks.microbench --baseline results/benchmarks/microbench_full_X.json
+    python -m benchmarks.microbench --filter cer --tolerance 0.5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+import config
+from evaluation.store import environment_fingerprint
+
+TIERS = {
+    "quick": {"sizes": 2, "repeat": 3, "min_time": 0.05},
+    "full": {"sizes": None, "repeat": 7, "min_time": 0.2},
+}
+
+OUT_DIR = config.RESULTS_DIR / "benchmarks"
+
+
+# ── Synthetic inputs ──────────────────────────────────────────
+
+def synthetic_text(n_chars: int, seed: int = 0) -> str:
+    """Words, punctuation and line breaks, roughly like a receipt or form."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < n_chars:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEF0123456789")
+                       for _ in range(rng.randint(1, 10)))
+        word += rng.choice(["", "", "", ",", ".", ":", "$", "\n"])
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:n_chars]
+
+
+def with_typos(text: str, rate: float = 0.1, seed: int = 1) -> str:
+    """A "prediction": about `rate` of the characters substituted or dropped."""
+    rng = random.Random(seed)
+    out = []
+    for c in text:
+        roll = rng.random()
+        if roll < rate / 2:
+            continue
+        out.append(rng.choice("abcdefghij") if roll < rate else c)
+    return "".join(out)
+
+
+def synthetic_page(width: int, height: int, seed: int = 0) -> Image.Image:
+    """White page with dark text-like line bands (for the row projection)."""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width), 255, dtype=np.uint8)
+    line_height = max(height // 30, 12)
+    for top in range(line_height, height - line_height, 2 * line_height):
+        band = page[top:top + line_height]
+        band[rng.random(band.shape) < 0.3] = 0
+    return Image.fromarray(page).convert("RGB")
+
+
+def synthetic_results(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Result rows shaped like all_results.csv (7 models x 6 categories)."""
+    rng = np.random.default_rng(seed)
+    models = [f"Model {i}" for i in range(7)]
+    cats = list(config.CATEGORIES)
+    cer = rng.random(n_rows)
+    return pd.DataFrame({
+        "model": rng.choice(models, n_rows),
+        "category": rng.choice(cats, n_rows),
+        "image": [f"img_{i}.png" for i in range(n_rows)],
+        "cer": cer,
+        "wer": np.minimum(cer * 1.3, 1.0),
+        "accuracy": (1 - cer) * 100,
+        "time_sec": rng.gamma(2.0, 0.5, n_rows),
+        "worker": rng.integers(0, 3, n_rows),
+        "load_sec": rng.random(n_rows) * 10,
+        "peak_rss_mb": rng.random(n_rows) * 4000,
+        "rss_delta_mb": rng.normal(0, 2, n_rows),
+        "py_heap_peak_mb": np.nan,
+    })
+
+
+# ── Cases ─────────────────────────────────────────────────────
+# Each case: (name, sizes, setup(size) -> zero-argument callable). setup may
+# raise ImportError when the code under test needs a missing framework.
+
+def _text_case(func_name: str):
+    def setup(n_chars: int):
+        from evaluation import metrics
+        func = getattr(metrics, func_name)
+        ref = synthetic_text(n_chars)
+        if func_name == "normalize_text":
+            return lambda: func(ref)
+        pred = with_typos(ref)
+        return lambda: func(pred, ref)
+    return setup
+
+
+def _setup_projection(side: int):
+    from models.detection import projection_bands
+    gray = np.asarray(synthetic_page(side, side * 4 // 3).convert("L"))
+    return lambda: projection_bands(gray, 240, 30)
+
+
+def _setup_split_lines(side: int):
+    from models.trocr_model import TrOCRModel  # needs torch + transformers
+    img = synthetic_page(side, side * 4 // 3)
+    return lambda: TrOCRModel._split_into_lines(img)
+
+
+def _setup_encode(side: int):
+    from models.mistral_ocr import MistralOCR
+    path = Path(tempfile.mkdtemp()) / f"page_{side}.png"
+    synthetic_page(side, side * 4 // 3).save(path)
+    return lambda: MistralOCR._encode_image(str(path))
+
+
+def _setup_summary(n_rows: int):
+    from evaluation.visualize import build_summary
+    df = synthetic_results(n_rows)
+    return lambda: build_summary(df)
+
+
+class _NamedModel:
+    """Only what make_row reads from a model."""
+
+    def get_name(self) -> str:
+        return "Bench Model"
+
+
+def _setup_serialize(n_chars: int):
+    from _run_single_model import make_row, measure
+    ref = synthetic_text(n_chars)
+    task = ("printed", Path("img_0.png"), ref)
+    model, pred = _NamedModel(), with_typos(ref)
+    measured = measure(0.01, 0.5, 100.0)
+    extra = {"worker": 0, "load_sec": 1.0, "load_source": "framework"}
+    return lambda: json.dumps(make_row(model, task, pred, "ok", measured, extra))
+
+
+CASES = [
+    ("normalize_text", [100, 1_000, 10_000], _text_case("normalize_text")),
+    ("compute_cer", [100, 1_000, 5_000], _text_case("compute_cer")),
+    ("compute_wer", [100, 1_000, 5_000], _text_case("compute_wer")),
+    ("projection_bands", [400, 1200, 2400], _setup_projection),
+    ("trocr_split_into_lines", [400, 1200, 2400], _setup_split_lines),
+    ("mistral_encode_image", [400, 1200, 2400], _setup_encode),
+    ("build_summary", [1_000, 10_000, 100_000], _setup_summary),
+    ("serialize_row", [100, 1_000, 10_000], _setup_serialize),
+]
+
+
+# ── Timing ────────────────────────────────────────────────────
+
+def time_call(func, repeat: int, min_time: float) -> dict:
+    """Median / best seconds per call over `repeat` rounds of >= min_time."""
+    func()  # warm-up (imports, caches)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    per_call = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - start) / loops)
+    return {"median_us": round(statistics.median(per_call) * 1e6, 2),
+            "best_us": round(min(per_call) * 1e6, 2), "loops": loops}
+
+
+def run_cases(tier: str, name_filter: str | None = None) -> list[dict]:
+    settings = TIERS[tier]
+    results = []
+    for name, sizes, setup in CASES:
+        if name_filter and name_filter not in name:
+            continue
+        for size in sizes[:settings["sizes"]]:
+            try:
+                func = setup(size)
+            except ImportError as e:
+                print(f"  [SKIP] {name}: {e}")
+                results.append({"case": name, "size": size, "skipped": str(e)})
+                break
+            timing = time_call(func, settings["repeat"], settings["min_time"])
+            results.append({"case": name, "size": size, **timing})
+            print(f"  {name:<24}{size:>9}  {_fmt_us(timing['median_us']):>10}  "
+                  f"(best {_fmt_us(timing['best_us'])}, {timing['loops']} loops)")
+    return results
+
+
+def _fmt_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.1f} us"
+
+
+# ── Baseline comparison ───────────────────────────────────────
+
+def compare(current: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Cases present in both with their ratio; "regressed" when the best time
+    per call grew by more than `tolerance` (0.25 = 25% slower)."""
+    base = {(r["case"], r["size"]): r for r in baseline if "best_us" in r}
+    rows = []
+    for r in current:
+        old = base.get((r["case"], r["size"]))
+        if old is None or "best_us" not in r or not old["best_us"]:
+            continue
+        ratio = r["best_us"] / old["best_us"]
+        rows.append({"case": r["case"], "size": r["size"], "baseline_us": old["best_us"],
+                     "current_us": r["best_us"], "ratio": round(ratio, 3),
+                     "regressed": ratio > 1 + tolerance})
+    return rows
+
+
+def baseline_path(tier: str) -> Path:
+    return OUT_DIR / f"microbench_baseline_{tier}.json"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=TIERS, default="quick")
+    parser.add_argument("--min-time", type=float,
+                        help="seconds per timing round (default: the tier's)")
+    parser.add_argument("--filter", help="only cases whose name contains this")
+    parser.add_argument("--baseline", help="results JSON to compare against "
+                                           "(default: the saved baseline of the tier)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a case is flagged (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="save these results as the tier's baseline")
+    args = parser.parse_args()
+
+    print(f"{'='*60}")
+    print(f"MICROBENCHMARKS ({args.tier})")
+    print(f"{'='*60}")
+    if args.min_time:
+        TIERS[args.tier]["min_time"] = args.min_time
+    results = run_cases(args.tier, args.filter)
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    report = {"tier": args.tier, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "environment": environment_fingerprint(), "results": results}
+    out_path = OUT_DIR / f"microbench_{args.tier}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nSaved to {out_path}")
+
+    base_file = Path(args.baseline) if args.baseline else baseline_path(args.tier)
+    regressed = []
+    if base_file.exists():
+        baseline = json.loads(base_file.read_text(encoding="utf-8"))
+        rows = compare(results, baseline["results"], args.tolerance)
+        print(f"\n{'='*60}")
+        print(f"VS BASELINE {base_file.name} (tolerance +{args.tolerance:.0%})")
+        print(f"{'='*60}")
+        for row in rows:
+            flag = "  [FAIL] regression" if row["regressed"] else ""
+            print(f"  {row['case']:<24}{row['size']:>9}  {_fmt_us(row['baseline_us']):>10} -> "
+                  f"{_fmt_us(row['current_us']):>10}  x{row['ratio']:.2f}{flag}")
+        regressed = [row for row in rows if row["regressed"]]
+        if baseline.get("environment", {}).get("cpu") != report["environment"]["cpu"]:
+            print("  [WARN] baseline was recorded on a different CPU")
+    elif not args.update_baseline:
+        print(f"\nNo baseline at {base_file}; save one with --update-baseline")
+
+    if args.update_baseline:
+        baseline_path(args.tier).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline updated: {baseline_path(args.tier)}")
+
+    if regressed:
+        print(f"\n[FAIL] {len(regressed)} case(s) slower than the baseline by more than "
+              f"{args.tolerance:.0%}")
+        sys.exit(1)
+    if base_file.exists():
+        print("\n[OK] No regressions")
+
+
+if __name__ == "__main__":
+    main()
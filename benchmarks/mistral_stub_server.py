@@ -0,0 +1,107 @@
+"""
+Local stand-in for the Mistral chat-completions endpoint.
+
+Answers POST /v1/chat/completions like the real API, but "recognizes" each
+image by looking up its ground truth (by SHA-1 of the image bytes) in the
+datasets. A request with several images gets the "=== IMAGE k ===" layout
+that MistralOCR's packing mode asks for. Latency is modelled as a fixed
+per-request overhead plus a per-image cost, so packing shows its effect,
+and --noise / --break-rate corrupt characters or the delimiters to
+exercise CER differences and the single-image fallback.
+
+Usage:
+    python -m benchmarks.mistral_stub_server --port 8765
+    MISTRAL_API_URL=http://127.0.0.1:8765/v1/chat/completions MISTRAL_API_KEY=stub \\
+        MISTRAL_REQUEST_DELAY_SEC=0 python run_api_models.py --pack 4
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from evaluation.dataset import get_dataset_pairs
+
+
+def load_answers() -> dict[str, str]:
+    """{sha1 of image bytes: ground truth} over every dataset category."""
+    answers = {}
+    for cat_key in config.CATEGORIES:
+        for img, gt in get_dataset_pairs(*config.get_category_dirs(cat_key)):
+            answers[hashlib.sha1(img.read_bytes()).hexdigest()] = gt
+    return answers
+
+
+def corrupt(text: str, rate: float, rng: random.Random) -> str:
+    """Replace roughly `rate` of the characters with random letters."""
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") if rng.random() < rate else c
+                   for c in text)
+
+
+def make_handler(args: argparse.Namespace, answers: dict[str, str]):
+    rng = random.Random(args.seed)
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            content = body["messages"][0]["content"]
+            images = [item["image_url"]["url"].split(",", 1)[1]
+                      for item in content if item["type"] == "image_url"]
+            texts = [corrupt(answers.get(hashlib.sha1(base64.b64decode(b64)).hexdigest(), ""),
+                             args.noise, rng) for b64 in images]
+            if len(texts) == 1:
+                reply = texts[0]
+            elif rng.random() < args.break_rate:
+                reply = "\n".join(texts)  # delimiters dropped
+            else:
+                reply = "\n".join(f"=== IMAGE {k} ===\n{text}"
+                                  for k, text in enumerate(texts, 1))
+            time.sleep(args.latency + args.image_latency * len(images))
+
+            data = json.dumps({"choices": [{"message": {"role": "assistant",
+                                                        "content": reply}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *log_args) -> None:
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="seconds of overhead per request")
+    parser.add_argument("--image-latency", type=float, default=0.2,
+                        help="additional seconds per image in a request")
+    parser.add_argument("--noise", type=float, default=0.0,
+                        help="fraction of characters replaced in every answer")
+    parser.add_argument("--break-rate", type=float, default=0.0,
+                        help="probability that a packed answer omits its delimiters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    answers = load_answers()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args, answers))
+    print(f"[OK] Mistral stub on http://127.0.0.1:{args.port}/v1/chat/completions "
+          f"({len(answers)} known images)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Performance regression gate: compare an evaluation run against a baseline.
+
+For every (model, category) present in both runs, latency and CER are
+compared on the images the two runs share, using a paired bootstrap
+(evaluation/stats.py). A cell is a regression when the whole confidence
+interval lies beyond the tolerance:
+    latency  candidate/baseline mean ratio  lower bound > 1 + --latency-tol
+    CER      candidate-baseline mean diff   lower bound > --cer-tol
+
+A diff report (CSV + Markdown, including environment fingerprint changes)
+is written into the candidate run directory. Exits with code 1 when any
+regression is found, so it can gate CI or a library upgrade.
+
+Usage:
+    python compare.py                                  # latest run vs the previous one of its kind
+    python compare.py --baseline 20240101-120000-local --candidate 20240102-090000-local
+    python compare.py --latency-tol 0.2 --cer-tol 0.02
+"""
+
+import argparse
+import os
+import sys
+
+os.environ["PYTHONIOENCODING"] = "utf-8"
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+import pandas as pd
+
+import config
+from evaluation.stats import paired_bootstrap
+from evaluation.store import (
+    fingerprint_diff, list_runs, load_run, load_run_meta, resolve_run_dir,
+)
+
+
+def compare_runs(base: pd.DataFrame, cand: pd.DataFrame, latency_tol: float,
+                 cer_tol: float, n_boot: int, alpha: float,
+                 seed: int) -> pd.DataFrame:
+    """One row per (model, category) with bootstrap intervals and a verdict."""
+    keys = ["model", "category", "image"]
+    # Timed-out / quarantined images have no comparable latency or output
+    base, cand = (df[df["status"].fillna("ok") == "ok"] if "status" in df else df
+                  for df in (base, cand))
+    # Resolution normalization factor (1.0 for runs without it)
+    base, cand = (df.assign(resize_scale=df["resize_scale"].fillna(1.0)
+                            if "resize_scale" in df else 1.0)
+                  for df in (base, cand))
+    cols = ["cer", "time_sec", "resize_scale"]
+    merged = base[keys + cols].merge(
+        cand[keys + cols], on=keys, suffixes=("_base", "_cand"),
+    )
+
+    rows = []
+    for (model, category), grp in merged.groupby(["model", "category"]):
+        lat = paired_bootstrap(grp["time_sec_base"], grp["time_sec_cand"],
+                               n_boot=n_boot, alpha=alpha, seed=seed)
+        err = paired_bootstrap(grp["cer_base"], grp["cer_cand"],
+                               n_boot=n_boot, alpha=alpha, seed=seed)
+
+        status = []
+        if len(grp) < 2:
+            status.append("insufficient")
+        else:
+            if lat["ratio_lo"] > 1 + latency_tol:
+                status.append("latency_regression")
+            elif lat["ratio_hi"] < 1 - latency_tol:
+                status.append("latency_improvement")
+            if err["diff_lo"] > cer_tol:
+                status.append("cer_regression")
+            elif err["diff_hi"] < -cer_tol:
+                status.append("cer_improvement")
+
+        rows.append({
+            "model": model,
+            "category": category,
+            "n": len(grp),
+            "time_base": grp["time_sec_base"].mean(),
+            "time_cand": grp["time_sec_cand"].mean(),
+            "time_ratio": lat["ratio"],
+            "time_ratio_lo": lat["ratio_lo"],
+            "time_ratio_hi": lat["ratio_hi"],
+            "cer_base": grp["cer_base"].mean(),
+            "cer_cand": grp["cer_cand"].mean(),
+            "cer_diff": err["diff"],
+            "cer_diff_lo": err["diff_lo"],
+            "cer_diff_hi": err["diff_hi"],
+            "scale_base": grp["resize_scale_base"].mean(),
+            "scale_cand": grp["resize_scale_cand"].mean(),
+            "status": ",".join(status) or "ok",
+        })
+    return pd.DataFrame(rows)
+
+
+def _markdown_report(report: pd.DataFrame, baseline: str, candidate: str,
+                     env_changes: list[tuple], args) -> str:
+    lines = [
+        f"# Run comparison: {candidate} vs {baseline}",
+        "",
+        f"Latency tolerance: {args.latency_tol:.0%} · CER tolerance: {args.cer_tol} · "
+        f"{1 - args.alpha:.0%} bootstrap CI ({args.n_boot} resamples)",
+        "",
+        "## Environment changes",
+        "",
+    ]
+    if env_changes:
+        lines += ["| Field | Baseline | Candidate |", "|---|---|---|"]
+        lines += [f"| {k} | {a} | {b} |" for k, a, b in env_changes]
+    else:
+        lines.append("None.")
+    lines += [
+        "",
+        "## Per model and category",
+        "",
+        "| Model | Category | n | Time ratio [CI] | CER diff [CI] | Scale | Status |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for r in report.itertuples():
+        lines.append(
+            f"| {r.model} | {r.category} | {r.n} | "
+            f"{r.time_ratio:.2f} [{r.time_ratio_lo:.2f}, {r.time_ratio_hi:.2f}] | "
+            f"{r.cer_diff:+.3f} [{r.cer_diff_lo:+.3f}, {r.cer_diff_hi:+.3f}] | "
+            f"{r.scale_base:.2f} → {r.scale_cand:.2f} | {r.status} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", help="baseline run ID (default: second newest)")
+    parser.add_argument("--candidate", help="candidate run ID (default: newest)")
+    parser.add_argument("--latency-tol", type=float, default=0.10,
+                        help="relative latency slowdown tolerated (default 0.10)")
+    parser.add_argument("--cer-tol", type=float, default=0.01,
+                        help="absolute CER increase tolerated (default 0.01)")
+    parser.add_argument("--n-boot", type=int, default=2000)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    runs = list_runs()
+    candidate = args.candidate or (runs[-1] if runs else None)
+    if args.baseline:
+        baseline = args.baseline
+    elif candidate:
+        # The previous run of the same kind: an api run shares no model with
+        # a local one, and a sweep's profiles are not a local run's models
+        name = resolve_run_dir(candidate).name
+        kind = load_run_meta(candidate).get("kind")
+        older = [r for r in runs if r < name and load_run_meta(r).get("kind") == kind]
+        baseline = older[-1] if older else None
+        if not baseline:
+            print(f"No earlier {kind} run than {name} in {config.RUNS_DIR}; "
+                  f"pass --baseline.")
+            sys.exit(2)
+    if not candidate:
+        print(f"Need two runs in {config.RUNS_DIR} to compare (found {len(runs)}).")
+        sys.exit(2)
+
+    base_df, cand_df = load_run(baseline), load_run(candidate)
+    base_meta, cand_meta = load_run_meta(baseline), load_run_meta(candidate)
+    if "metric_version" in base_df and "metric_version" in cand_df:
+        versions = set(base_df["metric_version"]) | set(cand_df["metric_version"])
+        if len(versions) > 1:
+            print(f"[WARN] Runs use different metric versions {sorted(versions)}; "
+                  "run rescore.py first for a fair CER comparison.")
+
+    report = compare_runs(base_df, cand_df, args.latency_tol, args.cer_tol,
+                          args.n_boot, args.alpha, args.seed)
+    if report.empty:
+        print(f"Runs {baseline} and {candidate} share no images.")
+        sys.exit(2)
+
+    env_changes = fingerprint_diff(base_meta.get("environment", {}),
+                                   cand_meta.get("environment", {}))
+
+    print(f"{'='*60}")
+    print(f"COMPARE {candidate} vs baseline {baseline}")
+    print(f"{'='*60}")
+    if env_changes:
+        print("Environment changes:")
+        for key, a, b in env_changes:
+            print(f"  {key}: {a} -> {b}")
+        print()
+    print(report[["model", "category", "n", "time_ratio", "cer_diff", "scale_cand", "status"]]
+          .round(3).to_string(index=False))
+
+    out_dir = resolve_run_dir(candidate)
+    stem = f"compare_{resolve_run_dir(baseline).name}"
+    report.to_csv(out_dir / f"{stem}.csv", index=False)
+    (out_dir / f"{stem}.md").write_text(
+        _markdown_report(report, baseline, candidate, env_changes, args),
+        encoding="utf-8",
+    )
+    print(f"\nReport saved to {out_dir / stem}.csv / .md")
+
+    regressions = report[report["status"].str.contains("regression")]
+    if not regressions.empty:
+        print(f"\n[FAIL] {len(regressions)} regression(s) against {baseline}")
+        sys.exit(1)
+    print("\n[OK] No significant regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,20 @@ load_dotenv()
 
 # ── Project Paths ──────────────────────────────────────────────
 BASE_DIR = Path(__file__).parent
-DATASETS_DIR = BASE_DIR / "datasets"
+# OCR_DATASETS_DIR points the runners at another root, e.g. generated load data
+DATASETS_DIR = Path(os.getenv("OCR_DATASETS_DIR", BASE_DIR / "datasets"))
 RESULTS_DIR = BASE_DIR / "results"
 SCORES_DIR = RESULTS_DIR / "scores"
 VIS_DIR = RESULTS_DIR / "visualizations"
+RUNS_DIR = RESULTS_DIR / "runs"
+MEMORY_DIR = RESULTS_DIR / "memory"
+# Per-model timeout counts; see evaluation/watchdog.py
+QUARANTINE_PATH = RESULTS_DIR / "quarantine.json"
+# Prepared (memory-mappable) model weights, see models/artifacts.py
+ARTIFACTS_DIR = Path(os.getenv("OCR_ARTIFACTS_DIR", BASE_DIR / "artifacts"))
+USE_ARTIFACT_CACHE = os.getenv("OCR_ARTIFACT_CACHE", "1") != "0"
+# Per-image caches keyed by image content hash (text detection, ...)
+CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR", BASE_DIR / "cache"))
 
 # ── Dataset Categories ────────────────────────────────────────
 # Each category: (folder_name, display_label, num_samples)
@@ -37,13 +47,18 @@ def get_category_dirs(cat_key: str):
 def get_category_label(cat_key: str) -> str:
     return CATEGORIES[cat_key][1]
 
-# Create all category directories
-for cat_key in CATEGORIES:
-    img_dir, gt_dir = get_category_dirs(cat_key)
-    img_dir.mkdir(parents=True, exist_ok=True)
-    gt_dir.mkdir(parents=True, exist_ok=True)
-SCORES_DIR.mkdir(parents=True, exist_ok=True)
-VIS_DIR.mkdir(parents=True, exist_ok=True)
+def ensure_dirs() -> None:
+    """Create all category and results directories.
+
+    Called by the entry points that write output, not on import, so that
+    importing config has no side effects."""
+    for cat_key in CATEGORIES:
+        img_dir, gt_dir = get_category_dirs(cat_key)
+        img_dir.mkdir(parents=True, exist_ok=True)
+        gt_dir.mkdir(parents=True, exist_ok=True)
+    SCORES_DIR.mkdir(parents=True, exist_ok=True)
+    VIS_DIR.mkdir(parents=True, exist_ok=True)
+    RUNS_DIR.mkdir(parents=True, exist_ok=True)
 
 # ── API Keys ───────────────────────────────────────────────────
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY", "")
@@ -59,7 +74,102 @@ TROCR_PRINTED_MODEL = "microsoft/trocr-small-printed"
 TROCR_HANDWRITTEN_MODEL = "microsoft/trocr-small-handwritten"
 
 MISTRAL_MODEL = "pixtral-12b-2409"
-MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
+# Point at benchmarks/mistral_stub_server.py to test without the real API
+MISTRAL_API_URL = os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+# Pause after each request (free tier allows ~2 requests/minute)
+MISTRAL_REQUEST_DELAY_SEC = float(os.getenv("MISTRAL_REQUEST_DELAY_SEC", "30"))
 
 # ── Dataset Config ────────────────────────────────────────────
 SAMPLES_PER_CATEGORY = 6
+
+# ── Worker Memory Limits ──────────────────────────────────────
+# A worker exits and is restarted (resuming at the next image) after this
+# many images, or once its RSS has grown this much beyond its size right
+# after load_model() (a budget for leaks and caches, independent of how big
+# the model itself is). 0 disables a limit.
+WORKER_MAX_IMAGES = 0
+WORKER_MAX_RSS_GROWTH_MB = 3000
+WORKER_RECYCLE_EXIT_CODE = 75
+# Warn when RSS grows faster than this across a model's images
+LEAK_WARN_MB_PER_IMAGE = 1.0
+
+# ── Speed Profiles ────────────────────────────────────────────
+# Presets every local wrapper defines in its PROFILES (pass {"profile": ...}
+# in MODEL_SPECS); `run_evaluation.py --sweep` evaluates all of them.
+SPEED_PROFILES = ("fast", "balanced", "accurate")
+
+# ── Shared Text Detection ─────────────────────────────────────
+# Detector used by wrappers created with shared_detection=True, see
+# models/detection.py: "doctr" (DBNet), "easyocr" (CRAFT) or "projection"
+DETECTOR = "doctr"
+
+# ── Resolution Normalization ──────────────────────────────────
+# Target text x-height in pixels per registry name (the MODEL_SPECS /
+# MODEL_REGISTRY key such as "EasyOCRModel", not the display name), used by
+# `run_evaluation.py --normalize-resolution` (models/preprocessing.py).
+# Starting points near each recognizer's input scale; None = leave as is.
+TARGET_X_HEIGHT = {
+    "TesseractOCR": 20,
+    "EasyOCRModel": 14,
+    "PaddleOCRModel": 14,
+    "TrOCRModel": 20,
+    "DocTRModel": 12,
+    "MistralOCR": None,
+}
+
+# ── Worker Pipeline ───────────────────────────────────────────
+# Images read and decoded ahead of the model thread (0 = decode inline)
+PREFETCH_IMAGES = 2
+
+# ── Adaptive (Early-Stopping) Evaluation ──────────────────────
+# --adaptive: sample each category in random order and stop a model once the
+# 95% bootstrap intervals are this narrow (see evaluation/sequential.py)
+ADAPTIVE_MIN_IMAGES = 10
+ADAPTIVE_BATCH = 5
+ADAPTIVE_CER_HALF_WIDTH = 0.02
+ADAPTIVE_TIME_REL_HALF_WIDTH = 0.10
+ADAPTIVE_N_BOOT = 1000
+ADAPTIVE_SEED = 0
+
+# ── Near-Duplicate Detection (--dedup) ────────────────────────
+# Perceptual hashes within this many of 64 bits count as the same page
+DEDUP_MAX_DISTANCE = 4
+
+# ── Category Router (models/router.py, train_router.py) ───────
+ROUTER_PATH = RESULTS_DIR / "router.json"   # classifier + routing table
+ROUTER_FEATURE_SIZE = 128                   # longer side of the feature image (px)
+
+# ── Aggregation (evaluation/aggregate.py) ─────────────────────
+AGG_CHUNK_ROWS = 200_000       # rows read per chunk from a results CSV
+AGG_SKETCH_ACCURACY = 0.01     # relative error of the percentile sketches
+
+# ── Profiling (--profile) ─────────────────────────────────────
+PROFILE_DIR = RESULTS_DIR / "profiles"
+PROFILE_SAMPLE_INTERVAL_SEC = 0.005  # sampling mode
+PROFILE_TOP_N = 25                   # hotspots listed per group
+
+# ── Per-Image Time Limits ─────────────────────────────────────
+# A worker aborts an image that runs longer than this and exits; the
+# orchestrator retries the image in a fresh worker up to IMAGE_MAX_RETRIES
+# times, then records it with status "timeout" and continues at the next
+# image. Images given up on in QUARANTINE_AFTER runs (counted once per run in
+# results/quarantine.json) are skipped by later runs as "quarantined". A
+# worker that outlives LOAD_TIMEOUT_SEC plus the per-image limit times its
+# remaining images is killed (a hang the watchdog thread cannot catch).
+IMAGE_TIMEOUT_SEC = 120
+# Overrides by display name (model.get_name(), the "model" column of the
+# results, including qualifiers such as "Mistral OCR (pack 4)" or
+# "EasyOCR (fast)"), then category ("*" = any category), e.g.
+#   {"TrOCR (handwritten)": {"dense_text": 300}, "DocTR": {"*": 180}}
+# Unlike TARGET_X_HEIGHT, which is keyed by registry name.
+IMAGE_TIMEOUT_OVERRIDES: dict[str, dict[str, float]] = {}
+# Time allowed for load_model() before the worker is considered stuck
+LOAD_TIMEOUT_SEC = 900
+WORKER_TIMEOUT_EXIT_CODE = 76
+# A timed-out image is retried this many times before being recorded as a timeout
+IMAGE_MAX_RETRIES = 1
+# After this many runs that gave up on an image, a model skips it outright
+QUARANTINE_AFTER = 2
+
+# ── Visualization Config ──────────────────────────────────────
+VIS_DPI = 150
@@ -1,2 +1,12 @@
-from .metrics import compute_cer, compute_wer, compute_accuracy, normalize_text
-from .visualize import generate_all_visualizations
+from .metrics import (
+    METRIC_VERSION, METRICS, compute_cer, compute_wer, compute_accuracy,
+    normalize_text, score_prediction,
+)
+
+
+def __getattr__(name: str):
+    # matplotlib / seaborn are only imported once charts are actually needed
+    if name == "generate_all_visualizations":
+        from .visualize import generate_all_visualizations
+        return generate_all_visualizations
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,308 @@
+"""
+Out-of-core aggregation of result files into the chart summary cube.
+
+visualize.build_summary needs every row in one DataFrame. This module gets
+the same cube (cells / models / memory) from any number of result CSVs
+without holding them in memory: each file is read in chunks of
+config.AGG_CHUNK_ROWS, every chunk is reduced to a small Partial, and
+partials are merged (files in parallel, in a process pool). Everything in
+a Partial is mergeable:
+
+    sums and counts        means per (model, category) and per model
+    max                    peak RSS / heap per model
+    first load per worker  average load time (workers load once; a worker
+                           is (source file, model, worker index), since
+                           indices restart at 0 in every run)
+    quantile sketches      percentiles of time_sec and cer per cell
+
+Means and sketches cover only rows with status "ok" (rows without a status
+count as ok): timeouts, errors, quarantined and reused rows carry no
+measurement of their own and are counted as "failed" instead.
+
+The sketch is a log-bucketed histogram (as in DDSketch): a value v > 0
+falls into bucket ceil(log_gamma(v)) with gamma = (1 + a) / (1 - a), so
+a quantile is within relative error a (config.AGG_SKETCH_ACCURACY) of the
+value at its rank, and merging two sketches is adding their bucket counts. Zeros (perfect CER)
+have their own bucket.
+
+Usage:
+    python -m evaluation.aggregate                       # all_results.csv
+    python -m evaluation.aggregate results/runs/*/results.csv --workers 8
+"""
+
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from evaluation.watchdog import STATUS_OK
+
+MEAN_COLUMNS = ("cer", "wer", "accuracy", "time_sec")
+SKETCH_COLUMNS = ("time_sec", "cer")
+PERCENTILES = (0.5, 0.9, 0.99)
+MEMORY_COLUMNS = ("peak_rss_mb", "rss_delta_mb", "py_heap_peak_mb")
+
+# Bucket for values at or below zero
+ZERO_BUCKET = np.iinfo(np.int64).min
+_MIN_VALUE = 1e-9
+
+
+# ── Quantile sketch ───────────────────────────────────────────
+
+def _log_gamma(accuracy: float) -> float:
+    return math.log((1 + accuracy) / (1 - accuracy))
+
+
+def sketch_buckets(values: np.ndarray, accuracy: float) -> np.ndarray:
+    """Bucket index of every (non-NaN) value."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, ZERO_BUCKET, dtype=np.int64)
+    positive = values > _MIN_VALUE
+    out[positive] = np.ceil(np.log(values[positive]) / _log_gamma(accuracy)).astype(np.int64)
+    return out
+
+
+def sketch_quantile(buckets: pd.Series, q: float, accuracy: float) -> float:
+    """q-quantile from a {bucket: count} Series."""
+    buckets = buckets.sort_index()
+    total = buckets.sum()
+    if total == 0:
+        return float("nan")
+    rank = q * (total - 1)
+    bucket = buckets.index[np.searchsorted(buckets.cumsum().to_numpy(), rank, side="right")]
+    if bucket == ZERO_BUCKET:
+        return 0.0
+    gamma = (1 + accuracy) / (1 - accuracy)
+    # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+    return 2 * gamma ** bucket / (gamma + 1)
+
+
+# ── Mergeable partial aggregates ──────────────────────────────
+
+class Partial:
+    """Mergeable aggregates of some result rows."""
+
+    def __init__(self, cells: pd.DataFrame, sketches: pd.Series, loads: pd.Series,
+                 memory: pd.DataFrame, accuracy: float):
+        self.cells = cells          # (model, category) -> <col>_sum / <col>_n, rows
+        self.sketches = sketches    # (model, category, column, bucket) -> count
+        self.loads = loads          # (source, model, worker) -> load_sec of that worker
+        self.memory = memory        # model -> sums / counts / maxima
+        self.accuracy = accuracy
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, accuracy: float = config.AGG_SKETCH_ACCURACY,
+                   source: str = "") -> "Partial":
+        """Aggregates of `df`; `source` (the file it came from) tells apart
+        workers with the same index in different runs."""
+        keys = ["model", "category"]
+        done = df["status"].fillna(STATUS_OK) == STATUS_OK if "status" in df \
+            else pd.Series(True, index=df.index)
+        ok = df[done]
+        parts = {"rows": ok.groupby(keys).size(), "failed": df[~done].groupby(keys).size()}
+        for col in MEAN_COLUMNS:
+            if col in ok:
+                grouped = ok.groupby(keys)[col]
+                parts[f"{col}_sum"] = grouped.sum()
+                parts[f"{col}_n"] = grouped.count()
+        cells = pd.DataFrame(parts).fillna(0)
+
+        sketch_parts = []
+        for col in SKETCH_COLUMNS:
+            if col not in ok:
+                continue
+            values = ok[keys + [col]].dropna()
+            counts = values.assign(column=col, bucket=sketch_buckets(values[col], accuracy)) \
+                .groupby(keys + ["column", "bucket"]).size()
+            sketch_parts.append(counts)
+        sketches = pd.concat(sketch_parts) if sketch_parts else pd.Series(dtype="int64")
+
+        if "load_sec" in df and "worker" in df:
+            loads = df.drop_duplicates(subset=["model", "worker"]).assign(source=source) \
+                .set_index(["source", "model", "worker"])["load_sec"]
+        else:
+            loads = pd.Series(dtype="float64")
+
+        memory = pd.DataFrame()
+        if "peak_rss_mb" in df:
+            grouped = df.groupby("model")
+            memory = pd.DataFrame({
+                "peak_rss_max": grouped["peak_rss_mb"].max(),
+                "peak_rss_n": grouped["peak_rss_mb"].count(),
+                "delta_sum": grouped["rss_delta_mb"].sum(),
+                "delta_n": grouped["rss_delta_mb"].count(),
+                "heap_max": grouped["py_heap_peak_mb"].max(),
+            })
+        return cls(cells, sketches, loads, memory, accuracy)
+
+    def merge(self, other: "Partial") -> "Partial":
+        """Combine with the aggregates of later rows."""
+        cells = self.cells.add(other.cells, fill_value=0)
+        sketches = self.sketches.add(other.sketches, fill_value=0)
+        # First load per (source, model, worker) wins, like drop_duplicates
+        loads = pd.concat([self.loads, other.loads])
+        loads = loads[~loads.index.duplicated(keep="first")]
+        memory = self.memory
+        if not other.memory.empty:
+            if memory.empty:
+                memory = other.memory
+            else:
+                both = pd.concat([memory, other.memory])
+                memory = pd.DataFrame({
+                    "peak_rss_max": both["peak_rss_max"].groupby(level=0).max(),
+                    "peak_rss_n": both["peak_rss_n"].groupby(level=0).sum(),
+                    "delta_sum": both["delta_sum"].groupby(level=0).sum(),
+                    "delta_n": both["delta_n"].groupby(level=0).sum(),
+                    "heap_max": both["heap_max"].groupby(level=0).max(),
+                })
+        return Partial(cells, sketches, loads, memory, self.accuracy)
+
+
+def _mean(cells: pd.DataFrame, name: str) -> pd.Series:
+    if f"{name}_sum" not in cells:
+        return pd.Series(np.nan, index=cells.index)
+    n = cells[f"{name}_n"]
+    return (cells[f"{name}_sum"] / n).where(n > 0)
+
+
+# ── Reading files ─────────────────────────────────────────────
+
+def _usecols(path: Path) -> list[str]:
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = {"model", "category", "status", "worker", "load_sec", *MEAN_COLUMNS,
+              *MEMORY_COLUMNS}
+    return [c for c in header if c in wanted]
+
+
+def aggregate_file(path: str | Path, chunk_rows: int = config.AGG_CHUNK_ROWS,
+                   accuracy: float = config.AGG_SKETCH_ACCURACY) -> Partial | None:
+    """Partial of one CSV, read chunk by chunk (text columns are skipped)."""
+    partial = None
+    source = str(Path(path).resolve())
+    for chunk in pd.read_csv(path, usecols=_usecols(Path(path)), chunksize=chunk_rows):
+        part = Partial.from_frame(chunk, accuracy, source)
+        partial = part if partial is None else partial.merge(part)
+    return partial
+
+
+def aggregate_files(paths: list[str | Path], workers: int | None = None,
+                    chunk_rows: int = config.AGG_CHUNK_ROWS,
+                    accuracy: float = config.AGG_SKETCH_ACCURACY) -> Partial | None:
+    """Merged Partial of several CSVs, one process per file; files are merged
+    in the given order."""
+    paths = [Path(p) for p in paths]
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(aggregate_file, paths, [chunk_rows] * len(paths),
+                                  [accuracy] * len(paths)))
+    else:
+        parts = [aggregate_file(p, chunk_rows, accuracy) for p in paths]
+    merged = None
+    for part in parts:
+        if part is not None:
+            merged = part if merged is None else merged.merge(part)
+    return merged
+
+
+# ── Summary cube ──────────────────────────────────────────────
+
+def summary_from_partial(partial: Partial) -> dict[str, pd.DataFrame]:
+    """The visualize.build_summary cube, plus "percentiles" per cell."""
+    by_model = partial.cells.groupby(level="model").sum()
+    # Cells whose rows all failed have no means; they show up in "Failed"
+    cells_in = partial.cells[partial.cells["rows"] > 0].sort_index()
+    cells = pd.DataFrame({
+        "cer": _mean(cells_in, "cer"),
+        "wer": _mean(cells_in, "wer"),
+        "accuracy": _mean(cells_in, "accuracy"),
+        "time_sec": _mean(cells_in, "time_sec"),
+        "n": cells_in["rows"].astype("int64"),
+        "failed": cells_in["failed"].astype("int64"),
+    })
+
+    models = pd.DataFrame({
+        "Avg_CER": _mean(by_model, "cer"),
+        "Avg_WER": _mean(by_model, "wer"),
+        "Avg_Accuracy": _mean(by_model, "accuracy"),
+        "Avg_Time": _mean(by_model, "time_sec"),
+        "Failed": by_model["failed"].astype("int64"),
+    })
+    if not partial.loads.empty:
+        models["Avg_Load"] = partial.loads.groupby(level="model").mean()
+    summary = {"cells": cells, "models": models}
+
+    if not partial.memory.empty:
+        memory = partial.memory.sort_index()
+        summary["memory"] = pd.DataFrame({
+            "Peak_RSS_MB": memory["peak_rss_max"],
+            "Avg_RSS_Delta_MB": (memory["delta_sum"] / memory["delta_n"]).where(
+                memory["delta_n"] > 0),
+            "Max_Heap_Peak_MB": memory["heap_max"],
+        }).rename_axis("model").dropna(subset=["Peak_RSS_MB"])
+
+    rows = {}
+    if not partial.sketches.empty:
+        for (model, cat, col), buckets in partial.sketches.groupby(level=[0, 1, 2]):
+            buckets = buckets.droplevel([0, 1, 2])
+            for q in PERCENTILES:
+                rows.setdefault((model, cat), {})[f"{col}_p{round(q * 100)}"] = \
+                    sketch_quantile(buckets, q, partial.accuracy)
+    summary["percentiles"] = pd.DataFrame.from_dict(rows, orient="index").rename_axis(
+        ["model", "category"]).sort_index() if rows else pd.DataFrame()
+    return summary
+
+
+def summarize_files(paths: list[str | Path], workers: int | None = None) -> dict | None:
+    partial = aggregate_files(paths, workers)
+    return summary_from_partial(partial) if partial is not None else None
+
+
+def summarize_frame(df: pd.DataFrame) -> dict:
+    """The same cube for rows already in memory."""
+    return summary_from_partial(Partial.from_frame(df))
+
+
+def summary_table(summary: dict) -> pd.DataFrame:
+    """Per (model, category) means and latency percentiles for printing."""
+    cells = summary["cells"]
+    table = pd.DataFrame({
+        "avg_cer": cells["cer"], "avg_wer": cells["wer"],
+        "avg_acc": cells["accuracy"], "avg_time": cells["time_sec"],
+    })
+    pct = summary.get("percentiles", pd.DataFrame())
+    for col in ("time_sec_p50", "time_sec_p90"):
+        if col in pct:
+            table[col.replace("time_sec", "time")] = pct[col]
+    return table.round(3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize result CSVs out of core.")
+    parser.add_argument("paths", nargs="*", help="result CSVs (default: all_results.csv)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="directory for the summary CSVs")
+    args = parser.parse_args()
+
+    paths = args.paths or [config.SCORES_DIR / "all_results.csv"]
+    summary = summarize_files(paths, args.workers)
+    if summary is None:
+        print("No result rows found.")
+        return
+    print(f"{'='*60}")
+    print(f"SUMMARY ({len(paths)} file(s), {int(summary['cells']['n'].sum())} rows)")
+    print(f"{'='*60}")
+    print(summary_table(summary).to_string())
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, table in summary.items():
+            table.to_csv(out / f"summary_{name}.csv")
+        print(f"\nSummary tables saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
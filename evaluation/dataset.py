@@ -0,0 +1,61 @@
+"""
+Dataset enumeration and deterministic sharding.
+
+A shard is written "i/N". Each sample is assigned to a shard by hashing its
+"<category>/<image name>" key, so the assignment of existing images never
+changes when new images are added, and every machine computes the same
+split without coordination.
+"""
+
+import hashlib
+from pathlib import Path
+
+import config
+
+
+def get_dataset_pairs(images_dir: Path, gt_dir: Path) -> list[tuple[Path, str]]:
+    pairs = []
+    for img_path in sorted(images_dir.glob("*.png")):
+        gt_path = gt_dir / f"{img_path.stem}.txt"
+        if gt_path.exists():
+            gt_text = gt_path.read_text(encoding="utf-8").strip()
+            pairs.append((img_path, gt_text))
+    return pairs
+
+
+def parse_shard(text: str | None) -> tuple[int, int] | None:
+    """Parse "i/N" into (i, N); None means no sharding."""
+    if not text:
+        return None
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like 'i/N', got '{text}'") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must satisfy 0 <= i < N, got '{text}'")
+    return index, count
+
+
+def sample_key(category: str, image_name: str) -> str:
+    return f"{category}/{image_name}"
+
+
+def shard_of(category: str, image_name: str, count: int) -> int:
+    digest = hashlib.sha1(sample_key(category, image_name).encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % count
+
+
+def in_shard(category: str, image_name: str, shard: tuple[int, int] | None) -> bool:
+    return shard is None or shard_of(category, image_name, shard[1]) == shard[0]
+
+
+def get_tasks(shard: tuple[int, int] | None = None) -> list[tuple[str, Path, str]]:
+    """Every (category, image, ground truth) in this shard, in a stable
+    order, so a restarted worker can resume by index."""
+    tasks = []
+    for cat_key in config.CATEGORIES:
+        img_dir, gt_dir = config.get_category_dirs(cat_key)
+        for img, gt in get_dataset_pairs(img_dir, gt_dir):
+            if in_shard(cat_key, img.name, shard):
+                tasks.append((cat_key, img, gt))
+    return tasks
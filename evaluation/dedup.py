@@ -0,0 +1,311 @@
+"""
+Near-duplicate detection with perceptual hashes.
+
+Scanner feeds repeat themselves (re-scans, forms that differ only in their
+handwriting, the same receipt template). Every image gets a 64-bit DCT
+perceptual hash: downscale to 32x32 grayscale, take the 2-D DCT (a matrix
+product, batched over images with numpy), keep the 8x8 lowest frequencies
+and set one bit per coefficient above their median (the DC term excluded).
+Visually similar images have hashes a few bits apart.
+
+HammingIndex finds earlier hashes within `max_distance` bits using the
+pigeonhole principle: the hash is split into max_distance + 1 chunks, two
+hashes that close must agree exactly on at least one chunk, so one dict
+lookup per chunk yields the candidates, which are then verified with a
+popcount. Each image is compared with the images before it (in evaluation
+order); the closest match becomes its original.
+
+A Deduplicator applies this ahead of a runner in one of two modes:
+
+    flag    every image is still run; duplicates get "duplicate_of" (the
+            original's category/image) and "dup_distance" columns, so the
+            report can show how far their CER is from the original's
+    reuse   a duplicate whose original already has a prediction is not run:
+            its row ("status" reused, time 0) scores the original's
+            prediction against its own ground truth and records the
+            original's time as "saved_sec"
+
+Hashes are cached per file (path, size, mtime) in cache/phash.json.
+
+Usage:
+    python -m evaluation.dedup                  # duplicate groups in the datasets
+    python -m evaluation.dedup --max-distance 6
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+import config
+from evaluation.dataset import get_tasks, sample_key
+from evaluation.watchdog import STATUS_OK, STATUS_REUSED
+
+MODES = ("flag", "reuse")
+
+HASH_SIZE = 8     # 8x8 low-frequency coefficients -> 64 bits
+IMG_SIZE = 32     # images are reduced to 32x32 before the DCT
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix: dct(x) = D @ x."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    d[0] /= np.sqrt(2)
+    return d
+
+
+_DCT = _dct_matrix(IMG_SIZE)[:HASH_SIZE]  # only the rows we keep
+
+
+def load_pixels(path: str | Path) -> np.ndarray:
+    """32x32 grayscale float32 pixels of an image."""
+    with Image.open(path) as img:
+        small = img.convert("L").resize((IMG_SIZE, IMG_SIZE), Image.BILINEAR)
+    return np.asarray(small, dtype=np.float32)
+
+
+def phash_batch(pixels: np.ndarray) -> np.ndarray:
+    """64-bit perceptual hashes (uint64) of an (N, 32, 32) pixel stack."""
+    # Low-frequency 8x8 block of the 2-D DCT of every image at once
+    coeffs = np.einsum("ij,njk,lk->nil", _DCT, pixels.astype(np.float64), _DCT)
+    flat = coeffs.reshape(len(pixels), -1)
+    median = np.median(flat[:, 1:], axis=1, keepdims=True)  # without the DC term
+    bits = (flat > median).astype(np.uint8)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+# ── Hash cache ────────────────────────────────────────────────
+
+def _cache_path() -> Path:
+    return config.CACHE_DIR / "phash.json"
+
+
+def _file_key(path: Path) -> str:
+    stat = path.stat()
+    return f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def image_hashes(paths: list[Path], batch: int = 256) -> np.ndarray:
+    """Hashes of `paths` (uint64, same order), computed once per file."""
+    cache_file = _cache_path()
+    cache = {}
+    if cache_file.exists():
+        try:
+            cache = json.loads(cache_file.read_text(encoding="utf-8"))
+        except ValueError:
+            cache = {}
+    keys = [_file_key(Path(p)) for p in paths]
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    for start in range(0, len(missing), batch):
+        chunk = missing[start:start + batch]
+        hashes = phash_batch(np.stack([load_pixels(paths[i]) for i in chunk]))
+        for i, value in zip(chunk, hashes):
+            cache[keys[i]] = f"{int(value):016x}"
+    if missing:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so a concurrent worker never reads half a file
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache), encoding="utf-8")
+        tmp.replace(cache_file)
+    return np.array([int(cache[key], 16) for key in keys], dtype=np.uint64)
+
+
+# ── Hamming index ─────────────────────────────────────────────
+
+class HammingIndex:
+    """Multi-index hashing: exact lookups on max_distance + 1 hash chunks."""
+
+    def __init__(self, max_distance: int, bits: int = HASH_SIZE * HASH_SIZE):
+        self.max_distance = max_distance
+        n_chunks = min(max_distance + 1, bits)
+        edges = np.linspace(0, bits, n_chunks + 1).astype(int)
+        self._chunks = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self._tables = [{} for _ in self._chunks]
+        self._hashes = []
+
+    def _parts(self, value: int):
+        return [(value >> shift) & mask for shift, mask in self._chunks]
+
+    def add(self, value: int) -> int:
+        """Index a hash; returns its id (insertion order)."""
+        item = len(self._hashes)
+        self._hashes.append(value)
+        for table, part in zip(self._tables, self._parts(value)):
+            table.setdefault(part, []).append(item)
+        return item
+
+    def query(self, value: int) -> tuple[int, int] | None:
+        """(id, distance) of the closest indexed hash within max_distance,
+        earliest first on ties; None when there is none."""
+        candidates = set()
+        for table, part in zip(self._tables, self._parts(value)):
+            candidates.update(table.get(part, ()))
+        best = None
+        for item in sorted(candidates):
+            distance = (self._hashes[item] ^ value).bit_count()
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (item, distance)
+        return best
+
+
+def find_duplicates(hashes: np.ndarray,
+                    max_distance: int = config.DEDUP_MAX_DISTANCE) -> dict[int, tuple[int, int]]:
+    """{position: (position of its original, Hamming distance)} for every
+    image within max_distance bits of an earlier, non-duplicate image."""
+    index = HammingIndex(max_distance)
+    originals = []  # index id -> position
+    duplicates = {}
+    for pos, value in enumerate(int(h) for h in hashes):
+        match = index.query(value)
+        if match is None:
+            index.add(value)
+            originals.append(pos)
+        else:
+            duplicates[pos] = (originals[match[0]], match[1])
+    return duplicates
+
+
+# ── Runner integration ────────────────────────────────────────
+
+class Deduplicator:
+    """Duplicates among `tasks` ((category, path, gt) in evaluation order)
+    and the predictions of their originals."""
+
+    def __init__(self, tasks: list[tuple], mode: str = "flag",
+                 max_distance: int = config.DEDUP_MAX_DISTANCE):
+        if mode not in MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}'. Available: {', '.join(MODES)}")
+        self.mode = mode
+        start = time.perf_counter()
+        keys = [sample_key(cat, img.name) for cat, img, _ in tasks]
+        hashes = image_hashes([img for _, img, _ in tasks])
+        found = find_duplicates(hashes, max_distance)
+        self.hash_sec = time.perf_counter() - start
+        self.duplicates = {keys[pos]: (keys[orig], distance)
+                           for pos, (orig, distance) in found.items()}
+        self.positions = {keys[pos]: orig for pos, (orig, _) in found.items()}
+        self._wanted = {orig for orig, _ in self.duplicates.values()}
+        self._known = {}  # original key -> (prediction, time_sec)
+        self.total = len(tasks)
+
+    def columns(self, key: str) -> dict:
+        """duplicate_of / dup_distance for a result row."""
+        orig, distance = self.duplicates.get(key, (None, None))
+        return {"duplicate_of": orig, "dup_distance": distance}
+
+    def remember(self, row: dict) -> None:
+        """Keep the prediction of an original that finished successfully
+        (status ok; rows without a status are not trusted) from any thread."""
+        key = sample_key(row["category"], row["image"])
+        if key in self._wanted and row.get("status") == STATUS_OK:
+            self._known[key] = (row["prediction"], row["time_sec"])
+
+    def load_known(self, path: str | Path) -> None:
+        """Originals finished by earlier workers (see write_known)."""
+        known = json.loads(Path(path).read_text(encoding="utf-8"))
+        self._known.update({key: tuple(value) for key, value in known.items()
+                            if key in self._wanted})
+
+    def expects(self, key: str, first: int = 0) -> bool:
+        """True when `key` may become reusable once the rows before it are
+        written: its original is at position `first` or later of this run
+        and its prediction has not arrived yet."""
+        return (self.mode == "reuse" and self.positions.get(key, -1) >= first
+                and self.duplicates[key][0] not in self._known)
+
+    def reusable(self, key: str) -> tuple[str, float] | None:
+        """(prediction, time_sec) of the original of `key`, in reuse mode."""
+        if self.mode != "reuse" or key not in self.duplicates:
+            return None
+        return self._known.get(self.duplicates[key][0])
+
+
+def write_known(rows: list[dict], path: Path) -> Path:
+    """{key: [prediction, time_sec]} of the finished rows, for a restarted
+    worker's Deduplicator.load_known."""
+    known = {sample_key(row["category"], row["image"]): [row["prediction"], row["time_sec"]]
+             for row in rows if row.get("status", STATUS_OK) == STATUS_OK}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(known), encoding="utf-8")
+    return path
+
+
+def dedup_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Per model: duplicate rate, reused rows, compute saved and, for
+    duplicates that were run anyway, the mean CER gap to their original."""
+    if "duplicate_of" not in df:
+        return pd.DataFrame()
+    df = df.assign(key=df["category"] + "/" + df["image"],
+                   status=df["status"].fillna(STATUS_OK) if "status" in df else STATUS_OK)
+    rows = []
+    for model, grp in df.groupby("model", sort=False):
+        dups = grp[grp["duplicate_of"].notna()]
+        reused = dups[dups["status"] == STATUS_REUSED]
+        ran = dups[dups["status"] == STATUS_OK]
+        orig_cer = grp.set_index("key")["cer"]
+        gap = (ran["cer"] - ran["duplicate_of"].map(orig_cer)).abs()
+        saved = reused["saved_sec"].sum() if "saved_sec" in grp else 0.0
+        spent = grp["time_sec"].sum()
+        rows.append({
+            "model": model,
+            "images": len(grp),
+            "duplicates": len(dups),
+            "dup_rate": len(dups) / len(grp),
+            "reused": len(reused),
+            "saved_sec": saved,
+            "spent_sec": spent,
+            "saved_pct": saved / (saved + spent) if saved + spent else 0.0,
+            "cer_gap": gap.mean() if gap.notna().any() else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def print_dedup_report(df: pd.DataFrame, run_dir: Path) -> None:
+    """Duplicate rate and compute saved per model of a --dedup run."""
+    report = dedup_report(df)
+    if report.empty:
+        return
+    print(f"\n{'='*60}")
+    print("DEDUPLICATION")
+    print(f"{'='*60}")
+    for row in report.itertuples():
+        line = (f"  {row.model}: {row.duplicates}/{row.images} duplicates "
+                f"({row.dup_rate:.1%}) | {row.reused} reused | saved {row.saved_sec:.1f}s "
+                f"of {row.saved_sec + row.spent_sec:.1f}s ({row.saved_pct:.0%})")
+        if pd.notna(row.cer_gap):
+            line += f" | CER gap to original {row.cer_gap:.3f}"
+        print(line)
+    path = run_dir / "dedup_report.csv"
+    report.round(4).to_csv(path, index=False)
+    print(f"Report saved to {path}")
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate dataset images.")
+    parser.add_argument("--max-distance", type=int, default=config.DEDUP_MAX_DISTANCE,
+                        help="Hamming distance (of 64 bits) that counts as a duplicate")
+    args = parser.parse_args()
+
+    tasks = get_tasks()
+    hashes = image_hashes([img for _, img, _ in tasks])
+    duplicates = find_duplicates(hashes, args.max_distance)
+    keys = [sample_key(cat, img.name) for cat, img, _ in tasks]
+    print(f"{'='*60}")
+    print(f"NEAR-DUPLICATES (<= {args.max_distance} of 64 bits)")
+    print(f"{'='*60}")
+    for pos, (orig, distance) in duplicates.items():
+        print(f"  {keys[pos]}  ~  {keys[orig]}  (distance {distance})")
+    rate = len(duplicates) / len(tasks) if tasks else 0.0
+    print(f"\n{len(duplicates)} of {len(tasks)} images are duplicates ({rate:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Process memory measurement for the evaluation workers.
+
+RSS comes from psutil when it is installed, otherwise from /proc (Linux) or
+getrusage (peak only). The Python heap is tracked with tracemalloc, which is
+opt-in because it slows allocation-heavy models down noticeably.
+"""
+
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:  # optional dependency
+    psutil = None
+
+_MB = 1024 * 1024
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (0 if unknown)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / _MB
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        pages = int(statm.read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / _MB
+    return 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    if psutil is not None and sys.platform == "win32":
+        return psutil.Process().memory_info().peak_wset / _MB
+    try:
+        import resource
+    except ImportError:
+        return rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    return peak / _MB if sys.platform == "darwin" else peak / 1024
+
+
+def linear_slope(values) -> float:
+    """Least-squares slope of values against their index (MB per image)."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    num = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    den = sum((i - mean_x) ** 2 for i in range(n))
+    return num / den
+
+
+class HeapTracker:
+    """tracemalloc wrapper: per-image peak heap plus a growth report.
+
+    A baseline snapshot is taken after the first image (so one-time lazy
+    initialization inside the model is not mistaken for a leak); write_report
+    compares the final heap against it.
+    """
+
+    def __init__(self, enabled: bool, frames: int = 5):
+        self.enabled = enabled
+        self.baseline = None
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def start_image(self) -> None:
+        if self.enabled:
+            tracemalloc.reset_peak()
+
+    def end_image(self) -> float | None:
+        """Peak traced Python heap during the image, in MB."""
+        if not self.enabled:
+            return None
+        _, peak = tracemalloc.get_traced_memory()
+        if self.baseline is None:
+            self.baseline = tracemalloc.take_snapshot()
+        return round(peak / _MB, 2)
+
+    def write_report(self, path: Path, top: int = 25) -> Path | None:
+        """Write the top heap growth sites since the baseline snapshot."""
+        if not self.enabled or self.baseline is None:
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self.baseline, "lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"Traced heap: current {current / _MB:.1f} MB, peak {peak / _MB:.1f} MB",
+            f"Top {top} growth sites since the first image:",
+            "",
+        ]
+        lines += [str(stat) for stat in stats[:top]]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
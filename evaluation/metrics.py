@@ -9,6 +9,10 @@ from functools import wraps
 
 from jiwer import cer, wer
 
+# Bump whenever normalize_text or any metric below changes meaning, so that
+# rescored results can be told apart from the ones they replace.
+METRIC_VERSION = 1
+
 
 def normalize_text(text: str) -> str:
     """Normalize text for fair comparison: lowercase, collapse whitespace,
@@ -43,6 +47,23 @@ def compute_accuracy(prediction: str, reference: str) -> float:
     return max(0.0, (1.0 - compute_cer(prediction, reference)) * 100)
 
 
+# Metric name -> (function(prediction, reference), decimals kept in results).
+# rescore.py recomputes every entry here, so new metrics only need adding once.
+METRICS = {
+    "cer": (compute_cer, 4),
+    "wer": (compute_wer, 4),
+    "accuracy": (compute_accuracy, 2),
+}
+
+
+def score_prediction(prediction: str, reference: str) -> dict:
+    """Compute every registered metric for one prediction, rounded."""
+    return {
+        name: round(func(prediction, reference), ndigits)
+        for name, (func, ndigits) in METRICS.items()
+    }
+
+
 def timed(func):
     """Decorator that returns (result, elapsed_seconds)."""
     @wraps(func)
@@ -0,0 +1,103 @@
+"""
+Producer / consumer stages for the evaluation worker.
+
+    prefetch pool ──> model thread ──> scoring thread
+    (read + decode     (inference        (metrics + ROW
+     next K images)     only)             serialization)
+
+prefetch() runs model.preprocess on up to `depth` upcoming images in a
+thread pool and hands them back in order; ResultWriter scores and prints
+finished images on its own thread. StageClock accumulates busy time per
+stage so the worker can report how well the stages overlap.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+
+class StageClock:
+    """Thread-safe busy-time accumulator for one pipeline stage."""
+
+    def __init__(self, threads: int = 1):
+        self.threads = threads
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.busy += elapsed
+
+    def utilization(self, wall: float) -> float:
+        return self.busy / (wall * self.threads) if wall > 0 else 0.0
+
+
+def _timed(fn, item, clock: StageClock):
+    """Run fn(item) under clock; returns (result, seconds)."""
+    start = time.perf_counter()
+    with clock.track():
+        result = fn(item)
+    return result, time.perf_counter() - start
+
+
+def prefetch(fn, items, depth: int, clock: StageClock):
+    """Yield (item, future of (fn(item), seconds)) in order, computing up to
+    `depth` items ahead in a thread pool. depth 0 runs fn lazily in the
+    caller's thread when the future's result is requested."""
+    if depth <= 0:
+        for item in items:
+            future = Future()
+            try:
+                future.set_result(_timed(fn, item, clock))
+            except Exception as e:
+                future.set_exception(e)
+            yield item, future
+        return
+
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch") as pool:
+        it = iter(items)
+        pending = deque((item, pool.submit(_timed, fn, item, clock))
+                        for item in islice(it, depth))
+        while pending:
+            item, future = pending.popleft()
+            for nxt in islice(it, 1):
+                pending.append((nxt, pool.submit(_timed, fn, nxt, clock)))
+            yield item, future
+
+
+class ResultWriter:
+    """Runs result jobs (scoring + printing) on one background thread, in
+    submission order, so the model thread goes straight to the next image."""
+
+    def __init__(self, clock: StageClock):
+        self.clock = clock
+        self._jobs = queue.Queue()
+        threading.Thread(target=self._run, name="result-writer", daemon=True).start()
+
+    def submit(self, job) -> None:
+        self._jobs.put(job)
+
+    def drain(self) -> None:
+        """Block until every submitted job has run."""
+        self._jobs.join()
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            try:
+                with self.clock.track():
+                    job()
+            except Exception as e:
+                print(f"INFO: [FAIL] result writer: {e}", flush=True)
+            finally:
+                self._jobs.task_done()
@@ -0,0 +1,311 @@
+"""
+CPU profiling of a worker: where does a slow model spend its time?
+
+A Profiler wraps model.load_model() and every model.recognize() call in the
+worker (the model thread; prefetch decoding is reported by the pipeline
+utilization line instead) in one of two modes:
+
+    cprofile   deterministic (every call is traced; exact counts, noticeable
+               overhead on call-heavy Python code)
+    sampling   a background thread samples the model thread's stack every
+               config.PROFILE_SAMPLE_INTERVAL_SEC (low overhead, statistical;
+               time in C functions counts as self time of their Python caller)
+
+Per worker it writes to results/profiles/<model>_worker<N>.*:
+
+    .prof       pstats dump (cprofile; open with snakeviz or pstats)
+    .collapsed  folded stacks, one "frame;frame;frame count" per line
+                (sampling; input for flamegraph.pl or speedscope)
+    .svg        a flamegraph of the collapsed stacks (sampling)
+    .txt        time per section and the top-N hotspots, split into our
+                code (files of this repository) and framework code
+                (site-packages, the standard library, builtins); sampled
+                times are scaled to each section's measured wall time
+"""
+
+import cProfile
+import html
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import config
+
+MODES = ("cprofile", "sampling")
+
+
+# ── Our code vs framework code ────────────────────────────────
+
+@lru_cache(maxsize=None)
+def is_our_code(filename: str) -> bool:
+    """True for source files of this repository (not a virtualenv inside it)."""
+    if filename.startswith("<"):  # <frozen ...>, <string>
+        return False
+    try:
+        rel = Path(filename).resolve().relative_to(config.BASE_DIR.resolve())
+    except (ValueError, OSError):
+        return False
+    return not any(part in ("site-packages", "venv", ".venv") for part in rel.parts)
+
+
+@lru_cache(maxsize=None)
+def short_path(filename: str) -> str:
+    """Repository-relative path, or the part after site-packages."""
+    path = filename.replace("\\", "/")
+    if is_our_code(filename):
+        return Path(filename).resolve().relative_to(config.BASE_DIR.resolve()).as_posix()
+    if "site-packages/" in path:
+        return path.split("site-packages/", 1)[1]
+    return os.path.basename(path)
+
+
+def frame_label(filename: str, lineno: int, func: str) -> str:
+    return f"{func} ({short_path(filename)}:{lineno})"
+
+
+# ── Stack sampler ─────────────────────────────────────────────
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of one thread while `active` is set."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.active = threading.Event()
+        self.section = ""
+        self.stacks = Counter()  # (label root ... leaf) -> samples
+        self.owners = {}         # label -> True for our code
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.is_set():
+            if not self.active.wait(0.1):
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[(self.section, *self._stack(frame))] += 1
+            self._halt.wait(self.interval)
+
+    def _stack(self, frame) -> list[str]:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename != __file__:  # leave out the profiler itself
+                label = frame_label(code.co_filename, code.co_firstlineno, code.co_name)
+                self.owners.setdefault(label, is_our_code(code.co_filename))
+                labels.append(label)
+            frame = frame.f_back
+        return labels[::-1]
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.active.set()
+
+
+# ── Profiler ──────────────────────────────────────────────────
+
+class Profiler:
+    """Profiles the sections of a worker; a no-op when mode is None."""
+
+    def __init__(self, mode: str | None):
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown profiler '{mode}'. Available: {', '.join(MODES)}")
+        self.mode = mode
+        self.sections = {}  # name -> [calls, seconds]
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._sampler = None
+        if mode == "sampling":
+            self._sampler = StackSampler(threading.get_ident(),
+                                         config.PROFILE_SAMPLE_INTERVAL_SEC)
+            self._sampler.start()
+
+    @contextmanager
+    def section(self, name: str):
+        if self.mode is None:
+            yield
+            return
+        start = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        else:
+            self._sampler.section = name
+            self._sampler.active.set()
+        try:
+            yield
+        finally:
+            if self._profile is not None:
+                self._profile.disable()
+            else:
+                self._sampler.active.clear()
+            entry = self.sections.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+
+    def write(self, stem: Path, title: str, top: int = config.PROFILE_TOP_N) -> list[Path]:
+        """Write this profiler's files as <stem>.*; returns their paths."""
+        if self.mode is None or not self.sections:
+            return []
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        header = [title, f"Mode: {self.mode}", ""]
+        header += [f"  {name}: {calls} call(s), {sec:.2f}s total, {sec / calls:.3f}s avg"
+                   for name, (calls, sec) in self.sections.items()]
+        paths = []
+        if self._profile is not None:
+            prof = stem.with_suffix(".prof")
+            self._profile.dump_stats(str(prof))
+            paths.append(prof)
+            body = cprofile_hotspots(pstats.Stats(self._profile), top)
+        else:
+            self._sampler.stop()
+            stacks = dict(self._sampler.stacks)
+            collapsed = stem.with_suffix(".collapsed")
+            collapsed.write_text(format_collapsed(stacks), encoding="utf-8")
+            svg = stem.with_suffix(".svg")
+            svg.write_text(flamegraph_svg(stacks, self._sampler.owners, title),
+                           encoding="utf-8")
+            paths += [collapsed, svg]
+            body = sampling_hotspots(stacks, self._sampler.owners, top, self.sections)
+        txt = stem.with_suffix(".txt")
+        txt.write_text("\n".join(header + [""] + body) + "\n", encoding="utf-8")
+        return [txt] + paths
+
+
+# ── Hotspot summaries ─────────────────────────────────────────
+
+def _hotspot_table(rows: list[tuple], top: int, unit: str, total: float) -> list[str]:
+    """rows: (label, self, inclusive); sorted by self time."""
+    lines = [f"  {'self':>9} {'%':>6} {'incl':>9}  function"]
+    for label, own, incl in sorted(rows, key=lambda r: -r[1])[:top]:
+        share = own / total if total else 0.0
+        lines.append(f"  {own:>8.3f}{unit} {share:>6.1%} {incl:>8.3f}{unit}  {label}")
+    return lines
+
+
+def _split_report(rows: list[tuple], owners: dict, top: int, unit: str,
+                  total: float) -> list[str]:
+    ours = [r for r in rows if owners[r[0]]]
+    framework = [r for r in rows if not owners[r[0]]]
+    own_total = sum(r[1] for r in ours)
+    lines = [f"Self time: our code {own_total:.3f}{unit} "
+             f"({own_total / total if total else 0:.1%}), framework "
+             f"{total - own_total:.3f}{unit}", ""]
+    lines += [f"Top {top} in our code (incl = time below the function, "
+              f"mostly framework calls):"]
+    lines += _hotspot_table(ours, top, unit, total)
+    lines += ["", f"Top {top} in framework code:"]
+    lines += _hotspot_table(framework, top, unit, total)
+    return lines
+
+
+def cprofile_hotspots(stats: pstats.Stats, top: int) -> list[str]:
+    rows, owners = [], {}
+    total = 0.0
+    for (filename, lineno, func), (_, _, tt, ct, _) in stats.stats.items():
+        if filename == __file__:
+            continue
+        label = frame_label(filename, lineno, func) if filename != "~" else func
+        owners[label] = filename != "~" and is_our_code(filename)
+        rows.append((label, tt, ct))
+        total += tt
+    return _split_report(rows, owners, top, "s", total)
+
+
+def sampling_hotspots(stacks: dict, owners: dict, top: int,
+                      sections: dict | None = None) -> list[str]:
+    """Hotspots of sampled stacks. Samples are further apart than the
+    requested interval (GIL contention, wake-up latency), so each section's
+    samples are scaled to its measured wall time in `sections`
+    (name -> [calls, seconds]); sections without one use the interval."""
+    interval = config.PROFILE_SAMPLE_INTERVAL_SEC
+    samples = Counter()
+    for stack, count in stacks.items():
+        samples[stack[0]] += count
+    scale = {name: sections[name][1] / n if sections and name in sections else interval
+             for name, n in samples.items()}
+    own, incl = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack[1:]  # drop the section name
+        sec = count * scale[stack[0]]
+        if frames:
+            own[frames[-1]] += sec
+        for label in set(frames):
+            incl[label] += sec
+    rows = [(label, own[label], incl[label]) for label in incl]
+    lines = [f"{sum(samples.values())} samples, requested every {interval * 1000:.0f}ms "
+             f"(times below scale each section's samples to its wall time):"]
+    lines += [f"  {name}: {n} samples, {scale[name] * 1000:.1f}ms apart"
+              for name, n in samples.items()]
+    return lines + [""] + _split_report(rows, owners, top, "s", sum(own.values()))
+
+
+# ── Collapsed stacks and flamegraph ───────────────────────────
+
+def format_collapsed(stacks: dict) -> str:
+    return "".join(f"{';'.join(f.replace(';', ',') for f in stack)} {count}\n"
+                   for stack, count in sorted(stacks.items()))
+
+
+def _tree(stacks: dict) -> dict:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        node = root
+        node["value"] += count
+        for label in stack:
+            node = node["children"].setdefault(label, {"name": label, "value": 0,
+                                                       "children": {}})
+            node["value"] += count
+    return root
+
+
+def flamegraph_svg(stacks: dict, owners: dict, title: str, width: int = 1200,
+                   row: int = 16) -> str:
+    """Self-contained SVG flamegraph (root at the bottom). Our code is drawn
+    in warm colors, framework code in cool ones; hover for the full name."""
+    root = _tree(stacks)
+    total = root["value"] or 1
+    boxes = []
+
+    def depth_of(node) -> int:
+        return 1 + max((depth_of(c) for c in node["children"].values()), default=0)
+
+    height = (depth_of(root) + 2) * row
+
+    def place(node, x: float, depth: int) -> None:
+        w = node["value"] / total * width
+        if w < 0.5:
+            return
+        boxes.append((node, x, depth, w))
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            place(child, x, depth + 1)
+            x += child["value"] / total * width
+
+    place(root, 0.0, 0)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'font-family="monospace" font-size="11">',
+             f'<text x="4" y="{row - 4}">{html.escape(title)} ({total} samples)</text>']
+    for node, x, depth, w in boxes:
+        y = height - (depth + 1) * row
+        name = node["name"]
+        shade = zlib.crc32(name.encode("utf-8"))
+        hue = 20 + shade % 30 if owners.get(name) else 200 + shade % 40
+        share = node["value"] / total
+        label = html.escape(name)
+        parts.append(f'<g><title>{label} ({node["value"]} samples, {share:.1%})</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" '
+                     f'fill="hsl({hue},70%,60%)"/>')
+        chars = int(w / 7)
+        if chars >= 4:
+            text = name if len(name) <= chars else name[:chars - 2] + ".."
+            parts.append(f'<text x="{x + 2:.1f}" y="{y + row - 4}">{html.escape(text)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
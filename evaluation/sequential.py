@@ -0,0 +1,191 @@
+"""
+Early-stopping (sequential) evaluation.
+
+Instead of running a model over every image, adaptive mode visits each
+category's images in a seeded random order and keeps bootstrap confidence
+intervals on mean CER and mean latency up to date. After `min_images`, and
+then every `batch` images, a (model, category) pair stops when
+
+    precise    the CER interval half-width <= cer_half_width AND the
+               latency half-width <= time_rel_half_width x mean latency, or
+    dominated  another model's intervals are entirely better on both CER and
+               latency (its upper bounds lie below this model's lower bounds).
+
+References for dominance come from models already evaluated in the same run
+(and, optionally, an earlier run). The report lists the estimates, how many
+images each pair actually used and why it stopped.
+"""
+
+import random
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import config
+from evaluation.stats import bootstrap_mean_ci
+
+
+def default_settings() -> dict:
+    """Stopping rule settings from config (JSON-serializable for worker specs)."""
+    return {
+        "min_images": config.ADAPTIVE_MIN_IMAGES,
+        "batch": config.ADAPTIVE_BATCH,
+        "cer_half_width": config.ADAPTIVE_CER_HALF_WIDTH,
+        "time_rel_half_width": config.ADAPTIVE_TIME_REL_HALF_WIDTH,
+        "n_boot": config.ADAPTIVE_N_BOOT,
+        "seed": config.ADAPTIVE_SEED,
+    }
+
+
+def adaptive_order(tasks: list[tuple], seed: int) -> list[tuple]:
+    """Shuffle images within each category (categories keep their order).
+
+    Deterministic for a given seed, so a restarted worker resumes by index."""
+    by_cat = {}
+    for task in tasks:
+        by_cat.setdefault(task[0], []).append(task)
+    ordered = []
+    for cat, items in by_cat.items():
+        random.Random(f"{seed}:{cat}").shuffle(items)
+        ordered += items
+    return ordered
+
+
+def estimate(cer, time_sec, n_boot: int = 1000, seed: int = 0) -> dict:
+    """Mean CER / latency with (95%) bootstrap intervals."""
+    cer_mean, cer_lo, cer_hi = bootstrap_mean_ci(cer, n_boot=n_boot, seed=seed)
+    t_mean, t_lo, t_hi = bootstrap_mean_ci(time_sec, n_boot=n_boot, seed=seed)
+    return {"n": len(cer), "cer": cer_mean, "cer_lo": cer_lo, "cer_hi": cer_hi,
+            "time": t_mean, "time_lo": t_lo, "time_hi": t_hi}
+
+
+def stop_reason(est: dict, settings: dict, references: list[dict]) -> str | None:
+    """Why a pair with estimate `est` can stop, or None to keep sampling."""
+    if est["n"] < settings["min_images"]:
+        return None
+    for ref in references:
+        if est["cer_lo"] > ref["cer_hi"] and est["time_lo"] > ref["time_hi"]:
+            return f"dominated by {ref['model']}"
+    cer_ok = (est["cer_hi"] - est["cer_lo"]) / 2 <= settings["cer_half_width"]
+    time_ok = (est["time_hi"] - est["time_lo"]) / 2 <= \
+        settings["time_rel_half_width"] * est["time"]
+    return "precise" if cer_ok and time_ok else None
+
+
+class SequentialEstimator:
+    """Per-category CER / latency samples of one model and the stopping rule.
+
+    add() may be called from the worker's scoring thread, check() from the
+    model thread."""
+
+    def __init__(self, settings: dict, references: dict | None = None,
+                 seen: dict | None = None):
+        self.settings = settings
+        self.references = references or {}
+        self._values = {cat: (list(v["cer"]), list(v["time"]))
+                        for cat, v in (seen or {}).items()}
+        self._lock = threading.Lock()
+
+    def add(self, category: str, cer: float, time_sec: float) -> None:
+        with self._lock:
+            cers, times = self._values.setdefault(category, ([], []))
+            cers.append(cer)
+            times.append(time_sec)
+
+    def count(self, category: str) -> int:
+        with self._lock:
+            return len(self._values.get(category, ([], []))[0])
+
+    def due(self, n: int) -> bool:
+        """True when the stopping rule should be evaluated after n images."""
+        s = self.settings
+        return n >= s["min_images"] and (n - s["min_images"]) % s["batch"] == 0
+
+    def estimate(self, category: str) -> dict:
+        with self._lock:
+            cers, times = (list(v) for v in self._values.get(category, ([], [])))
+        return estimate(cers, times, self.settings["n_boot"], self.settings["seed"])
+
+    def check(self, category: str) -> tuple[str | None, dict]:
+        est = self.estimate(category)
+        return stop_reason(est, self.settings, self.references.get(category, [])), est
+
+
+def _measured(df: pd.DataFrame) -> pd.DataFrame:
+    """Successfully scored rows (errors, timeouts and skips carry no sample)."""
+    if "status" in df.columns:
+        df = df[df["status"].fillna("ok") == "ok"]
+    return df[df["time_sec"].notna()]
+
+
+def seen_values(rows: list[dict]) -> dict:
+    """{category: {"cer": [...], "time": [...]}} of one model's rows, to
+    seed the estimator of a restarted worker."""
+    seen = {}
+    for row in rows:
+        if row.get("status", "ok") != "ok" or row.get("time_sec") is None:
+            continue
+        entry = seen.setdefault(row["category"], {"cer": [], "time": []})
+        entry["cer"].append(row["cer"])
+        entry["time"].append(row["time_sec"])
+    return seen
+
+
+def reference_estimates(df: pd.DataFrame, settings: dict) -> dict:
+    """{category: [estimate + "model"]} for every model in `df`."""
+    refs = {}
+    for (model, cat), grp in _measured(df).groupby(["model", "category"]):
+        est = estimate(grp["cer"], grp["time_sec"], settings["n_boot"], settings["seed"])
+        refs.setdefault(cat, []).append({"model": model, **est})
+    return refs
+
+
+def merge_references(*refs: dict) -> dict:
+    """Combine {category: [estimates]} mappings."""
+    merged = {}
+    for ref in refs:
+        for cat, found in ref.items():
+            merged.setdefault(cat, []).extend(found)
+    return merged
+
+
+def adaptive_report(df: pd.DataFrame, available: dict, settings: dict,
+                    stops: dict) -> pd.DataFrame:
+    """Estimate, interval, images used / available and stop reason per
+    (model, category); `stops` maps (model, category) to the reason the
+    pair was stopped during the run."""
+    rows = []
+    for (model, cat), grp in _measured(df).groupby(["model", "category"]):
+        est = estimate(grp["cer"], grp["time_sec"], settings["n_boot"], settings["seed"])
+        total = available.get(cat, est["n"])
+        reason = stops.get((model, cat)) or ("exhausted" if est["n"] >= total else "incomplete")
+        rows.append({"model": model, "category": cat, "images_used": est["n"],
+                     "images_available": total,
+                     **{k: v for k, v in est.items() if k != "n"},
+                     "stop_reason": reason})
+    return pd.DataFrame(rows)
+
+
+def print_adaptive_report(df: pd.DataFrame, tasks: list[tuple], stops: dict,
+                          run_dir: Path) -> None:
+    """Estimates and images used per (model, category) of an adaptive run."""
+    available = {}
+    for cat, _, _ in tasks:
+        available[cat] = available.get(cat, 0) + 1
+    report = adaptive_report(df, available, default_settings(), stops)
+    if report.empty:
+        return
+    print(f"\n{'='*60}")
+    print("ADAPTIVE EVALUATION (mean with 95% CI)")
+    print(f"{'='*60}")
+    for row in report.itertuples():
+        print(f"  {row.model} | {config.get_category_label(row.category)}: "
+              f"CER {row.cer:.3f} [{row.cer_lo:.3f}, {row.cer_hi:.3f}] | "
+              f"{row.time:.2f}s [{row.time_lo:.2f}, {row.time_hi:.2f}] | "
+              f"{row.images_used}/{row.images_available} images | {row.stop_reason}")
+    used, total = report["images_used"].sum(), report["images_available"].sum()
+    print(f"\n  Used {used} of {total} model-image evaluations ({used / total:.0%})")
+    path = run_dir / "adaptive_report.csv"
+    report.round(4).to_csv(path, index=False)
+    print(f"Report saved to {path}")
@@ -0,0 +1,70 @@
+"""
+Bootstrap statistics for comparing evaluation runs.
+
+All resampling is vectorized: a (n_boot, n) index matrix is drawn once and
+every bootstrap replicate is computed with a single NumPy reduction.
+"""
+
+import numpy as np
+
+
+def _resample_index(n: int, n_boot: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.integers(0, n, size=(n_boot, n))
+
+
+def bootstrap_mean_ci(values, n_boot: int = 2000, alpha: float = 0.05,
+                      seed: int | None = 0) -> tuple[float, float, float]:
+    """Mean of `values` and its (1 - alpha) percentile bootstrap interval."""
+    x = np.asarray(values, dtype=float)
+    if len(x) == 0:
+        return float("nan"), float("nan"), float("nan")
+    if len(x) == 1:
+        return float(x[0]), float(x[0]), float(x[0])
+    rng = np.random.default_rng(seed)
+    means = x[_resample_index(len(x), n_boot, rng)].mean(axis=1)
+    lo, hi = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+    return float(x.mean()), float(lo), float(hi)
+
+
+def paired_bootstrap(baseline, candidate, n_boot: int = 2000,
+                     alpha: float = 0.05, seed: int | None = 0) -> dict:
+    """Paired bootstrap of candidate vs baseline on the same samples.
+
+    Returns the mean difference (candidate - baseline) and the ratio of
+    means (candidate / baseline), each with a (1 - alpha) interval. Images
+    are resampled jointly so per-image difficulty cancels out.
+    """
+    base = np.asarray(baseline, dtype=float)
+    cand = np.asarray(candidate, dtype=float)
+    n = len(base)
+    out = {"n": n}
+    if n == 0:
+        nan = float("nan")
+        return {**out, "diff": nan, "diff_lo": nan, "diff_hi": nan,
+                "ratio": nan, "ratio_lo": nan, "ratio_hi": nan}
+
+    rng = np.random.default_rng(seed)
+    idx = _resample_index(n, n_boot, rng)
+    base_means = base[idx].mean(axis=1)
+    cand_means = cand[idx].mean(axis=1)
+    diffs = cand_means - base_means
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = cand_means / base_means
+    ratios[~np.isfinite(ratios)] = np.nan
+    ratio = cand.mean() / base.mean() if base.mean() else float("nan")
+
+    q = [alpha / 2, 1 - alpha / 2]
+    diff_lo, diff_hi = np.quantile(diffs, q)
+    if np.isnan(ratios).all():
+        ratio_lo = ratio_hi = float("nan")
+    else:
+        ratio_lo, ratio_hi = np.nanquantile(ratios, q)
+    return {
+        **out,
+        "diff": float(cand.mean() - base.mean()),
+        "diff_lo": float(diff_lo),
+        "diff_hi": float(diff_hi),
+        "ratio": float(ratio),
+        "ratio_lo": float(ratio_lo),
+        "ratio_hi": float(ratio_hi),
+    }
@@ -0,0 +1,201 @@
+"""
+Run history: every evaluation run is stored under results/runs/<run_id>/.
+
+Each run directory holds:
+    meta.json          run ID, kind, timestamp and environment fingerprint
+    results.csv        scored rows (prediction / ground truth truncated)
+    predictions.jsonl  the same rows with the full texts
+    expected.txt       "<category>/<image>" keys the run was meant to cover
+                       (written for sharded runs, used by merge.py)
+
+all_results.csv only keeps the first 200 characters of each text, which is
+enough to eyeball but not to recompute metrics; predictions.jsonl is what
+rescore.py reads. Keeping every run (instead of overwriting one CSV) is what
+lets compare.py gate on regressions against a baseline run.
+"""
+
+import importlib.metadata
+import json
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import config
+
+# Characters of prediction / ground truth kept in the results CSVs
+TEXT_PREVIEW_CHARS = 200
+
+# Distributions whose versions go into the environment fingerprint
+FINGERPRINT_PACKAGES = [
+    "pytesseract", "easyocr", "paddlepaddle", "paddleocr", "python-doctr",
+    "transformers", "torch", "torchvision", "jiwer", "numpy", "pandas",
+    "Pillow", "requests",
+]
+
+# Environment variables that control intra-op threading in the frameworks
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "FLAGS_use_mkldnn",
+]
+
+
+# ── Environment fingerprint ───────────────────────────────────
+
+def _cpu_model() -> str:
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        for line in cpuinfo.read_text(errors="replace").splitlines():
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    return platform.processor() or platform.machine()
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, timeout=10, cwd=str(config.BASE_DIR),
+        )
+        return out.stdout.strip() if out.returncode == 0 else ""
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment_fingerprint() -> dict:
+    """Library versions, CPU and thread settings of the current machine."""
+    versions = {}
+    for pkg in FINGERPRINT_PACKAGES:
+        try:
+            versions[pkg] = importlib.metadata.version(pkg)
+        except importlib.metadata.PackageNotFoundError:
+            versions[pkg] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "threads": {var: os.environ.get(var) for var in THREAD_ENV_VARS},
+        "packages": versions,
+        "git_commit": _git_commit(),
+    }
+
+
+def fingerprint_diff(a: dict, b: dict, prefix: str = "") -> list[tuple]:
+    """Flattened (key, a_value, b_value) for every fingerprint field that differs."""
+    diffs = []
+    for key in sorted(set(a) | set(b)):
+        va, vb = a.get(key), b.get(key)
+        if isinstance(va, dict) and isinstance(vb, dict):
+            diffs.extend(fingerprint_diff(va, vb, f"{prefix}{key}."))
+        elif va != vb:
+            diffs.append((f"{prefix}{key}", va, vb))
+    return diffs
+
+
+# ── Writing runs ──────────────────────────────────────────────
+
+def truncate_texts(rows: list[dict]) -> list[dict]:
+    """Copy of rows with prediction / ground truth cut to the CSV preview."""
+    out = []
+    for row in rows:
+        row = dict(row)
+        for key in ("prediction", "ground_truth"):
+            if isinstance(row.get(key), str):
+                row[key] = row[key][:TEXT_PREVIEW_CHARS]
+        out.append(row)
+    return out
+
+
+def new_run_id(kind: str) -> str:
+    """Sortable, unique run ID such as 20240131-142501-local."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    run_id = f"{stamp}-{kind}"
+    n = 1
+    while (config.RUNS_DIR / run_id).exists():
+        n += 1
+        run_id = f"{stamp}-{kind}-{n}"
+    return run_id
+
+
+def save_run(rows: list[dict], kind: str, expected: list[str] | None = None,
+             **meta) -> Path:
+    """Store one run's rows and metadata; returns the run directory."""
+    run_id = new_run_id(kind)
+    run_dir = config.RUNS_DIR / run_id
+    run_dir.mkdir(parents=True)
+
+    if expected is not None:
+        (run_dir / "expected.txt").write_text("\n".join(expected) + "\n", encoding="utf-8")
+
+    with open(run_dir / "predictions.jsonl", "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    pd.DataFrame(truncate_texts(rows)).to_csv(run_dir / "results.csv", index=False)
+
+    info = {
+        "run_id": run_id,
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_rows": len(rows),
+        "models": sorted({r["model"] for r in rows}),
+        "categories": sorted({r["category"] for r in rows}),
+        "environment": environment_fingerprint(),
+        **meta,
+    }
+    (run_dir / "meta.json").write_text(json.dumps(info, indent=2), encoding="utf-8")
+    return run_dir
+
+
+# ── Reading runs ──────────────────────────────────────────────
+
+def list_runs() -> list[str]:
+    """Run IDs, oldest first."""
+    if not config.RUNS_DIR.exists():
+        return []
+    return sorted(p.name for p in config.RUNS_DIR.iterdir()
+                  if (p / "meta.json").exists())
+
+
+def resolve_run_dir(run: str | Path) -> Path:
+    """Accept a run ID from results/runs/ or a path to any run directory."""
+    path = Path(run)
+    if (path / "meta.json").exists():
+        return path
+    return config.RUNS_DIR / str(run)
+
+
+def load_run_meta(run_id: str) -> dict:
+    return json.loads((resolve_run_dir(run_id) / "meta.json").read_text(encoding="utf-8"))
+
+
+def run_results_path(run_id: str) -> Path:
+    """Results CSV of a run, preferring the newest rescored metric version."""
+    run_dir = resolve_run_dir(run_id)
+    rescored = sorted(run_dir.glob("results_metrics_v*.csv"),
+                      key=lambda p: int(p.stem.rsplit("v", 1)[1]))
+    return rescored[-1] if rescored else run_dir / "results.csv"
+
+
+def load_run(run_id: str) -> pd.DataFrame:
+    return pd.read_csv(run_results_path(run_id))
+
+
+def load_predictions(path: str | Path) -> list[dict]:
+    """Read every row from a predictions JSON Lines file."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows
+
+
+def list_prediction_files() -> list[Path]:
+    """predictions.jsonl of every stored run, oldest run first."""
+    return [config.RUNS_DIR / run_id / "predictions.jsonl" for run_id in list_runs()
+            if (config.RUNS_DIR / run_id / "predictions.jsonl").exists()]
@@ -11,32 +11,49 @@ Charts produced (multi-category):
     7. Processing time comparison
     8. Radar / spider chart (overall)
     9. Summary table as image
+   10. Category winners table
+   11. Memory per model (peak RSS, per-image growth)
+   12. CER vs latency Pareto frontier per category (profile sweeps)
+
+All aggregates are computed once into a summary cube (see build_summary) and
+each chart only receives the slice it draws. generate_all_visualizations
+builds the cube out of core (evaluation/aggregate.py), so result files of
+any size, and several of them, can be charted. Charts are rendered in a process
+pool, and a chart is skipped when the hash of its input slice matches the one
+recorded at its last render.
 """
 
+import hashlib
+import json
 import math
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import matplotlib
+
+matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 
 import config
+from evaluation.watchdog import STATUS_OK
 
-matplotlib.use("Agg")
 plt.rcParams.update({
-    "figure.dpi": 150,
+    "figure.dpi": config.VIS_DPI,
     "savefig.bbox": "tight",
     "font.size": 11,
 })
 
 VIS_DIR = config.VIS_DIR
+RENDER_CACHE = VIS_DIR / ".render_cache.json"
 
 
 def _save(fig, name: str) -> None:
     path = VIS_DIR / f"{name}.png"
-    fig.savefig(str(path), bbox_inches="tight", dpi=150)
+    fig.savefig(str(path), bbox_inches="tight", dpi=config.VIS_DPI)
     plt.close(fig)
     print(f"  [OK] Saved {path}")
 
@@ -45,66 +62,117 @@ def _get_colors(n: int):
     return sns.color_palette("husl", n)
 
 
+def _category_label(cat: str) -> str:
+    return config.CATEGORIES[cat][1] if cat in config.CATEGORIES else cat
+
+
+def _with_labels(pivot: pd.DataFrame) -> pd.DataFrame:
+    """Rename category columns to their display labels."""
+    return pivot.rename(columns={col: _category_label(col) for col in pivot.columns})
+
+
+# ═════════════════════════════════════════════════════════════
+# Summary cube: every aggregate the charts need, computed once
+# ═════════════════════════════════════════════════════════════
+
+def build_summary(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Aggregate raw result rows into the tables every plotter reads.
+
+    Means cover only rows with status "ok" (or without a status); the other
+    rows (timeouts, errors, quarantined, reused) have no measurement of their
+    own and are counted separately.
+
+    Returns:
+        cells:  mean cer / wer / accuracy / time_sec, row count n and failed
+                rows, indexed by (model, category)
+        models: overall Avg_CER / Avg_WER / Avg_Accuracy / Avg_Time and Failed
+                rows per model, plus Avg_Load (model load time per worker
+                start) when recorded
+        memory: Peak_RSS_MB / Avg_RSS_Delta_MB / Max_Heap_Peak_MB per model
+                (only when the results carry memory columns)
+    """
+    done = df["status"].fillna(STATUS_OK) == STATUS_OK if "status" in df \
+        else pd.Series(True, index=df.index)
+    metrics = ["cer", "wer", "accuracy", "time_sec"]
+    masked = df.assign(**{col: df[col].where(done) for col in metrics}, ok=done, failed=~done)
+    cells = masked.groupby(["model", "category"]).agg(
+        cer=("cer", "mean"),
+        wer=("wer", "mean"),
+        accuracy=("accuracy", "mean"),
+        time_sec=("time_sec", "mean"),
+        n=("ok", "sum"),
+        failed=("failed", "sum"),
+    )
+    cells = cells[cells["n"] > 0]  # all-failed cells only count in Failed
+    models = masked.groupby("model").agg(
+        Avg_CER=("cer", "mean"),
+        Avg_WER=("wer", "mean"),
+        Avg_Accuracy=("accuracy", "mean"),
+        Avg_Time=("time_sec", "mean"),
+        Failed=("failed", "sum"),
+    )
+    if "load_sec" in df:
+        loads = df.drop_duplicates(subset=["model", "worker"])
+        models["Avg_Load"] = loads.groupby("model")["load_sec"].mean()
+    summary = {"cells": cells, "models": models}
+    if "peak_rss_mb" in df:
+        summary["memory"] = df.groupby("model").agg(
+            Peak_RSS_MB=("peak_rss_mb", "max"),
+            Avg_RSS_Delta_MB=("rss_delta_mb", "mean"),
+            Max_Heap_Peak_MB=("py_heap_peak_mb", "max"),
+        ).dropna(subset=["Peak_RSS_MB"])
+    return summary
+
+
+def _pivot(summary: dict, metric: str) -> pd.DataFrame:
+    """models × categories table of one metric from the summary cube."""
+    return summary["cells"][metric].unstack()
+
+
 # ═════════════════════════════════════════════════════════════
 # 1. CER bar chart for EACH category
 # ═════════════════════════════════════════════════════════════
 
-def plot_cer_per_category(df: pd.DataFrame) -> None:
-    categories = df["category"].unique()
-    for i, cat in enumerate(sorted(categories)):
-        subset = df[df["category"] == cat]
-        means = subset.groupby("model")["cer"].mean().sort_values()
-        colors = _get_colors(len(means))
-
-        fig, ax = plt.subplots(figsize=(10, max(4, len(means) * 0.7)))
-        bars = ax.barh(means.index, means.values, color=colors)
-        ax.set_xlabel("Character Error Rate (CER) — lower is better")
-        label = config.CATEGORIES.get(cat, (cat, cat))[1] if cat in config.CATEGORIES else cat
-        ax.set_title(f"CER: {label}")
-        ax.set_xlim(0, min(max(means.values) * 1.2, 1.05))
-        for bar, val in zip(bars, means.values):
-            ax.text(val + 0.008, bar.get_y() + bar.get_height() / 2,
-                    f"{val:.3f}", va="center", fontsize=9)
-        _save(fig, f"01_cer_{cat}")
+def plot_cer_per_category(cat: str, means: pd.Series) -> None:
+    means = means.sort_values()
+    colors = _get_colors(len(means))
+
+    fig, ax = plt.subplots(figsize=(10, max(4, len(means) * 0.7)))
+    bars = ax.barh(means.index, means.values, color=colors)
+    ax.set_xlabel("Character Error Rate (CER) — lower is better")
+    ax.set_title(f"CER: {_category_label(cat)}")
+    ax.set_xlim(0, min(max(means.values) * 1.2, 1.05))
+    for bar, val in zip(bars, means.values):
+        ax.text(val + 0.008, bar.get_y() + bar.get_height() / 2,
+                f"{val:.3f}", va="center", fontsize=9)
+    _save(fig, f"01_cer_{cat}")
 
 
 # ═════════════════════════════════════════════════════════════
 # 2. Accuracy bar chart for EACH category
 # ═════════════════════════════════════════════════════════════
 
-def plot_accuracy_per_category(df: pd.DataFrame) -> None:
-    categories = df["category"].unique()
-    for i, cat in enumerate(sorted(categories)):
-        subset = df[df["category"] == cat]
-        means = subset.groupby("model")["accuracy"].mean().sort_values(ascending=True)
-        colors = _get_colors(len(means))
-
-        fig, ax = plt.subplots(figsize=(10, max(4, len(means) * 0.7)))
-        bars = ax.barh(means.index, means.values, color=colors)
-        ax.set_xlabel("Accuracy (%) — higher is better")
-        label = config.CATEGORIES.get(cat, (cat, cat))[1] if cat in config.CATEGORIES else cat
-        ax.set_title(f"Accuracy: {label}")
-        ax.set_xlim(0, 105)
-        for bar, val in zip(bars, means.values):
-            ax.text(val + 0.5, bar.get_y() + bar.get_height() / 2,
-                    f"{val:.1f}%", va="center", fontsize=9)
-        _save(fig, f"02_accuracy_{cat}")
+def plot_accuracy_per_category(cat: str, means: pd.Series) -> None:
+    means = means.sort_values(ascending=True)
+    colors = _get_colors(len(means))
+
+    fig, ax = plt.subplots(figsize=(10, max(4, len(means) * 0.7)))
+    bars = ax.barh(means.index, means.values, color=colors)
+    ax.set_xlabel("Accuracy (%) — higher is better")
+    ax.set_title(f"Accuracy: {_category_label(cat)}")
+    ax.set_xlim(0, 105)
+    for bar, val in zip(bars, means.values):
+        ax.text(val + 0.5, bar.get_y() + bar.get_height() / 2,
+                f"{val:.1f}%", va="center", fontsize=9)
+    _save(fig, f"02_accuracy_{cat}")
 
 
 # ═════════════════════════════════════════════════════════════
 # 3. CER Heatmap: models × categories
 # ═════════════════════════════════════════════════════════════
 
-def plot_cer_heatmap(df: pd.DataFrame) -> None:
-    pivot = df.groupby(["model", "category"])["cer"].mean().unstack()
-    # Rename columns to display labels
-    col_map = {}
-    for col in pivot.columns:
-        if col in config.CATEGORIES:
-            col_map[col] = config.CATEGORIES[col][1]
-        else:
-            col_map[col] = col
-    pivot = pivot.rename(columns=col_map)
+def plot_cer_heatmap(pivot: pd.DataFrame) -> None:
+    pivot = _with_labels(pivot)
 
     fig, ax = plt.subplots(figsize=(max(10, len(pivot.columns) * 2), max(5, len(pivot) * 0.8)))
     sns.heatmap(pivot, annot=True, fmt=".3f", cmap="RdYlGn_r", ax=ax,
@@ -119,15 +187,8 @@ def plot_cer_heatmap(df: pd.DataFrame) -> None:
 # 4. Accuracy Heatmap: models × categories
 # ═════════════════════════════════════════════════════════════
 
-def plot_accuracy_heatmap(df: pd.DataFrame) -> None:
-    pivot = df.groupby(["model", "category"])["accuracy"].mean().unstack()
-    col_map = {}
-    for col in pivot.columns:
-        if col in config.CATEGORIES:
-            col_map[col] = config.CATEGORIES[col][1]
-        else:
-            col_map[col] = col
-    pivot = pivot.rename(columns=col_map)
+def plot_accuracy_heatmap(pivot: pd.DataFrame) -> None:
+    pivot = _with_labels(pivot)
 
     fig, ax = plt.subplots(figsize=(max(10, len(pivot.columns) * 2), max(5, len(pivot) * 0.8)))
     sns.heatmap(pivot, annot=True, fmt=".1f", cmap="RdYlGn", ax=ax,
@@ -142,18 +203,12 @@ def plot_accuracy_heatmap(df: pd.DataFrame) -> None:
 # 5. Best model per category
 # ═════════════════════════════════════════════════════════════
 
-def plot_best_per_category(df: pd.DataFrame) -> None:
-    pivot = df.groupby(["model", "category"])["accuracy"].mean().unstack()
+def plot_best_per_category(pivot: pd.DataFrame) -> None:
     best_models = pivot.idxmax()
     best_scores = pivot.max()
 
     categories = sorted(best_models.index)
-    labels = []
-    for cat in categories:
-        if cat in config.CATEGORIES:
-            labels.append(config.CATEGORIES[cat][1])
-        else:
-            labels.append(cat)
+    labels = [_category_label(cat) for cat in categories]
     models = [best_models[cat] for cat in categories]
     scores = [best_scores[cat] for cat in categories]
 
@@ -177,15 +232,8 @@ def plot_best_per_category(df: pd.DataFrame) -> None:
 # 6. WER grouped bar comparison
 # ═════════════════════════════════════════════════════════════
 
-def plot_wer(df: pd.DataFrame) -> None:
-    pivot = df.groupby(["model", "category"])["wer"].mean().unstack()
-    col_map = {}
-    for col in pivot.columns:
-        if col in config.CATEGORIES:
-            col_map[col] = config.CATEGORIES[col][1]
-        else:
-            col_map[col] = col
-    pivot = pivot.rename(columns=col_map)
+def plot_wer(pivot: pd.DataFrame) -> None:
+    pivot = _with_labels(pivot)
 
     fig, ax = plt.subplots(figsize=(14, 6))
     pivot.plot(kind="bar", ax=ax, width=0.8)
@@ -201,8 +249,8 @@ def plot_wer(df: pd.DataFrame) -> None:
 # 7. Processing time comparison
 # ═════════════════════════════════════════════════════════════
 
-def plot_time(df: pd.DataFrame) -> None:
-    means = df.groupby("model")["time_sec"].mean().sort_values()
+def plot_time(means: pd.Series) -> None:
+    means = means.sort_values()
     colors = _get_colors(len(means))
 
     fig, ax = plt.subplots(figsize=(10, max(4, len(means) * 0.7)))
@@ -219,17 +267,11 @@ def plot_time(df: pd.DataFrame) -> None:
 # 8. Radar / Spider chart
 # ═════════════════════════════════════════════════════════════
 
-def plot_radar(df: pd.DataFrame) -> None:
+def plot_radar(pivot: pd.DataFrame) -> None:
     # One axis per category (accuracy)
-    pivot = df.groupby(["model", "category"])["accuracy"].mean().unstack()
     models = pivot.index.tolist()
     categories = sorted(pivot.columns.tolist())
-    labels = []
-    for cat in categories:
-        if cat in config.CATEGORIES:
-            labels.append(config.CATEGORIES[cat][1].split("(")[0].strip())
-        else:
-            labels.append(cat)
+    labels = [_category_label(cat).split("(")[0].strip() for cat in categories]
 
     N_axes = len(labels)
     if N_axes < 3:
@@ -258,14 +300,8 @@ def plot_radar(df: pd.DataFrame) -> None:
 # 9. Summary table
 # ═════════════════════════════════════════════════════════════
 
-def plot_summary_table(df: pd.DataFrame) -> None:
-    summary = df.groupby("model").agg(
-        Avg_CER=("cer", "mean"),
-        Avg_WER=("wer", "mean"),
-        Avg_Accuracy=("accuracy", "mean"),
-        Avg_Time=("time_sec", "mean"),
-    ).round(3)
-    summary = summary.sort_values("Avg_CER")
+def plot_summary_table(summary: pd.DataFrame) -> None:
+    summary = summary.round(3).sort_values("Avg_CER")
 
     fig, ax = plt.subplots(figsize=(12, 3 + 0.4 * len(summary)))
     ax.axis("off")
@@ -287,15 +323,13 @@ def plot_summary_table(df: pd.DataFrame) -> None:
 # 10. Per-category summary table (which model wins where)
 # ═════════════════════════════════════════════════════════════
 
-def plot_category_winner_table(df: pd.DataFrame) -> None:
-    pivot = df.groupby(["model", "category"])["accuracy"].mean().unstack()
+def plot_category_winner_table(pivot: pd.DataFrame) -> None:
     best = pivot.idxmax()
     best_score = pivot.max()
 
     rows = []
     for cat in sorted(pivot.columns):
-        label = config.CATEGORIES.get(cat, (cat, cat))[1] if cat in config.CATEGORIES else cat
-        rows.append([label, best[cat], f"{best_score[cat]:.1f}%"])
+        rows.append([_category_label(cat), best[cat], f"{best_score[cat]:.1f}%"])
 
     fig, ax = plt.subplots(figsize=(12, 2 + 0.5 * len(rows)))
     ax.axis("off")
@@ -312,36 +346,221 @@ def plot_category_winner_table(df: pd.DataFrame) -> None:
     _save(fig, "10_category_winners")
 
 
+# ═════════════════════════════════════════════════════════════
+# 11. Memory per model
+# ═════════════════════════════════════════════════════════════
+
+def plot_memory(memory: pd.DataFrame) -> None:
+    memory = memory.sort_values("Peak_RSS_MB")
+    colors = _get_colors(len(memory))
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, max(4, len(memory) * 0.7)),
+                                   sharey=True)
+    bars = ax1.barh(memory.index, memory["Peak_RSS_MB"], color=colors)
+    ax1.set_xlabel("Peak RSS (MB)")
+    ax1.set_title("Peak Worker Memory")
+    for bar, val in zip(bars, memory["Peak_RSS_MB"]):
+        ax1.text(val, bar.get_y() + bar.get_height() / 2,
+                 f" {val:.0f}", va="center", fontsize=9)
+
+    bars = ax2.barh(memory.index, memory["Avg_RSS_Delta_MB"], color=colors)
+    ax2.axvline(0, color="black", linewidth=0.8)
+    ax2.set_xlabel("Average RSS change per image (MB) — near 0 is healthy")
+    ax2.set_title("Per-Image Memory Growth")
+    for bar, val in zip(bars, memory["Avg_RSS_Delta_MB"]):
+        ax2.text(val, bar.get_y() + bar.get_height() / 2,
+                 f" {val:+.2f}", va="center", fontsize=9)
+    plt.tight_layout()
+    _save(fig, "11_memory")
+
+
+# ═════════════════════════════════════════════════════════════
+# 12. Accuracy vs latency Pareto frontier
+# ═════════════════════════════════════════════════════════════
+
+def pareto_front(points: pd.DataFrame) -> pd.Series:
+    """True for points that no other point beats on both time_sec and cer
+    (lower is better for both)."""
+    order = points.sort_values(["time_sec", "cer"])
+    # On the front when its CER is strictly below every faster point's CER
+    best_before = order["cer"].cummin().shift(fill_value=np.inf)
+    return (order["cer"] < best_before).reindex(points.index)
+
+
+def pareto_table(cells: pd.DataFrame) -> pd.DataFrame:
+    """Frontier (category, model, time_sec, cer) rows, fastest first."""
+    rows = []
+    for cat, pts in cells[["time_sec", "cer"]].dropna().groupby(level="category"):
+        pts = pts.droplevel("category")
+        front = pts[pareto_front(pts)].sort_values("time_sec")
+        rows += [{"category": cat, "model": model, **row}
+                 for model, row in front.to_dict("index").items()]
+    return pd.DataFrame(rows, columns=["category", "model", "time_sec", "cer"])
+
+
+def plot_pareto(cells: pd.DataFrame) -> None:
+    cells = cells[["time_sec", "cer"]].dropna()
+    categories = sorted(cells.index.get_level_values("category").unique())
+    models = sorted(cells.index.get_level_values("model").unique())
+    colors = dict(zip(models, _get_colors(len(models))))
+    ncols = min(3, len(categories))
+    nrows = math.ceil(len(categories) / ncols)
+
+    fig, axes = plt.subplots(nrows, ncols, figsize=(6 * ncols, 4.5 * nrows), squeeze=False)
+    for ax, cat in zip(axes.flat, categories):
+        pts = cells.xs(cat, level="category")
+        on_front = pareto_front(pts)
+        for model, row in pts.iterrows():
+            front = bool(on_front[model])
+            ax.scatter(row["time_sec"], row["cer"], color=colors[model],
+                       s=60 if front else 25, edgecolor="black" if front else "none",
+                       zorder=3)
+            ax.annotate(model, (row["time_sec"], row["cer"]), fontsize=7,
+                        xytext=(3, 3), textcoords="offset points")
+        front = pts[on_front].sort_values("time_sec")
+        ax.step(front["time_sec"], front["cer"], where="post", color="black",
+                linestyle="--", linewidth=1)
+        if pts["time_sec"].min() > 0 and pts["time_sec"].max() > 10 * pts["time_sec"].min():
+            ax.set_xscale("log")
+        ax.set_title(_category_label(cat))
+        ax.set_xlabel("Average time per image (s)")
+        ax.set_ylabel("CER")
+    for ax in list(axes.flat)[len(categories):]:
+        ax.axis("off")
+    fig.suptitle("CER vs Latency: Pareto Frontier per Category (lower-left is better)",
+                 fontsize=14)
+    plt.tight_layout()
+    _save(fig, "12_pareto_frontier")
+
+
+# ═════════════════════════════════════════════════════════════
+# Chart jobs, input hashing and parallel rendering
+# ═════════════════════════════════════════════════════════════
+
+def chart_jobs(summary: dict) -> list[tuple]:
+    """List every chart as (output_name, plot_function, args)."""
+    acc = _pivot(summary, "accuracy")
+    cer = _pivot(summary, "cer")
+
+    jobs = []
+    for cat in sorted(cer.columns):
+        jobs.append((f"01_cer_{cat}", plot_cer_per_category,
+                     (cat, cer[cat].dropna())))
+    for cat in sorted(acc.columns):
+        jobs.append((f"02_accuracy_{cat}", plot_accuracy_per_category,
+                     (cat, acc[cat].dropna())))
+    jobs += [
+        ("03_cer_heatmap", plot_cer_heatmap, (cer,)),
+        ("04_accuracy_heatmap", plot_accuracy_heatmap, (acc,)),
+        ("05_best_per_category", plot_best_per_category, (acc,)),
+        ("06_wer_comparison", plot_wer, (_pivot(summary, "wer"),)),
+        ("07_processing_time", plot_time, (summary["models"]["Avg_Time"],)),
+        ("08_radar_chart", plot_radar, (acc,)),
+        ("09_summary_table", plot_summary_table, (summary["models"],)),
+        ("10_category_winners", plot_category_winner_table, (acc,)),
+    ]
+    if not summary.get("memory", pd.DataFrame()).empty:
+        jobs.append(("11_memory", plot_memory, (summary["memory"],)))
+    jobs.append(("12_pareto_frontier", plot_pareto,
+                 (summary["cells"][["time_sec", "cer"]],)))
+    return jobs
+
+
+def _hash_inputs(func, args: tuple) -> str:
+    """Stable digest of a chart's plot function and input slice."""
+    h = hashlib.sha256(f"{func.__name__}|dpi={config.VIS_DPI}".encode())
+    for arg in args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            h.update(arg.to_json(orient="split", double_precision=10).encode())
+        else:
+            h.update(repr(arg).encode())
+    return h.hexdigest()
+
+
+def _load_render_cache() -> dict:
+    if RENDER_CACHE.exists():
+        try:
+            return json.loads(RENDER_CACHE.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    return {}
+
+
+def _render(func, args: tuple) -> None:
+    func(*args)
+
+
+def render_charts(summary: dict, workers: int | None = None,
+                  force: bool = False) -> None:
+    """Render every chart whose input slice changed since its last render."""
+    config.ensure_dirs()
+    cache = {} if force else _load_render_cache()
+    pending = []
+    hashes = {}
+    for name, func, args in chart_jobs(summary):
+        digest = _hash_inputs(func, args)
+        hashes[name] = digest
+        if cache.get(name) == digest and (VIS_DIR / f"{name}.png").exists():
+            continue
+        pending.append((name, func, args))
+
+    skipped = len(hashes) - len(pending)
+    if skipped:
+        print(f"  [SKIP] {skipped} chart(s) unchanged since last render")
+
+    if len(pending) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_render, func, args)
+                       for name, func, args in pending}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"  [FAIL] {name}: {e}")
+                    hashes.pop(name)
+    else:
+        for name, func, args in pending:
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"  [FAIL] {name}: {e}")
+                hashes.pop(name)
+
+    RENDER_CACHE.write_text(json.dumps(hashes, indent=1), encoding="utf-8")
+
+
 # ═════════════════════════════════════════════════════════════
 # Public entry point
 # ═════════════════════════════════════════════════════════════
 
-def generate_all_visualizations(csv_path: str | Path | None = None) -> None:
-    """Load results CSV and produce all charts."""
+def generate_all_visualizations(csv_path: str | Path | list | None = None,
+                                workers: int | None = None,
+                                force: bool = False) -> None:
+    """Summarize one or more results CSVs (chunked) and produce all charts."""
+    from evaluation.aggregate import summarize_files
+
     if csv_path is None:
         csv_path = config.SCORES_DIR / "all_results.csv"
+    paths = [Path(p) for p in csv_path] if isinstance(csv_path, (list, tuple)) \
+        else [Path(csv_path)]
 
-    csv_path = Path(csv_path)
-    if not csv_path.exists():
-        print(f"Results file not found: {csv_path}")
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"Results file not found: {', '.join(str(p) for p in missing)}")
         return
 
-    df = pd.read_csv(csv_path)
-    print(f"\nLoaded {len(df)} result rows from {csv_path}")
-    print(f"Models: {df['model'].unique().tolist()}")
-    print(f"Categories: {df['category'].unique().tolist()}")
+    summary = summarize_files(paths, workers)
+    if summary is None:
+        print(f"No result rows in {', '.join(str(p) for p in paths)}")
+        return
+    cells = summary["cells"]
+    source = paths[0] if len(paths) == 1 else f"{len(paths)} files"
+    print(f"\nSummarized {int(cells['n'].sum())} result rows from {source}")
+    print(f"Models: {cells.index.get_level_values('model').unique().tolist()}")
+    print(f"Categories: {cells.index.get_level_values('category').unique().tolist()}")
     print()
 
-    plot_cer_per_category(df)
-    plot_accuracy_per_category(df)
-    plot_cer_heatmap(df)
-    plot_accuracy_heatmap(df)
-    plot_best_per_category(df)
-    plot_wer(df)
-    plot_time(df)
-    plot_radar(df)
-    plot_summary_table(df)
-    plot_category_winner_table(df)
+    render_charts(summary, workers=workers, force=force)
 
     print(f"\nAll visualizations saved to {VIS_DIR}")
 
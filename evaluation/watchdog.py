@@ -0,0 +1,116 @@
+"""
+Per-image time limits, retries and quarantine for the evaluation workers.
+
+A worker arms an ImageWatchdog before each extract_text call. If the call
+runs past its limit, the watchdog thread reports the stuck image on stdout
+("TIMEOUT:<json>") and hard-exits the process with
+config.WORKER_TIMEOUT_EXIT_CODE; the orchestrator then restarts the worker,
+either retrying the image or giving up on it after config.IMAGE_MAX_RETRIES.
+Only that image is lost, not the model's whole run.
+
+A run that gives up on an image counts it once in results/quarantine.json
+(retries within the run do not count again). Images given up on in
+config.QUARANTINE_AFTER runs of a model are skipped immediately by later
+runs and reported with status "quarantined".
+
+The watchdog is a Python thread, so it fires as long as the stuck call
+releases the GIL, which framework inference (torch, paddle) and
+subprocess-based engines (pytesseract) do. For anything else the
+orchestrator kills a worker that outlives worker_time_limit().
+"""
+
+import json
+import os
+import threading
+import time
+
+import config
+
+# Values of the per-row "status" column
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_QUARANTINED = "quarantined"
+STATUS_REUSED = "reused"  # prediction of a near-duplicate (evaluation/dedup.py)
+
+
+def image_time_limit(model_name: str, category: str, default: float | None = None) -> float:
+    """Seconds allowed per image for this model and category; `default`
+    replaces config.IMAGE_TIMEOUT_SEC for models without an override."""
+    per_model = config.IMAGE_TIMEOUT_OVERRIDES.get(model_name, {})
+    fallback = default or config.IMAGE_TIMEOUT_SEC
+    return per_model.get(category, per_model.get("*", fallback))
+
+
+def worker_time_limit(images: int, default: float | None = None) -> float:
+    """Outer bound on a whole worker process: the model load plus the
+    largest per-image limit for each of its `images`. Only hangs the
+    worker's own watchdog misses (e.g. one holding the GIL) reach it."""
+    per_image = max([default or config.IMAGE_TIMEOUT_SEC,
+                     *(limit for per_model in config.IMAGE_TIMEOUT_OVERRIDES.values()
+                       for limit in per_model.values())])
+    return config.LOAD_TIMEOUT_SEC + per_image * max(images, 1)
+
+
+class ImageWatchdog:
+    """Hard-exits the worker when the armed call overruns its deadline."""
+
+    def __init__(self, poll_sec: float = 0.1):
+        self._lock = threading.Lock()
+        self._deadline = None
+        self._on_timeout = None
+        self._poll_sec = poll_sec
+        threading.Thread(target=self._run, name="image-watchdog", daemon=True).start()
+
+    def arm(self, seconds: float, on_timeout) -> None:
+        """Start the clock; on_timeout() runs in the watchdog thread before exit."""
+        with self._lock:
+            self._deadline = time.monotonic() + seconds
+            self._on_timeout = on_timeout
+
+    def disarm(self) -> None:
+        with self._lock:
+            self._deadline = None
+            self._on_timeout = None
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._poll_sec)
+            with self._lock:
+                expired = self._deadline is not None and time.monotonic() > self._deadline
+                callback = self._on_timeout
+            if expired:
+                try:
+                    if callback is not None:
+                        callback()
+                finally:
+                    # The stuck call cannot be interrupted; end the process
+                    os._exit(config.WORKER_TIMEOUT_EXIT_CODE)
+
+
+# ── Quarantine store ──────────────────────────────────────────
+
+def load_quarantine() -> dict:
+    """{model name: {"<category>/<image>": timeout count}}"""
+    if config.QUARANTINE_PATH.exists():
+        try:
+            return json.loads(config.QUARANTINE_PATH.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    return {}
+
+
+def quarantined_keys(model_name: str) -> set[str]:
+    counts = load_quarantine().get(model_name, {})
+    return {key for key, n in counts.items() if n >= config.QUARANTINE_AFTER}
+
+
+def record_timeout(model_name: str, key: str) -> int:
+    """Count one more timeout for (model, sample); returns the new count."""
+    data = load_quarantine()
+    counts = data.setdefault(model_name, {})
+    counts[key] = counts.get(key, 0) + 1
+    config.QUARANTINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    config.QUARANTINE_PATH.write_text(json.dumps(data, indent=2, sort_keys=True),
+                                      encoding="utf-8")
+    return counts[key]
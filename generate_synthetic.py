@@ -0,0 +1,417 @@
+"""
+Synthetic load dataset generator for throughput benchmarking.
+
+Renders thousands of samples per category, each with its ground truth, in the
+same datasets/<category>/images|ground_truth layout the runners read. Layouts
+mimic the real categories:
+    printed      form-like "Label: value" lines with boxes
+    handwritten  one sheared, jittered line in a handwriting-like font
+    receipts     narrow receipt with item / price columns and a total
+    scene_text   one large word on a coloured, noisy background
+    dense_text   multi-column page of small paragraph text
+    degraded     a printed page with blur, noise, low contrast and JPEG artifacts
+
+Every sample is seeded from (seed, category, index), so the output is
+identical for a given seed regardless of worker count or scheduling. Fonts
+are taken from the system font directories (sorted, so the choice is stable
+on a given machine) with Pillow's built-in font as the fallback. Symbol,
+dingbat and emoji fonts, and any font that does not draw distinct glyphs
+for ASCII letters and digits, are left out so every image shows its ground
+truth.
+
+To benchmark on the generated data, point the runners at the root:
+    OCR_DATASETS_DIR=datasets_synthetic python run_evaluation.py
+
+Usage:
+    python generate_synthetic.py --per-category 2000
+    python generate_synthetic.py --per-category 500 --categories receipts degraded --seed 7
+    python generate_synthetic.py --per-category 100 --root datasets   # add to the real datasets
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+import config
+
+DEFAULT_ROOT = config.BASE_DIR / "datasets_synthetic"
+
+FONT_DIRS = [
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+    Path("/Library/Fonts"),
+    Path("/System/Library/Fonts"),
+    Path(os.environ.get("WINDIR", r"C:\Windows")) / "Fonts",
+    Path.home() / ".fonts",
+]
+
+WORDS = (
+    "the of and to in is for on that by this with you it not or be are from at "
+    "as your all have new more an was we will home can us about if page my has "
+    "search free but our one other do no information time they site he up may "
+    "what which their news out use any there see only so his when contact here "
+    "business who web also now help get view online first been would how were "
+    "me services some these click its like service than find price date back top "
+    "people had list name just over state year day into email two health world "
+    "next used go work last most products music buy data make them should "
+    "product system post her city add policy number such please available copyright "
+    "support message after best software then jan good video well where info "
+    "rights public books high school through each links she review years order "
+    "very privacy book items company read group need many user said does set "
+    "under general research university january mail full map reviews program life "
+    "know games way days management part could great united hotel real item "
+    "international center ebay must store travel comments made development report "
+    "off member details line terms before hotels did send right type because local"
+).split()
+
+FORM_LABELS = [
+    "Name", "Date", "Address", "Phone", "Fax", "Company", "Department", "Subject",
+    "Account", "Reference", "Signature", "Approved by", "Title", "Total", "Invoice",
+]
+
+STORE_NAMES = [
+    "GROCERY MART", "CITY BAKERY", "FRESH FOODS", "CORNER STORE", "BOOK NOOK",
+    "HARDWARE PLUS", "CAFE CENTRAL", "PHARMA CARE", "QUICK STOP", "DAILY DELI",
+]
+
+
+# ── Fonts and text ────────────────────────────────────────────
+
+# Families that map ASCII to pictures (checked against file and family name)
+SYMBOL_FONTS = ("wingding", "webding", "symbol", "marlett", "mt extra", "emoji",
+                "dingbat", "ornament", "icon", "mdl2", "awesome")
+# Drawn with every candidate font; each glyph must differ from the others and from .notdef
+COVERAGE_TEXT = "AaBbEeGgMmRrSsTt0123456789"
+
+
+def _covers_text(path: str) -> bool:
+    """True when the font draws distinct, real glyphs for COVERAGE_TEXT."""
+    try:
+        font = ImageFont.truetype(path, 24)
+    except OSError:
+        return False
+    family = " ".join(font.getname()).lower()
+    if any(s in family or s in Path(path).stem.lower() for s in SYMBOL_FONTS):
+        return False
+
+    def mask(ch: str) -> tuple:
+        m = font.getmask(ch)
+        return m.size, bytes(m)
+
+    notdef = mask("\U0010fffd")  # private use: no text font has it
+    glyphs = [mask(ch) for ch in COVERAGE_TEXT]
+    inked = all(any(pixels) for _, pixels in glyphs)
+    if not inked or notdef in glyphs or len(set(glyphs)) != len(glyphs):
+        return False
+    # Symbol fonts placed on ASCII codes (e.g. TeX math extension) still draw
+    # distinct glyphs; real letters have an x-height below the capitals and
+    # a "g" that descends below the baseline
+    x, cap, a, g = (font.getbbox(ch) for ch in "xHag")
+    return x[3] - x[1] < cap[3] - cap[1] and g[3] > a[3]
+
+
+@lru_cache(maxsize=1)
+def _font_files() -> tuple[str, ...]:
+    found = set()
+    for d in FONT_DIRS:
+        if d.is_dir():
+            found.update(str(p) for p in d.rglob("*") if p.suffix.lower() in (".ttf", ".otf"))
+    return tuple(f for f in sorted(found) if _covers_text(f))
+
+
+@lru_cache(maxsize=256)
+def _load_font(path: str | None, size: int):
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size=size)
+
+
+def _font(rng: random.Random, size: int, prefer: tuple[str, ...] = ()):
+    files = _font_files()
+    preferred = [f for f in files if any(p in Path(f).stem.lower() for p in prefer)]
+    pool = preferred or files
+    return _load_font(rng.choice(pool) if pool else None, size)
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _sentence(rng: random.Random, lo: int = 6, hi: int = 14) -> str:
+    text = _words(rng, rng.randint(lo, hi))
+    return text[0].upper() + text[1:] + "."
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> list[str]:
+    lines, current = [], ""
+    for word in text.split():
+        trial = f"{current} {word}".strip()
+        if draw.textlength(trial, font=font) <= width or not current:
+            current = trial
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _line_height(font) -> int:
+    left, top, right, bottom = font.getbbox("Ag")
+    return int((bottom - top) * 1.35) + 2
+
+
+# ── Category renderers: each returns (PIL image, ground truth) ──
+
+def render_printed(rng: random.Random, nrng: np.random.Generator):
+    w, h = 1000, rng.randint(700, 1300)
+    img = Image.new("RGB", (w, h), "white")
+    draw = ImageDraw.Draw(img)
+    title_font = _font(rng, rng.randint(26, 34), prefer=("bold",))
+    font = _font(rng, rng.randint(16, 22))
+    lines = []
+
+    title = _words(rng, rng.randint(2, 4)).upper()
+    draw.text((60, 40), title, font=title_font, fill="black")
+    lines.append(title)
+    y = 40 + _line_height(title_font) + 20
+    step = _line_height(font) + rng.randint(8, 18)
+    while y + step < h - 40:
+        label = rng.choice(FORM_LABELS)
+        value = _words(rng, rng.randint(1, 5))
+        text = f"{label}: {value}"
+        draw.text((60, y), text, font=font, fill="black")
+        if rng.random() < 0.3:
+            draw.rectangle((50, y - 4, w - 50, y + step - 8), outline="black")
+        lines.append(text)
+        y += step
+    return img, "\n".join(lines)
+
+
+def render_handwritten(rng: random.Random, nrng: np.random.Generator):
+    font = _font(rng, rng.randint(34, 52), prefer=("script", "hand", "italic", "oblique"))
+    text = _words(rng, rng.randint(3, 9))
+    probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+    tw = int(probe.textlength(text, font=font))
+    w, h = tw + 80, _line_height(font) + 50
+    paper = rng.randint(225, 250)
+    img = Image.new("L", (w, h), paper)
+    draw = ImageDraw.Draw(img)
+
+    # Per-word baseline jitter imitates an uneven hand
+    x = 40
+    for word in text.split():
+        draw.text((x, 25 + rng.randint(-4, 4)), word, font=font, fill=rng.randint(20, 80))
+        x += int(draw.textlength(word + " ", font=font))
+
+    shear = rng.uniform(-0.25, 0.05)
+    img = img.transform(img.size, Image.AFFINE, (1, shear, -shear * h / 2, 0, 1, 0),
+                        resample=Image.BICUBIC, fillcolor=paper)
+    img = img.rotate(rng.uniform(-2, 2), resample=Image.BICUBIC, expand=True, fillcolor=paper)
+    return img.convert("RGB"), text
+
+
+def render_receipts(rng: random.Random, nrng: np.random.Generator):
+    w = rng.randint(320, 420)
+    font = _font(rng, rng.randint(13, 17), prefer=("mono", "courier"))
+    lh = _line_height(font)
+    n_items = rng.randint(3, 14)
+    h = lh * (n_items + 10) + 40
+    img = Image.new("RGB", (w, h), "white")
+    draw = ImageDraw.Draw(img)
+    lines = []
+
+    def centered(text, y):
+        draw.text(((w - draw.textlength(text, font=font)) / 2, y), text, font=font, fill="black")
+        lines.append(text)
+
+    def columns(left, right, y):
+        draw.text((15, y), left, font=font, fill="black")
+        draw.text((w - 15 - draw.textlength(right, font=font), y), right, font=font, fill="black")
+        lines.append(f"{left} {right}")
+
+    y = 15
+    centered(rng.choice(STORE_NAMES), y); y += lh
+    centered(f"{rng.randint(1, 999)} {rng.choice(WORDS).upper()} ST", y); y += lh
+    centered(f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 29)} "
+             f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}", y); y += lh * 2
+    total = 0.0
+    for _ in range(n_items):
+        qty, price = rng.randint(1, 5), rng.randint(50, 5000) / 100
+        total += qty * price
+        columns(f"{qty} {_words(rng, rng.randint(1, 2)).upper()}"[:22], f"{qty * price:.2f}", y)
+        y += lh
+    y += lh // 2
+    draw.line((15, y, w - 15, y), fill="black"); y += lh // 2
+    tax = round(total * 0.06, 2)
+    columns("SUBTOTAL", f"{total:.2f}", y); y += lh
+    columns("TAX", f"{tax:.2f}", y); y += lh
+    columns("TOTAL", f"{total + tax:.2f}", y); y += lh * 2
+    centered("THANK YOU", y)
+    return img, "\n".join(lines)
+
+
+def render_scene_text(rng: random.Random, nrng: np.random.Generator):
+    word = rng.choice(WORDS).upper() if rng.random() < 0.6 else rng.choice(WORDS)
+    font = _font(rng, rng.randint(40, 90), prefer=("bold",))
+    probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+    tw = int(probe.textlength(word, font=font))
+    w, h = tw + rng.randint(40, 160), _line_height(font) + rng.randint(30, 90)
+
+    # Vertical colour gradient plus texture noise as the "scene"
+    top, bottom = nrng.integers(0, 256, 3), nrng.integers(0, 256, 3)
+    t = np.linspace(0, 1, h)[:, None, None]
+    bg = (top * (1 - t) + bottom * t).repeat(w, axis=1)
+    bg += nrng.normal(0, 12, bg.shape)
+    img = Image.fromarray(np.clip(bg, 0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(img)
+    luminance = (top + bottom).mean() / 2
+    fill = (20, 20, 20) if luminance > 128 else (240, 240, 240)
+    draw.text(((w - tw) / 2, (h - _line_height(font)) / 2 + 5), word, font=font, fill=fill)
+    img = img.rotate(rng.uniform(-6, 6), resample=Image.BICUBIC, expand=False,
+                     fillcolor=tuple(int(c) for c in top))
+    return img, word
+
+
+def render_dense_text(rng: random.Random, nrng: np.random.Generator):
+    w, h = 1200, 1600
+    n_cols = rng.choice([1, 2, 2, 3])
+    margin, gutter = 60, 40
+    col_w = (w - 2 * margin - gutter * (n_cols - 1)) // n_cols
+    img = Image.new("RGB", (w, h), "white")
+    draw = ImageDraw.Draw(img)
+    font = _font(rng, rng.randint(12, 16), prefer=("serif",))
+    lh = _line_height(font)
+    lines = []
+
+    # Fill columns left to right; ground truth follows reading order
+    for col in range(n_cols):
+        x = margin + col * (col_w + gutter)
+        y = margin
+        while y + lh < h - margin:
+            paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(2, 5)))
+            for line in _wrap(draw, paragraph, font, col_w):
+                if y + lh >= h - margin:
+                    break
+                draw.text((x, y), line, font=font, fill="black")
+                lines.append(line)
+                y += lh
+            y += lh // 2
+    return img, "\n".join(lines)
+
+
+def render_degraded(rng: random.Random, nrng: np.random.Generator):
+    img, text = render_printed(rng, nrng)
+    img = img.rotate(rng.uniform(-2.5, 2.5), resample=Image.BICUBIC, expand=True,
+                     fillcolor="white")
+    img = img.filter(ImageFilter.GaussianBlur(rng.uniform(0.6, 1.8)))
+
+    arr = np.asarray(img, dtype=np.float32)
+    contrast = rng.uniform(0.45, 0.85)
+    arr = 128 + (arr - 128) * contrast
+    arr += nrng.normal(0, rng.uniform(8, 25), arr.shape[:2])[..., None]
+    speckle = nrng.random(arr.shape[:2]) < rng.uniform(0.002, 0.01)
+    arr[speckle] = 0
+    img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+
+    # Round-trip through a low-quality JPEG for compression artifacts
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=rng.randint(10, 35))
+    buf.seek(0)
+    return Image.open(buf).convert("RGB"), text
+
+
+RENDERERS = {
+    "printed": render_printed,
+    "handwritten": render_handwritten,
+    "receipts": render_receipts,
+    "scene_text": render_scene_text,
+    "dense_text": render_dense_text,
+    "degraded": render_degraded,
+}
+
+
+# ── Parallel generation ───────────────────────────────────────
+
+def _sample_name(category: str, index: int) -> str:
+    return f"synth_{category}_{index:06d}"
+
+
+def _generate_chunk(root: str, category: str, indices: list[int], seed: int) -> int:
+    """Worker: render and write one chunk of samples for a category."""
+    folder = config.CATEGORIES[category][0]
+    img_dir = Path(root) / folder / "images"
+    gt_dir = Path(root) / folder / "ground_truth"
+    cat_id = list(config.CATEGORIES).index(category)
+    for index in indices:
+        rng = random.Random(f"{seed}:{category}:{index}")
+        nrng = np.random.default_rng([seed, cat_id, index])
+        img, text = RENDERERS[category](rng, nrng)
+        name = _sample_name(category, index)
+        img.save(img_dir / f"{name}.png", compress_level=1)
+        (gt_dir / f"{name}.txt").write_text(text, encoding="utf-8")
+    return len(indices)
+
+
+def generate(root: Path, categories: list[str], per_category: int, seed: int,
+             workers: int | None = None, chunk_size: int = 50) -> int:
+    """Render `per_category` samples for each category under `root`."""
+    jobs = []
+    for cat in categories:
+        folder = config.CATEGORIES[cat][0]
+        (root / folder / "images").mkdir(parents=True, exist_ok=True)
+        (root / folder / "ground_truth").mkdir(parents=True, exist_ok=True)
+        for start in range(0, per_category, chunk_size):
+            jobs.append((str(root), cat, list(range(start, min(start + chunk_size, per_category))), seed))
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_generate_chunk, *job) for job in jobs]
+        for future in futures:
+            done += future.result()
+            print(f"\r  {done}/{per_category * len(categories)} samples", end="", flush=True)
+    print()
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--per-category", type=int, default=1000)
+    parser.add_argument("--categories", nargs="+", default=list(config.CATEGORIES),
+                        choices=list(config.CATEGORIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT,
+                        help=f"output root (default: {DEFAULT_ROOT.name}/)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if not _font_files():
+        print("[WARN] No TrueType fonts found; using Pillow's built-in font only.")
+
+    print(f"Generating {args.per_category} samples x {len(args.categories)} "
+          f"categories into {args.root} (seed {args.seed}) ...")
+    start = time.perf_counter()
+    n = generate(args.root, args.categories, args.per_category, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {n} samples in {elapsed:.1f}s ({n / elapsed:.0f} samples/s)")
+
+
+if __name__ == "__main__":
+    main()
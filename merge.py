@@ -0,0 +1,142 @@
+"""
+Merge sharded evaluation runs from several machines into one run.
+
+Each machine runs `python run_evaluation.py --shard i/N`, which stores a
+self-describing run directory (rows with full predictions, the shard it
+covers, the list of samples it was expected to cover, the model specs and
+the environment). Copy those directories to one machine and merge them:
+the shards are checked for a consistent N, missing shard indices, samples
+evaluated by more than one shard, every model spec of the shards' meta for
+results, and expected samples with no result per model. The merged rows are then stored as a normal run, written to
+all_results.csv, summarized and visualized exactly like run_evaluation.py.
+
+Usage:
+    python merge.py results/runs/*-shard*of4
+    python merge.py node0/20240101-120000-shard0of2 node1/20240101-120200-shard1of2
+    python merge.py ... --allow-incomplete
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+os.environ["PYTHONIOENCODING"] = "utf-8"
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+import config
+from evaluation.dataset import sample_key
+from evaluation.store import load_predictions, load_run_meta, resolve_run_dir
+from run_evaluation import finalize_run
+
+
+def check_shards(metas: list[dict]) -> list[str]:
+    """Problems with the shard set itself (mixed N, missing / repeated i)."""
+    problems = []
+    counts = {m["shard"]["count"] for m in metas}
+    if len(counts) > 1:
+        problems.append(f"shards come from different splits: N = {sorted(counts)}")
+        return problems
+    count = counts.pop()
+    seen = Counter(m["shard"]["index"] for m in metas)
+    missing = sorted(set(range(count)) - set(seen))
+    if missing:
+        problems.append(f"missing shard(s) {missing} of {count}")
+    repeated = sorted(i for i, n in seen.items() if n > 1)
+    if repeated:
+        problems.append(f"shard(s) {repeated} given more than once")
+    return problems
+
+
+def spec_key(spec: list) -> str:
+    """Comparable form of a [registry name, kwargs] spec."""
+    return json.dumps(spec, sort_keys=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("runs", nargs="+", help="shard run directories or run IDs")
+    parser.add_argument("--allow-incomplete", action="store_true",
+                        help="merge even if shards or samples are missing")
+    args = parser.parse_args()
+
+    config.ensure_dirs()
+    run_dirs = [resolve_run_dir(r) for r in args.runs]
+    metas = [load_run_meta(d) for d in run_dirs]
+    unsharded = [d.name for d, m in zip(run_dirs, metas) if not m.get("shard")]
+    if unsharded:
+        print(f"[ERROR] Not shard runs: {', '.join(unsharded)}")
+        sys.exit(2)
+
+    print(f"{'='*60}")
+    print(f"MERGING {len(run_dirs)} SHARD(S)")
+    print(f"{'='*60}")
+    problems = check_shards(metas)
+
+    rows, expected, owner = [], set(), {}
+    duplicates = []
+    for run_dir, meta in zip(run_dirs, metas):
+        shard_rows = load_predictions(run_dir / "predictions.jsonl")
+        expected_path = run_dir / "expected.txt"
+        if expected_path.exists():
+            expected.update(line for line in expected_path.read_text(
+                encoding="utf-8").splitlines() if line)
+        print(f"  shard {meta['shard']['index']}/{meta['shard']['count']}: "
+              f"{len(shard_rows)} rows from {run_dir.name} "
+              f"({meta.get('environment', {}).get('cpu', '?')})")
+        for row in shard_rows:
+            key = (row["model"], sample_key(row["category"], row["image"]))
+            if key in owner:
+                duplicates.append((key, owner[key], run_dir.name))
+                continue
+            owner[key] = run_dir.name
+            rows.append(row)
+
+    if duplicates:
+        problems.append(f"{len(duplicates)} sample(s) evaluated by more than one shard")
+        for (model, key), first, second in duplicates[:10]:
+            print(f"  [DUP] {model} {key}: {first} and {second} (kept the first)")
+
+    # A spec that crashed (e.g. at load) in every shard left no rows at all
+    specs = {spec_key(spec): spec for meta in metas for spec in meta.get("model_specs", [])}
+    if any("model_spec" not in row for row in rows):
+        print("  [WARN] Rows without model_spec (older shards); "
+              "specs without any result cannot be detected")
+    else:
+        produced = {spec_key(json.loads(row["model_spec"])) for row in rows}
+        for key, (name, kwargs) in specs.items():
+            if key not in produced:
+                problems.append(f"{name} {kwargs}: no results in any shard")
+
+    models = sorted({row["model"] for row in rows})
+    for model in models:
+        done = {key for (m, key) in owner if m == model}
+        missing = sorted(expected - done)
+        if missing:
+            problems.append(f"{model}: {len(missing)} expected sample(s) have no result")
+            for key in missing[:5]:
+                print(f"  [MISSING] {model} {key}")
+
+    if problems:
+        print()
+        for problem in problems:
+            print(f"  [FAIL] {problem}")
+        if not args.allow_incomplete:
+            print("\nNot merged. Fix the shards or pass --allow-incomplete.")
+            sys.exit(1)
+
+    print(f"\n[OK] {len(rows)} rows, {len(models)} model(s), {len(expected)} expected samples")
+    finalize_run(
+        rows, "merged",
+        merged_from=[d.name for d in run_dirs],
+        shard_count=metas[0]["shard"]["count"],
+        problems=problems,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,51 @@
+"""
+OCR model wrappers, resolved lazily by name.
+
+Importing this package does not import any OCR framework: a wrapper module
+(and with it pytesseract, easyocr, paddleocr, transformers/torch, doctr or
+requests) is only imported the first time its class is requested, via
+create_model / get_model_class or attribute access such as
+`from models import EasyOCRModel`.
+"""
+
+import importlib
+
 from .base import OCRModel
-from .tesseract_ocr import TesseractOCR
-from .easy_ocr import EasyOCRModel
-from .paddle_ocr import PaddleOCRModel
-from .trocr_model import TrOCRModel
-from .doctr_model import DocTRModel
-from .mistral_ocr import MistralOCR
-
-LOCAL_MODELS = [TesseractOCR, EasyOCRModel, PaddleOCRModel, TrOCRModel, DocTRModel]
-API_MODELS = [MistralOCR]
+
+# Registry name -> (module path, class name)
+MODEL_REGISTRY = {
+    "TesseractOCR": ("models.tesseract_ocr", "TesseractOCR"),
+    "EasyOCRModel": ("models.easy_ocr", "EasyOCRModel"),
+    "PaddleOCRModel": ("models.paddle_ocr", "PaddleOCRModel"),
+    "TrOCRModel": ("models.trocr_model", "TrOCRModel"),
+    "DocTRModel": ("models.doctr_model", "DocTRModel"),
+    "MistralOCR": ("models.mistral_ocr", "MistralOCR"),
+    # Meta-model: dispatches to the models above (train_router.py)
+    "RouterOCR": ("models.router", "RouterOCR"),
+}
+
+LOCAL_MODELS = ["TesseractOCR", "EasyOCRModel", "PaddleOCRModel", "TrOCRModel", "DocTRModel"]
+API_MODELS = ["MistralOCR"]
 ALL_MODELS = LOCAL_MODELS + API_MODELS
+
+
+def get_model_class(name: str) -> type[OCRModel]:
+    """Import and return the wrapper class registered under `name`."""
+    try:
+        module_path, class_name = MODEL_REGISTRY[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model '{name}'. Available: {', '.join(MODEL_REGISTRY)}"
+        ) from None
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def create_model(name: str, **kwargs) -> OCRModel:
+    """Instantiate a registered model; its framework is imported only now."""
+    return get_model_class(name)(**kwargs)
+
+
+def __getattr__(name: str):
+    if name in MODEL_REGISTRY:
+        return get_model_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+"""
+Prepared-artifact cache for fast model cold starts.
+
+The first load of a model goes through its framework's own loader; the
+wrapper then writes what it built to artifacts/<name>/ in a memory-mappable
+form (safetensors when available, otherwise torch's zip format, which
+torch.load can mmap). Later loads map those files instead of deserializing
+and re-initializing, and concurrent workers share the pages through the OS
+page cache. Delete the directory (or set OCR_ARTIFACT_CACHE=0) to bypass it.
+
+Set names carry the versions of the libraries that produced them (see
+versioned), so an upgrade builds a fresh set instead of loading stale
+weights. A set is built in a private temporary directory and renamed into
+place when complete, so a worker never sees it half-written or deleted
+under it.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import config
+
+try:
+    from safetensors.torch import load_file as _st_load, save_file as _st_save
+except ImportError:  # optional dependency
+    _st_load = _st_save = None
+
+_READY = "READY.json"
+
+_building = {}  # name -> temporary directory of a set being built
+
+
+def versioned(name: str, *packages: str) -> str:
+    """`name` qualified with the installed versions of `packages`, e.g.
+    "easyocr_en-easyocr1.7.1-torch2.3.0"."""
+    parts = [name]
+    for package in packages:
+        try:
+            parts.append(f"{package}{version(package)}")
+        except PackageNotFoundError:
+            parts.append(f"{package}unknown")
+    return "-".join(parts)
+
+
+def artifact_dir(name: str) -> Path:
+    return config.ARTIFACTS_DIR / name
+
+
+def _target(name: str) -> Path:
+    """Directory the save_* functions write `name` to."""
+    return _building.get(name, artifact_dir(name))
+
+
+def is_prepared(name: str) -> bool:
+    """True when a complete artifact set exists for `name`."""
+    return config.USE_ARTIFACT_CACHE and (artifact_dir(name) / _READY).exists()
+
+
+def begin(name: str) -> Path:
+    """Start building an artifact set; returns its empty temporary directory
+    (the published one is left alone until mark_prepared)."""
+    path = config.ARTIFACTS_DIR / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    _building[name] = path
+    return path
+
+
+def mark_prepared(name: str, **meta) -> None:
+    """Mark an artifact set complete and rename it into place. A crash
+    mid-save leaves only a temporary directory; the set is rebuilt next time."""
+    build = _building.pop(name)
+    info = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), **meta}
+    (build / _READY).write_text(json.dumps(info, indent=2), encoding="utf-8")
+    final = artifact_dir(name)
+    if (final / _READY).exists():
+        # Another worker published the same set first and may be loading it
+        shutil.rmtree(build, ignore_errors=True)
+        return
+    discard(name)  # an incomplete set of an older version of this module
+    try:
+        build.rename(final)
+    except OSError:  # lost a race with another worker's rename
+        shutil.rmtree(build, ignore_errors=True)
+
+
+def discard(name: str) -> None:
+    """Remove a published set (e.g. one that fails to load). It is renamed
+    away first, so no worker opens a half-deleted directory."""
+    path = artifact_dir(name)
+    if path.exists():
+        stale = path.with_name(f".{path.name}.{os.getpid()}.stale")
+        path.rename(stale)
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def save_state_dict(name: str, state_dict: dict) -> Path:
+    """Write tensors as safetensors (or a torch zip file as a fallback)."""
+    import torch
+
+    tensors = {k: v.detach().cpu().contiguous() for k, v in state_dict.items()
+               if isinstance(v, torch.Tensor)}
+    if _st_save is not None:
+        path = _target(name) / "weights.safetensors"
+        try:
+            _st_save(tensors, str(path))
+            return path
+        except RuntimeError:
+            # Tied / shared tensors are rejected by safetensors
+            path.unlink(missing_ok=True)
+    path = _target(name) / "weights.pt"
+    torch.save(tensors, path)
+    return path
+
+
+def load_state_dict(name: str) -> dict:
+    """Memory-map the tensors written by save_state_dict."""
+    import torch
+
+    path = artifact_dir(name) / "weights.safetensors"
+    if path.exists() and _st_load is not None:
+        return _st_load(str(path))
+    return torch.load(artifact_dir(name) / "weights.pt", mmap=True, weights_only=True)
+
+
+def assign_state_dict(module, state_dict: dict) -> None:
+    """Load weights into a module, keeping its mmap-backed storage (torch >= 2.1)."""
+    module.load_state_dict(state_dict, assign=True)
+
+
+def save_objects(name: str, objects: dict) -> Path:
+    """Pickle whole torch modules / helpers (for libraries without a
+    weights-only loading path) in torch's mmap-able zip format."""
+    import torch
+
+    path = _target(name) / "objects.pt"
+    torch.save(objects, path)
+    return path
+
+
+def load_objects(name: str) -> dict:
+    import torch
+
+    return torch.load(artifact_dir(name) / "objects.pt", mmap=True, weights_only=False)
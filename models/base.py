@@ -6,6 +6,37 @@ from abc import ABC, abstractmethod
 class OCRModel(ABC):
     """Base interface that every OCR model wrapper must implement."""
 
+    # Set by load_model: "framework" (built by the library's own loader) or
+    # "artifact" (mapped from the prepared cache in models/artifacts.py)
+    load_source: str = "framework"
+
+    # Seconds per internal stage of the last recognize() call, for wrappers
+    # that can split it, e.g. {"detect_sec": 0.4, "recognize_sec": 1.2}
+    stage_times: dict = {}
+
+    # Named speed / accuracy presets (config.SPEED_PROFILES). "balanced" is
+    # each wrapper's original configuration; wrappers select one in
+    # __init__ via use_profile(profile).
+    PROFILES: dict[str, dict] = {"balanced": {}}
+    profile: str = "balanced"
+
+    def use_profile(self, profile: str) -> dict:
+        """Select a preset from PROFILES and return its settings."""
+        if profile not in self.PROFILES:
+            raise ValueError(
+                f"Unknown profile '{profile}' for {type(self).__name__}. "
+                f"Available: {', '.join(self.PROFILES)}"
+            )
+        self.profile = profile
+        self.settings = dict(self.PROFILES[profile])
+        return self.settings
+
+    def qualified_name(self, name: str, *qualifiers: str) -> str:
+        """"EasyOCR" -> "EasyOCR (fast)", "TrOCR" + "printed" ->
+        "TrOCR (printed, fast)"; the default profile is left out."""
+        parts = [*qualifiers] + ([self.profile] if self.profile != "balanced" else [])
+        return f"{name} ({', '.join(parts)})" if parts else name
+
     @abstractmethod
     def load_model(self) -> None:
         """Load / initialize the model (weights, reader objects, etc.)."""
@@ -14,6 +45,25 @@ class OCRModel(ABC):
     def extract_text(self, image_path: str) -> str:
         """Run OCR on a single image and return the extracted text."""
 
+    def extract_text_batch(self, image_paths: list[str]) -> list[str]:
+        """Run OCR on several images; wrappers that can share one call
+        between images (e.g. MistralOCR packing) override this."""
+        return [self.extract_text(path) for path in image_paths]
+
+    def preprocess(self, image_path: str):
+        """Read and decode an image into whatever recognize() consumes.
+
+        The evaluation worker calls this from prefetch threads while the
+        model is busy with the previous image, so it must not run inference.
+        The default passes the path through and leaves all work to
+        extract_text.
+        """
+        return image_path
+
+    def recognize(self, prepared) -> str:
+        """Run inference on the output of preprocess()."""
+        return self.extract_text(prepared)
+
     @abstractmethod
     def get_name(self) -> str:
         """Return a human-readable model name for charts and tables."""
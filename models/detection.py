@@ -0,0 +1,187 @@
+"""
+Standalone text detection shared by the recognizers.
+
+A TextDetector finds word boxes once per image, groups them into lines and
+caches the result in cache/detection/<detector>/<sha1 of image bytes>.json,
+so every model (and every later run) reuses the same boxes. Wrappers built
+with shared_detection=True skip their own detector and recognize the
+cached crops instead:
+
+    TrOCR       one crop per detected line (instead of projection strips)
+    EasyOCR     reader.recognize() on the line boxes
+    PaddleOCR   ocr(crop, det=False) per line
+    DocTR       the recognition predictor on word crops, joined per line
+    Tesseract   --psm 7 (single text line) per line
+
+Boxes are absolute pixel [x0, y0, x1, y1]. Detectors:
+
+    "doctr"       DBNet (db_resnet50) from python-doctr
+    "easyocr"     CRAFT from easyocr
+    "projection"  row-projection bands, no model (the old TrOCR splitter)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import config
+
+Box = list[int]
+
+
+# ── Row projection (no model) ─────────────────────────────────
+
+def projection_bands(gray: np.ndarray, threshold: float = 240,
+                     min_height: int = 30) -> list[tuple[int, int]]:
+    """(start, end) row ranges whose mean intensity is below `threshold`
+    (darker than near-white) and at least `min_height` rows tall."""
+    dark = gray.mean(axis=1) < threshold
+    # Rising / falling edges of the "row has ink" mask
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], dark.astype(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    return [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_height]
+
+
+def _detect_projection(img: Image.Image) -> list[Box]:
+    gray = np.asarray(img.convert("L"))
+    return [[0, s, img.width, e] for s, e in projection_bands(gray)]
+
+
+# ── Model-based detectors ─────────────────────────────────────
+
+def _load_doctr():
+    from doctr.models import detection_predictor
+
+    predictor = detection_predictor(arch="db_resnet50", pretrained=True)
+    predictor.eval()
+
+    def detect(img: Image.Image) -> list[Box]:
+        out = predictor([np.asarray(img)])[0]
+        boxes = out["words"] if isinstance(out, dict) else out
+        w, h = img.size
+        return [[int(x0 * w), int(y0 * h), int(np.ceil(x1 * w)), int(np.ceil(y1 * h))]
+                for x0, y0, x1, y1 in np.asarray(boxes)[:, :4]]
+
+    return detect
+
+
+def _load_easyocr():
+    import easyocr
+
+    reader = easyocr.Reader(["en"], gpu=False, recognizer=False)
+
+    def detect(img: Image.Image) -> list[Box]:
+        horizontal, free = reader.detect(np.asarray(img))
+        boxes = [[x0, y0, x1, y1] for x0, x1, y0, y1 in horizontal[0]]
+        for quad in free[0]:
+            xs, ys = [p[0] for p in quad], [p[1] for p in quad]
+            boxes.append([min(xs), min(ys), max(xs), max(ys)])
+        return [[int(max(v, 0)) for v in box] for box in boxes]
+
+    return detect
+
+
+DETECTORS = {
+    "projection": lambda: _detect_projection,
+    "doctr": _load_doctr,
+    "easyocr": _load_easyocr,
+}
+
+
+def group_lines(words: list[Box], min_overlap: float = 0.5) -> list[dict]:
+    """Group word boxes into reading-order lines: a word joins the current
+    line when it overlaps it vertically by at least `min_overlap` of the
+    smaller height."""
+    lines = []
+    for word in sorted(words, key=lambda b: (b[1] + b[3]) / 2):
+        if lines:
+            box = lines[-1]["box"]
+            overlap = min(box[3], word[3]) - max(box[1], word[1])
+            height = min(box[3] - box[1], word[3] - word[1])
+            if height > 0 and overlap >= min_overlap * height:
+                lines[-1]["words"].append(word)
+                lines[-1]["box"] = [min(box[0], word[0]), min(box[1], word[1]),
+                                    max(box[2], word[2]), max(box[3], word[3])]
+                continue
+        lines.append({"box": list(word), "words": [word]})
+    for line in lines:
+        line["words"].sort(key=lambda b: b[0])
+    return sorted(lines, key=lambda line: line["box"][1])
+
+
+class TextDetector:
+    """Line / word boxes for an image, computed once and cached by hash."""
+
+    def __init__(self, name: str | None = None):
+        self.name = name or config.DETECTOR
+        if self.name not in DETECTORS:
+            raise ValueError(f"Unknown detector '{self.name}'. "
+                             f"Available: {', '.join(DETECTORS)}")
+        self._detect = None  # see load_model
+
+    def load_model(self) -> None:
+        """Load the detector model. Wrappers call this from their own
+        load_model (under config.LOAD_TIMEOUT_SEC), so a download or load
+        never runs inside an image's time limit; detect() still loads it on
+        the first cache miss when nobody did."""
+        if self._detect is None:
+            self._detect = DETECTORS[self.name]()
+
+    def _cache_path(self, digest: str) -> Path:
+        return config.CACHE_DIR / "detection" / self.name / f"{digest}.json"
+
+    def prepare(self, image_path: str) -> dict:
+        """Decode an image and attach its cached detection, if any. Safe to
+        call from prefetch threads (no model involved)."""
+        data = Path(image_path).read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        img = Image.open(image_path).convert("RGB")
+        cache = self._cache_path(digest)
+        detection = json.loads(cache.read_text(encoding="utf-8")) if cache.exists() else None
+        return {"image": img, "digest": digest, "detection": detection}
+
+    def detect(self, prepared: dict) -> tuple[dict, float]:
+        """(detection, seconds spent detecting); 0.0 on a cache hit."""
+        if prepared["detection"] is not None:
+            return prepared["detection"], 0.0
+        self.load_model()
+        start = time.perf_counter()
+        img = prepared["image"]
+        words = [b for b in self._detect(img) if b[2] > b[0] and b[3] > b[1]]
+        if not words:
+            # Nothing found: hand the whole image to the recognizer
+            words = [[0, 0, img.width, img.height]]
+        detection = {"detector": self.name, "size": list(img.size),
+                     "lines": group_lines(words)}
+        elapsed = time.perf_counter() - start
+        path = self._cache_path(prepared["digest"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a private name so prepare() never reads half a file
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(detection), encoding="utf-8")
+        tmp.replace(path)
+        prepared["detection"] = detection
+        return detection, elapsed
+
+
+def detector_suffix(detector: "TextDetector | None") -> str:
+    """Model-name suffix that keeps shared-detection runs apart in results."""
+    return f" [{detector.name} det]" if detector is not None else ""
+
+
+def line_crops(prepared: dict, detection: dict) -> list[Image.Image]:
+    img = prepared["image"]
+    return [img.crop(tuple(line["box"])) for line in detection["lines"]]
+
+
+def word_crops(prepared: dict, detection: dict) -> list[list[np.ndarray]]:
+    """Word crops as RGB arrays, one list per line."""
+    img = np.asarray(prepared["image"])
+    return [[img[y0:y1, x0:x1] for x0, y0, x1, y1 in line["words"]]
+            for line in detection["lines"]]
@@ -1,21 +1,64 @@
 """DocTR (Mindee) OCR wrapper."""
 
+import time
+
 from doctr.io import DocumentFile
 from doctr.models import ocr_predictor
 
+from . import artifacts
 from .base import OCRModel
-
+from .detection import TextDetector, detector_suffix, word_crops
+import config
 
 class DocTRModel(OCRModel):
 
-    def __init__(self):
+    # ocr_predictor architectures and batch sizes; "balanced" is the
+    # library default pair.
+    PROFILES = {
+        "fast": {"det_arch": "db_mobilenet_v3_large",
+                 "reco_arch": "crnn_mobilenet_v3_small", "reco_bs": 256},
+        "balanced": {},
+        "accurate": {"reco_arch": "parseq"},
+    }
+
+    def __init__(self, profile: str = "balanced", shared_detection: bool = False,
+                 detector: str | None = None):
+        self.use_profile(profile)
+        # Each profile has its own architectures, hence its own artifact set
+        self._cache = artifacts.versioned(
+            "doctr" if profile == "balanced" else f"doctr_{profile}", "python-doctr")
         self.predictor = None
+        self.detector = TextDetector(detector) if shared_detection else None
 
     def load_model(self) -> None:
-        self.predictor = ocr_predictor(pretrained=True)
+        if self.detector is not None:
+            self.detector.load_model()
+        if artifacts.is_prepared(self._cache):
+            # Build the architecture without downloading / hashing the
+            # pretrained checkpoints, then map the prepared weights in.
+            self.predictor = ocr_predictor(pretrained=False, **self.settings)
+            artifacts.assign_state_dict(self.predictor,
+                                        artifacts.load_state_dict(self._cache))
+            self.load_source = "artifact"
+        else:
+            self.predictor = ocr_predictor(pretrained=True, **self.settings)
+            if config.USE_ARTIFACT_CACHE:
+                artifacts.begin(self._cache)
+                artifacts.save_state_dict(self._cache, self.predictor.state_dict())
+                artifacts.mark_prepared(self._cache)
+        self.predictor.eval()
 
     def extract_text(self, image_path: str) -> str:
-        doc = DocumentFile.from_images(image_path)
+        return self.recognize(self.preprocess(image_path))
+
+    def preprocess(self, image_path: str):
+        if self.detector is not None:
+            return self.detector.prepare(image_path)
+        return DocumentFile.from_images(image_path)
+
+    def recognize(self, doc) -> str:
+        if self.detector is not None:
+            return self._recognize_words(doc)
         result = self.predictor(doc)
         # result.pages[0].blocks[].lines[].words[].value
         lines = []
@@ -26,5 +69,21 @@ class DocTRModel(OCRModel):
                     lines.append(" ".join(words))
         return "\n".join(lines).strip()
 
+    def _recognize_words(self, prepared: dict) -> str:
+        detection, detect_sec = self.detector.detect(prepared)
+        start = time.perf_counter()
+        crops = word_crops(prepared, detection)
+        flat = [crop for line in crops for crop in line]
+        # The recognition half of the OCR predictor: [(value, confidence)]
+        words = iter(self.predictor.reco_predictor(flat) if flat else [])
+        lines = []
+        for line in crops:
+            text = " ".join(next(words)[0] for _ in line).strip()
+            if text:
+                lines.append(text)
+        self.stage_times = {"detect_sec": detect_sec,
+                            "recognize_sec": time.perf_counter() - start}
+        return "\n".join(lines)
+
     def get_name(self) -> str:
-        return "DocTR"
+        return self.qualified_name("DocTR") + detector_suffix(self.detector)
@@ -1,21 +1,112 @@
 """EasyOCR wrapper."""
 
+import time
+
 import easyocr
+import numpy as np
+from easyocr.utils import reformat_input
 
+from . import artifacts
 from .base import OCRModel
-
+from .detection import TextDetector, detector_suffix
+import config
 
 class EasyOCRModel(OCRModel):
 
-    def __init__(self):
+    # canvas_size / mag_ratio: CRAFT detector input size; decoder, beamWidth
+    # and batch_size: recognizer. "balanced" is readtext()'s defaults.
+    PROFILES = {
+        "fast": {"canvas_size": 1280, "mag_ratio": 1.0, "decoder": "greedy",
+                 "beamWidth": 5, "batch_size": 8},
+        "balanced": {"canvas_size": 2560, "mag_ratio": 1.0, "decoder": "greedy",
+                     "beamWidth": 5, "batch_size": 1},
+        "accurate": {"canvas_size": 2560, "mag_ratio": 1.5, "decoder": "beamsearch",
+                     "beamWidth": 5, "batch_size": 8},
+    }
+
+    def __init__(self, profile: str = "balanced", shared_detection: bool = False,
+                 detector: str | None = None):
+        self.use_profile(profile)
         self.reader = None
+        self.detector = TextDetector(detector) if shared_detection else None
+        # Pickled modules depend on both libraries
+        self._cache = artifacts.versioned("easyocr_en", "easyocr", "torch")
 
     def load_model(self) -> None:
+        if self.detector is not None:
+            self.detector.load_model()
+        if artifacts.is_prepared(self._cache):
+            try:
+                self._load_prepared()
+                return
+            except Exception as e:
+                print(f"INFO: EasyOCR artifact load failed ({e}); rebuilding", flush=True)
+                artifacts.discard(self._cache)
         self.reader = easyocr.Reader(["en"], gpu=False)
+        if config.USE_ARTIFACT_CACHE:
+            # Reader has no weights-only entry point and quantizes its CPU
+            # networks on every start; keep the finished modules instead.
+            artifacts.begin(self._cache)
+            artifacts.save_objects(self._cache, {
+                "detector": self.reader.detector,
+                "recognizer": self.reader.recognizer,
+                "converter": self.reader.converter,
+            })
+            artifacts.mark_prepared(self._cache)
+
+    def _load_prepared(self) -> None:
+        # Skip building / loading both networks, then map the prepared ones in
+        reader = easyocr.Reader(["en"], gpu=False, detector=False, recognizer=False)
+        objects = artifacts.load_objects(self._cache)
+        reader.detector = objects["detector"]
+        reader.recognizer = objects["recognizer"]
+        reader.converter = objects["converter"]
+        self.reader = reader
+        self.load_source = "artifact"
 
     def extract_text(self, image_path: str) -> str:
-        results = self.reader.readtext(image_path, detail=0, paragraph=True)
+        return self.recognize(self.preprocess(image_path))
+
+    def preprocess(self, image_path: str):
+        if self.detector is not None:
+            return self.detector.prepare(image_path)
+        # (color image, grayscale image), as readtext() decodes a path
+        return reformat_input(image_path)
+
+    def recognize(self, prepared) -> str:
+        if self.detector is not None:
+            return self._recognize_lines(prepared)
+        # readtext() is exactly detect() followed by recognize()
+        img, img_grey = prepared
+        start = time.perf_counter()
+        horizontal, free = self.reader.detect(
+            img, canvas_size=self.settings["canvas_size"],
+            mag_ratio=self.settings["mag_ratio"], reformat=False,
+        )
+        detected = time.perf_counter()
+        results = self.reader.recognize(img_grey, horizontal[0], free[0],
+                                        detail=0, paragraph=True, reformat=False,
+                                        **self._recognize_args())
+        self.stage_times = {"detect_sec": detected - start,
+                            "recognize_sec": time.perf_counter() - detected}
         return "\n".join(results).strip()
 
+    def _recognize_lines(self, prepared: dict) -> str:
+        detection, detect_sec = self.detector.detect(prepared)
+        start = time.perf_counter()
+        grey = np.asarray(prepared["image"].convert("L"))
+        # EasyOCR boxes are [x_min, x_max, y_min, y_max]
+        boxes = [[x0, x1, y0, y1] for x0, y0, x1, y1 in
+                 (line["box"] for line in detection["lines"])]
+        results = self.reader.recognize(grey, boxes, [], detail=0, paragraph=False,
+                                        reformat=False, **self._recognize_args()) \
+            if boxes else []
+        self.stage_times = {"detect_sec": detect_sec,
+                            "recognize_sec": time.perf_counter() - start}
+        return "\n".join(text for text in results if text.strip()).strip()
+
     def get_name(self) -> str:
-        return "EasyOCR"
+        return self.qualified_name("EasyOCR") + detector_suffix(self.detector)
+
+    def _recognize_args(self) -> dict:
+        return {key: self.settings[key] for key in ("decoder", "beamWidth", "batch_size")}
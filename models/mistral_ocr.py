@@ -1,15 +1,50 @@
-"""Mistral OCR via Pixtral vision model API."""
+"""Mistral OCR via Pixtral vision model API.
+
+With pack > 1, extract_text_batch() sends up to `pack` images in one
+chat-completion request and asks for each image's text under an
+"=== IMAGE k ===" delimiter line. The response is split back into one
+prediction per image; when the delimiters do not match the images sent,
+that group is re-sent one image per request.
+"""
 
 import base64
+import re
 import requests
 from pathlib import Path
 
 from .base import OCRModel
 import config
 
+PROMPT = ("Extract ALL text from this image exactly as written. "
+          "Return only the extracted text, nothing else.")
+
+PACKED_PROMPT = (
+    "You are given {n} images. Extract ALL text from each image exactly as written. "
+    "For each image, in the order given, output a line '=== IMAGE k ===' (k = 1 to {n}) "
+    "followed by that image's text. Return nothing else."
+)
+
+_DELIMITER = re.compile(r"^[ \t]*=== IMAGE (\d+) ===[ \t]*$", re.MULTILINE)
+
+
+def split_packed(content: str, n: int) -> list[str] | None:
+    """Per-image texts of a packed response, or None unless it holds exactly
+    the delimiters 1..n in order (with nothing but whitespace before the first)."""
+    parts = _DELIMITER.split(content)
+    preamble, numbers, texts = parts[0], parts[1::2], parts[2::2]
+    if preamble.strip() or [int(k) for k in numbers] != list(range(1, n + 1)):
+        return None
+    return [text.strip() for text in texts]
+
 
 class MistralOCR(OCRModel):
 
+    def __init__(self, pack: int = 1):
+        self.pack = max(int(pack), 1)
+        # Request accounting for the packing report in run_api_models.py
+        self.requests = 0
+        self.fallbacks = 0
+
     def load_model(self) -> None:
         if not config.MISTRAL_API_KEY:
             raise ValueError(
@@ -17,46 +52,73 @@ class MistralOCR(OCRModel):
             )
 
     def extract_text(self, image_path: str) -> str:
-        img_b64 = self._encode_image(image_path)
+        return self.recognize(self.preprocess(image_path))
+
+    def extract_text_batch(self, image_paths: list[str]) -> list[str]:
+        if self.pack == 1:
+            return super().extract_text_batch(image_paths)
+        predictions = []
+        for i in range(0, len(image_paths), self.pack):
+            group = [self.preprocess(p) for p in image_paths[i:i + self.pack]]
+            predictions += self._recognize_packed(group)
+        return predictions
+
+    def preprocess(self, image_path: str) -> tuple[str, str]:
         ext = Path(image_path).suffix.lstrip(".").lower()
         mime = f"image/{'jpeg' if ext in ('jpg', 'jpeg') else ext}"
+        return self._encode_image(image_path), mime
+
+    def recognize(self, prepared: tuple[str, str]) -> str:
+        return self._chat([prepared], PROMPT, 1024)
 
+    def _recognize_packed(self, group: list[tuple[str, str]]) -> list[str]:
+        if len(group) == 1:
+            return [self.recognize(group[0])]
+        content = self._chat(group, PACKED_PROMPT.format(n=len(group)), 1024 * len(group))
+        texts = split_packed(content, len(group))
+        if texts is None:
+            print(f"    [WARN] Packed response for {len(group)} images did not parse; "
+                  f"retrying one image per request")
+            self.fallbacks += 1
+            texts = [self.recognize(prepared) for prepared in group]
+        return texts
+
+    def _chat(self, images: list[tuple[str, str]], prompt: str, max_tokens: int) -> str:
         payload = {
             "model": config.MISTRAL_MODEL,
             "messages": [
                 {
                     "role": "user",
                     "content": [
-                        {
+                        *({
                             "type": "image_url",
                             "image_url": {
                                 "url": f"data:{mime};base64,{img_b64}"
                             },
-                        },
+                        } for img_b64, mime in images),
                         {
                             "type": "text",
-                            "text": (
-                                "Extract ALL text from this image exactly as written. "
-                                "Return only the extracted text, nothing else."
-                            ),
+                            "text": prompt,
                         },
                     ],
                 }
             ],
-            "max_tokens": 1024,
+            "max_tokens": max_tokens,
         }
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {config.MISTRAL_API_KEY}",
         }
+        self.requests += 1
         resp = requests.post(
-            config.MISTRAL_API_URL, json=payload, headers=headers, timeout=60
+            config.MISTRAL_API_URL, json=payload, headers=headers, timeout=60 * len(images)
         )
         resp.raise_for_status()
         return resp.json()["choices"][0]["message"]["content"].strip()
 
     def get_name(self) -> str:
-        return "Mistral OCR"
+        # Packed predictions are kept apart from unpacked ones in the results
+        return "Mistral OCR" + (f" (pack {self.pack})" if self.pack > 1 else "")
 
     @staticmethod
     def _encode_image(image_path: str) -> str:
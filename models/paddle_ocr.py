@@ -3,21 +3,54 @@
 import os
 os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
 
+import time
+
+import cv2
+import numpy as np
 from paddleocr import PaddleOCR as _PaddleOCR
 
 from .base import OCRModel
+from .detection import TextDetector, detector_suffix, line_crops
 
 
 class PaddleOCRModel(OCRModel):
 
-    def __init__(self):
+    # PaddleOCR constructor settings; "balanced" matches the library defaults
+    # plus angle classification. det_limit_side_len caps the detector input.
+    PROFILES = {
+        "fast": {"use_angle_cls": False, "det_limit_side_len": 640, "rec_batch_num": 16},
+        "balanced": {"use_angle_cls": True, "det_limit_side_len": 960, "rec_batch_num": 6},
+        "accurate": {"use_angle_cls": True, "det_limit_side_len": 1600, "rec_batch_num": 6,
+                     "det_db_unclip_ratio": 2.0},
+    }
+
+    def __init__(self, profile: str = "balanced", shared_detection: bool = False,
+                 detector: str | None = None):
+        self.use_profile(profile)
         self.ocr = None
+        self.detector = TextDetector(detector) if shared_detection else None
 
     def load_model(self) -> None:
-        self.ocr = _PaddleOCR(use_angle_cls=True, lang="en", show_log=False)
+        if self.detector is not None:
+            self.detector.load_model()
+        self.ocr = _PaddleOCR(lang="en", show_log=False, **self.settings)
 
     def extract_text(self, image_path: str) -> str:
-        result = self.ocr.ocr(image_path, cls=True)
+        return self.recognize(self.preprocess(image_path))
+
+    def preprocess(self, image_path: str):
+        if self.detector is not None:
+            return self.detector.prepare(image_path)
+        # Same BGR decode PaddleOCR applies to a path
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Cannot read image {image_path}")
+        return img
+
+    def recognize(self, img) -> str:
+        if self.detector is not None:
+            return self._recognize_lines(img)
+        result = self.ocr.ocr(img, cls=self.settings["use_angle_cls"])
         lines = []
         if result and result[0]:
             for line in result[0]:
@@ -25,5 +58,21 @@ class PaddleOCRModel(OCRModel):
                 lines.append(text)
         return "\n".join(lines).strip()
 
+    def _recognize_lines(self, prepared: dict) -> str:
+        detection, detect_sec = self.detector.detect(prepared)
+        start = time.perf_counter()
+        lines = []
+        for crop in line_crops(prepared, detection):
+            bgr = np.ascontiguousarray(np.asarray(crop)[:, :, ::-1])
+            # det=False: recognition (+ angle classification) only
+            result = self.ocr.ocr(bgr, det=False, cls=self.settings["use_angle_cls"])
+            if result and result[0]:
+                text = result[0][0][0]  # [(text, confidence)]
+                if text.strip():
+                    lines.append(text.strip())
+        self.stage_times = {"detect_sec": detect_sec,
+                            "recognize_sec": time.perf_counter() - start}
+        return "\n".join(lines)
+
     def get_name(self) -> str:
-        return "PaddleOCR"
+        return self.qualified_name("PaddleOCR") + detector_suffix(self.detector)
@@ -0,0 +1,116 @@
+"""
+Resolution normalization: rescale an image so its text has a target x-height.
+
+OCR engines have a text size they work best at (their recognizers resize
+line crops to a fixed height anyway), so pixels beyond that only cost
+time. The x-height is estimated from the row projection that the line
+splitter already uses: Otsu-binarize, find the text bands with
+models.detection.projection_bands, and within each band count the rows
+carrying at least half of the band's peak ink (the dense x-height core,
+without ascenders / descenders). The median over bands is the estimate.
+
+Estimates are cached per image (cache/resize/<sha1>.json) and rescaled
+copies per target (cache/resize/<sha1>_x<target>.png), so each image is
+measured and resized once. The worker applies a ResolutionNormalizer before
+model.preprocess when its spec has a "text_height" (config.TARGET_X_HEIGHT).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import config
+from .detection import projection_bands
+
+# Never shrink below a quarter or enlarge more than twice
+MIN_SCALE = 0.25
+MAX_SCALE = 2.0
+# Leave images alone when they are already within this of the target
+SCALE_TOLERANCE = 0.15
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Gray level that best separates ink from background (Otsu's method);
+    -1, so that no pixel counts as ink, for an image of a single gray level
+    (a blank page)."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * np.arange(256))
+    total, total_mass = weight[-1], mass[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = mass / weight
+        mean_fg = (total_mass - mass) / (total - weight)
+        between = weight * (total - weight) * (mean_bg - mean_fg) ** 2
+    if np.isnan(between[:-1]).all():
+        return -1
+    return int(np.nanargmax(between[:-1]))
+
+
+def estimate_x_height(gray: np.ndarray, min_band: int = 4) -> float | None:
+    """Median x-height in pixels of the text lines in a grayscale image,
+    or None when no text band is found (e.g. on a blank page)."""
+    threshold = otsu_threshold(gray)
+    if threshold < 0:
+        return None
+    ink = gray <= threshold
+    if ink.mean() > 0.5:  # light text on a dark background
+        ink = ~ink
+    # Bands: runs of rows with at least 0.5% ink
+    bands = projection_bands(np.where(ink, 0, 255), 255 * 0.995, min_band)
+    heights = []
+    for start, end in bands:
+        profile = ink[start:end].mean(axis=1)
+        heights.append(int((profile >= 0.5 * profile.max()).sum()))
+    return float(np.median(heights)) if heights else None
+
+
+def _temp_path(path: Path) -> Path:
+    """Private name to write `path` under before replace(): unique per
+    process and prefetch thread, so no one ever reads a half-written file."""
+    return path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class ResolutionNormalizer:
+    """Rescales images to `target` pixels of x-height, with caching."""
+
+    def __init__(self, target: float):
+        self.target = target
+        self.cache_dir = config.CACHE_DIR / "resize"
+
+    def x_height(self, image_path: str, digest: str) -> float | None:
+        path = self.cache_dir / f"{digest}.json"
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))["x_height"]
+        with Image.open(image_path) as img:
+            value = estimate_x_height(np.asarray(img.convert("L")))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _temp_path(path)
+        tmp.write_text(json.dumps({"x_height": value}), encoding="utf-8")
+        tmp.replace(path)
+        return value
+
+    def apply(self, image_path: str) -> tuple[str, float]:
+        """(path to decode, scale applied); the original path when the image
+        is already close to the target or has no measurable text."""
+        digest = hashlib.sha1(Path(image_path).read_bytes()).hexdigest()
+        x_height = self.x_height(image_path, digest)
+        if not x_height:
+            return image_path, 1.0
+        scale = min(max(self.target / x_height, MIN_SCALE), MAX_SCALE)
+        if abs(scale - 1.0) <= SCALE_TOLERANCE:
+            return image_path, 1.0
+
+        out = self.cache_dir / f"{digest}_x{self.target:g}.png"
+        if not out.exists():
+            with Image.open(image_path) as img:
+                size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                resized = img.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+            tmp = _temp_path(out)
+            resized.save(tmp, format="PNG", compress_level=1)
+            tmp.replace(out)
+        return str(out), round(scale, 3)
@@ -0,0 +1,214 @@
+"""
+Category router: classify an image's category, then run that category's
+best model.
+
+The charts show a different winner per category, but an incoming image
+has no category label. A CategoryClassifier guesses it in a few
+milliseconds from cheap features of a downscaled copy: the original size
+and aspect ratio, gray level statistics and histogram, ink ratio, edge
+density per direction, text-line bands from the row projection (as in the
+TrOCR line splitter), colour saturation and fine-grained noise. The
+classifier is a softmax regression on standardized features, trained with
+numpy by train_router.py.
+
+train_router.py also writes the routing table (category -> registry name
+and kwargs of the model with the lowest CER, optionally within a latency
+budget) from the results store. RouterOCR loads the classifier, the table
+and every routed model; preprocess classifies the image and runs the
+chosen model's own preprocess (both in the worker's prefetch threads),
+recognize runs the chosen model. Its display name carries the router
+file's stem and a hash of its contents, so results of different routing
+tables never share a model name.
+
+Usage:
+    python train_router.py                  # writes config.ROUTER_PATH
+    create_model("RouterOCR")               # or ("RouterOCR", {}) in MODEL_SPECS
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import config
+from .base import OCRModel
+from .detection import projection_bands
+from .preprocessing import otsu_threshold
+
+HIST_BINS = 8
+
+FEATURE_NAMES = [
+    "log_width", "log_height", "log_aspect",
+    "gray_mean", "gray_std", "ink_ratio", "light_on_dark",
+    "edge_x", "edge_y", "noise",
+    "ink_rows", "ink_cols", "bands_per_100px", "band_height", "row_profile_std",
+    "saturation_mean", "saturation_std",
+    *[f"hist_{i}" for i in range(HIST_BINS)],
+]
+
+
+# ── Features ──────────────────────────────────────────────────
+
+def image_features(image_path: str, size: int = config.ROUTER_FEATURE_SIZE) -> np.ndarray:
+    """Feature vector (FEATURE_NAMES order) of an image, computed on a copy
+    whose longer side is at most `size` pixels."""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        img.draft("RGB", (size, size))  # JPEG: decode at reduced scale
+        small = img.convert("RGB")
+    small.thumbnail((size, size), Image.BILINEAR)
+
+    rgb = np.asarray(small, dtype=np.float32) / 255.0
+    gray8 = np.asarray(small.convert("L"))
+    gray = gray8.astype(np.float32) / 255.0
+
+    # A blank or uniform page has no threshold (-1): no ink, dark-on-light
+    ink = gray8 <= otsu_threshold(gray8)
+    light_on_dark = ink.mean() > 0.5
+    if light_on_dark:
+        ink = ~ink
+
+    dx = np.abs(np.diff(gray, axis=1))
+    dy = np.abs(np.diff(gray, axis=0))
+    # Pixel-level noise: difference to the mean of the 4 neighbours
+    core = gray[1:-1, 1:-1]
+    neighbours = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]) / 4
+    noise = float(np.abs(core - neighbours).mean()) if core.size else 0.0
+
+    row_profile = ink.mean(axis=1)
+    bands = projection_bands(np.where(ink, 0, 255), 255 * 0.995, 2)
+    band_height = np.mean([end - start for start, end in bands]) / len(gray) if bands else 0.0
+
+    hi, lo = rgb.max(axis=2), rgb.min(axis=2)
+    saturation = np.where(hi > 0, (hi - lo) / np.maximum(hi, 1e-6), 0.0)
+    hist = np.histogram(gray, bins=HIST_BINS, range=(0.0, 1.0))[0] / gray.size
+
+    return np.array([
+        np.log(width), np.log(height), np.log(width / height),
+        gray.mean(), gray.std(), ink.mean(), float(light_on_dark),
+        (dx > 0.1).mean() if dx.size else 0.0, (dy > 0.1).mean() if dy.size else 0.0, noise,
+        (row_profile > 0.005).mean(), (ink.mean(axis=0) > 0.005).mean(),
+        100 * len(bands) / len(gray), band_height, row_profile.std(),
+        saturation.mean(), saturation.std(),
+        *hist,
+    ], dtype=np.float64)
+
+
+# ── Classifier ────────────────────────────────────────────────
+
+class CategoryClassifier:
+    """Softmax regression on standardized image features."""
+
+    def __init__(self, classes: list[str], mean: np.ndarray, scale: np.ndarray,
+                 weights: np.ndarray, bias: np.ndarray):
+        self.classes = list(classes)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, features: np.ndarray, labels: list[str], l2: float = 1e-2,
+            steps: int = 500, lr: float = 0.5) -> "CategoryClassifier":
+        """Full-batch gradient descent on the regularized cross-entropy."""
+        classes = sorted(set(labels))
+        y = np.eye(len(classes))[[classes.index(label) for label in labels]]
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        x = (features - mean) / scale
+        weights = np.zeros((x.shape[1], len(classes)))
+        bias = np.zeros(len(classes))
+        for _ in range(steps):
+            probs = _softmax(x @ weights + bias)
+            grad = (probs - y) / len(x)
+            weights -= lr * (x.T @ grad + l2 * weights)
+            bias -= lr * grad.sum(axis=0)
+        return cls(classes, mean, scale, weights, bias)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        x = (np.atleast_2d(features) - self.mean) / self.scale
+        return _softmax(x @ self.weights + self.bias)
+
+    def predict(self, features: np.ndarray) -> list[str]:
+        return [self.classes[i] for i in self.predict_proba(features).argmax(axis=1)]
+
+    def to_dict(self) -> dict:
+        return {"classes": self.classes, "features": FEATURE_NAMES,
+                "mean": self.mean.tolist(), "scale": self.scale.tolist(),
+                "weights": self.weights.tolist(), "bias": self.bias.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CategoryClassifier":
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError("Router classifier was trained on other features; "
+                             "run train_router.py again.")
+        return cls(data["classes"], data["mean"], data["scale"], data["weights"], data["bias"])
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+# ── Router model ──────────────────────────────────────────────
+
+class RouterOCR(OCRModel):
+    """Runs the routed model of the predicted category (config.ROUTER_PATH)."""
+
+    def __init__(self, path: str | None = None):
+        self.path = Path(path) if path else config.ROUTER_PATH
+        self.digest = (hashlib.sha1(self.path.read_bytes()).hexdigest()[:8]
+                       if self.path.exists() else None)
+        self.classifier = None
+        self.routes = {}   # category -> loaded model
+        self.default = None
+
+    def load_model(self) -> None:
+        from . import create_model
+
+        if not self.path.exists():
+            raise FileNotFoundError(f"No router at {self.path}; run train_router.py first.")
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        self.classifier = CategoryClassifier.from_dict(data["classifier"])
+        # Categories routed to the same spec share one loaded model
+        loaded = {}
+
+        def model_for(route: dict) -> OCRModel:
+            if route["spec"] is None:
+                raise ValueError(
+                    f"Router {self.path} routes to {route['model']}, whose results "
+                    f"record no model_spec; re-run run_evaluation.py and train_router.py.")
+            key = json.dumps(route["spec"], sort_keys=True)
+            if key not in loaded:
+                name, kwargs = route["spec"]
+                loaded[key] = create_model(name, **kwargs)
+                loaded[key].load_model()
+            return loaded[key]
+
+        self.routes = {cat: model_for(route) for cat, route in data["routes"].items()}
+        self.default = model_for(data["default"])
+        self.load_source = ", ".join(sorted({m.load_source for m in loaded.values()}))
+
+    def classify(self, image_path: str) -> str:
+        return self.classifier.predict(image_features(image_path))[0]
+
+    def preprocess(self, image_path: str):
+        model = self.routes.get(self.classify(image_path), self.default)
+        return model, model.preprocess(image_path)
+
+    def recognize(self, prepared) -> str:
+        model, inner = prepared
+        model.stage_times = {}
+        text = model.recognize(inner)
+        self.stage_times = model.stage_times
+        return text
+
+    def extract_text(self, image_path: str) -> str:
+        return self.recognize(self.preprocess(image_path))
+
+    def get_name(self) -> str:
+        return self.qualified_name("Router", *filter(None, [self.path.stem, self.digest]))
@@ -1,23 +1,68 @@
 """Tesseract OCR wrapper using pytesseract."""
 
+import time
+
 import pytesseract
 from PIL import Image
 
 from .base import OCRModel
+from .detection import TextDetector, detector_suffix, line_crops
 import config
 
 
 class TesseractOCR(OCRModel):
 
+    # psm 3: fully automatic page segmentation; psm 6: one uniform block of
+    # text (skips layout analysis); oem 1: LSTM engine only
+    PROFILES = {
+        "fast": {"psm": 6, "oem": 1, "upscale": 1.0},
+        "balanced": {"psm": 3, "oem": None, "upscale": 1.0},
+        "accurate": {"psm": 3, "oem": 1, "upscale": 1.5},
+    }
+
+    def __init__(self, profile: str = "balanced", shared_detection: bool = False,
+                 detector: str | None = None):
+        self.use_profile(profile)
+        self.detector = TextDetector(detector) if shared_detection else None
+
     def load_model(self) -> None:
+        if self.detector is not None:
+            self.detector.load_model()
         pytesseract.pytesseract.tesseract_cmd = config.TESSERACT_CMD
 
     def extract_text(self, image_path: str) -> str:
+        return self.recognize(self.preprocess(image_path))
+
+    def preprocess(self, image_path: str):
+        if self.detector is not None:
+            return self.detector.prepare(image_path)
         img = Image.open(image_path)
-        # --psm 3: Fully automatic page segmentation (default)
-        # --psm 6: Assume a single uniform block of text
-        text = pytesseract.image_to_string(img, config="--psm 3")
+        img.load()
+        scale = self.settings["upscale"]
+        if scale != 1.0:
+            img = img.resize((round(img.width * scale), round(img.height * scale)),
+                             Image.BICUBIC)
+        return img
+
+    def _config(self, psm: int) -> str:
+        oem = self.settings["oem"]
+        return f"--psm {psm}" + (f" --oem {oem}" if oem is not None else "")
+
+    def recognize(self, img) -> str:
+        if self.detector is not None:
+            return self._recognize_lines(img)
+        text = pytesseract.image_to_string(img, config=self._config(self.settings["psm"]))
         return text.strip()
 
+    def _recognize_lines(self, prepared: dict) -> str:
+        detection, detect_sec = self.detector.detect(prepared)
+        start = time.perf_counter()
+        # --psm 7: Treat the image as a single text line
+        lines = [pytesseract.image_to_string(crop, config=self._config(7)).strip()
+                 for crop in line_crops(prepared, detection)]
+        self.stage_times = {"detect_sec": detect_sec,
+                            "recognize_sec": time.perf_counter() - start}
+        return "\n".join(line for line in lines if line)
+
     def get_name(self) -> str:
-        return "Tesseract"
+        return self.qualified_name("Tesseract") + detector_suffix(self.detector)
@@ -1,78 +1,122 @@
 """TrOCR (Microsoft) wrapper using HuggingFace transformers.
 
 TrOCR is a line-level OCR model. For full-page images we split them into
-horizontal strips (simple row segmentation) and run TrOCR on each strip.
+horizontal strips (simple row segmentation) and run TrOCR on each strip,
+or, with shared_detection=True, on the line crops of models/detection.py.
 We keep two checkpoints: one fine-tuned on printed text, one on handwritten.
 The caller can choose via the `variant` constructor argument.
 """
 
+import time
+
 import numpy as np
+import torch
 from PIL import Image
 from transformers import TrOCRProcessor, VisionEncoderDecoderModel
 
+from . import artifacts
 from .base import OCRModel
+from .detection import TextDetector, detector_suffix, line_crops, projection_bands
 import config
 
 
 class TrOCRModel(OCRModel):
 
-    def __init__(self, variant: str = "printed"):
+    # Decoding limits and how many strips go through generate() at once;
+    # num_beams None keeps the checkpoint's own generation config.
+    PROFILES = {
+        "fast": {"max_new_tokens": 64, "num_beams": 1, "batch_size": 8},
+        "balanced": {"max_new_tokens": 128, "num_beams": None, "batch_size": 1},
+        "accurate": {"max_new_tokens": 160, "num_beams": 4, "batch_size": 1},
+    }
+
+    def __init__(self, variant: str = "printed", profile: str = "balanced",
+                 shared_detection: bool = False, detector: str | None = None):
+        self.use_profile(profile)
         self.variant = variant
+        self.detector = TextDetector(detector) if shared_detection else None
         self.processor = None
         self.model = None
 
     def load_model(self) -> None:
+        if self.detector is not None:
+            self.detector.load_model()
         model_name = (
             config.TROCR_PRINTED_MODEL
             if self.variant == "printed"
             else config.TROCR_HANDWRITTEN_MODEL
         )
-        self.processor = TrOCRProcessor.from_pretrained(model_name)
-        self.model = VisionEncoderDecoderModel.from_pretrained(model_name)
+        cache = artifacts.versioned(f"trocr_{self.variant}", "transformers")
+        if artifacts.is_prepared(cache):
+            # safetensors checkpoints are memory-mapped by from_pretrained
+            local = artifacts.artifact_dir(cache)
+            self.processor = TrOCRProcessor.from_pretrained(local, local_files_only=True)
+            self.model = VisionEncoderDecoderModel.from_pretrained(
+                local, local_files_only=True
+            )
+            self.load_source = "artifact"
+        else:
+            self.processor = TrOCRProcessor.from_pretrained(model_name)
+            self.model = VisionEncoderDecoderModel.from_pretrained(model_name)
+            if config.USE_ARTIFACT_CACHE:
+                local = artifacts.begin(cache)
+                self.processor.save_pretrained(local)
+                self.model.save_pretrained(local, safe_serialization=True)
+                artifacts.mark_prepared(cache, source=model_name)
+        self.model.eval()
 
     def extract_text(self, image_path: str) -> str:
+        return self.recognize(self.preprocess(image_path))
+
+    def preprocess(self, image_path: str):
+        """Decode, split into strips and normalize each strip (no model)."""
+        if self.detector is not None:
+            return self.detector.prepare(image_path)
         img = Image.open(image_path).convert("RGB")
-        strips = self._split_into_lines(img)
+        return [
+            self.processor(images=strip, return_tensors="pt").pixel_values
+            for strip in self._split_into_lines(img)
+        ]
+
+    def recognize(self, strips) -> str:
+        if self.detector is not None:
+            detection, detect_sec = self.detector.detect(strips)
+            start = time.perf_counter()
+            text = self._generate([
+                self.processor(images=crop, return_tensors="pt").pixel_values
+                for crop in line_crops(strips, detection)
+            ])
+            self.stage_times = {"detect_sec": detect_sec,
+                                "recognize_sec": time.perf_counter() - start}
+            return text
+        return self._generate(strips)
+
+    def _generate(self, strips: list) -> str:
+        settings = self.settings
+        kwargs = {"max_new_tokens": settings["max_new_tokens"]}
+        if settings["num_beams"] is not None:
+            kwargs["num_beams"] = settings["num_beams"]
         lines = []
-        for strip in strips:
-            pixel_values = self.processor(
-                images=strip, return_tensors="pt"
-            ).pixel_values
-            generated_ids = self.model.generate(pixel_values, max_new_tokens=128)
-            text = self.processor.batch_decode(
-                generated_ids, skip_special_tokens=True
-            )[0]
-            if text.strip():
-                lines.append(text.strip())
+        size = settings["batch_size"]
+        for i in range(0, len(strips), size):
+            pixel_values = torch.cat(strips[i:i + size])
+            generated_ids = self.model.generate(pixel_values, **kwargs)
+            texts = self.processor.batch_decode(generated_ids, skip_special_tokens=True)
+            lines += [text.strip() for text in texts if text.strip()]
         return "\n".join(lines)
 
     def get_name(self) -> str:
         suffix = "printed" if self.variant == "printed" else "handwritten"
-        return f"TrOCR ({suffix})"
+        return self.qualified_name("TrOCR", suffix) + detector_suffix(self.detector)
 
     # ── simple horizontal strip segmentation ──────────────────
     @staticmethod
     def _split_into_lines(img: Image.Image, min_height: int = 30) -> list:
         """Split an image into horizontal strips based on white-space gaps."""
         gray = np.array(img.convert("L"))
-        # Row projection: average pixel intensity per row
-        row_mean = gray.mean(axis=1)
-        threshold = 240  # near-white rows are gaps
-
-        in_text = False
-        start = 0
-        strips = []
-        for i, val in enumerate(row_mean):
-            if val < threshold and not in_text:
-                in_text = True
-                start = i
-            elif val >= threshold and in_text:
-                in_text = False
-                if i - start >= min_height:
-                    strips.append(img.crop((0, start, img.width, i)))
-        # Handle last strip
-        if in_text and len(gray) - start >= min_height:
-            strips.append(img.crop((0, start, img.width, len(gray))))
+        # Row projection: near-white rows (mean >= 240) are gaps
+        strips = [img.crop((0, start, img.width, end))
+                  for start, end in projection_bands(gray, 240, min_height)]
 
         # Fallback: if segmentation finds nothing, use the whole image
         if not strips:
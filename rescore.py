@@ -0,0 +1,115 @@
+"""
+Recompute metrics offline from stored full predictions.
+
+Reads predictions.jsonl of every stored run in results/runs/, recomputes all
+metrics registered in evaluation.metrics.METRICS in a process pool, and writes
+the rescored rows back into each run as results_metrics_v<METRIC_VERSION>.csv
+(which compare.py then prefers over results.csv). No OCR framework is imported, so
+this is the way to pick up a change to normalize_text or a new metric without
+re-running any model (including the rate-limited Mistral run).
+
+Usage:
+    python rescore.py
+    python rescore.py --workers 8 --update-results
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+os.environ["PYTHONIOENCODING"] = "utf-8"
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+import pandas as pd
+
+import config
+from evaluation.metrics import METRIC_VERSION, score_prediction
+from evaluation.store import list_prediction_files, load_predictions, truncate_texts
+
+CHUNK_SIZE = 500
+
+
+def _score_chunk(rows: list[dict]) -> list[dict]:
+    """Worker: recompute metrics for a chunk of stored rows."""
+    out = []
+    for row in rows:
+        row = dict(row)
+        pred, gt = row.get("prediction"), row.get("ground_truth")
+        row.update(score_prediction(pred if isinstance(pred, str) else "",
+                                    gt if isinstance(gt, str) else ""))
+        row["metric_version"] = METRIC_VERSION
+        out.append(row)
+    return out
+
+
+def rescore_rows(rows: list[dict], workers: int | None = None) -> list[dict]:
+    """Recompute metrics for all rows, in parallel chunks, preserving order."""
+    chunks = [rows[i:i + CHUNK_SIZE] for i in range(0, len(rows), CHUNK_SIZE)]
+    if len(chunks) <= 1 or workers == 1:
+        return [r for chunk in chunks for r in _score_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for chunk in pool.map(_score_chunk, chunks) for r in chunk]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size (default: CPU count)")
+    parser.add_argument("--update-results", action="store_true",
+                        help="also rewrite all_results.csv and the charts")
+    args = parser.parse_args()
+
+    files = list_prediction_files()
+    if not files:
+        print(f"No stored runs in {config.RUNS_DIR}. "
+              "Run run_evaluation.py first.")
+        sys.exit(1)
+
+    # Load everything first so the pool gets one flat list of work
+    sources = {path: load_predictions(path) for path in files}
+    all_rows = [row for rows in sources.values() for row in rows]
+    print(f"Rescoring {len(all_rows)} predictions from {len(files)} run(s) "
+          f"with metric version {METRIC_VERSION} ...")
+    rescored = rescore_rows(all_rows, args.workers)
+
+    frames = []
+    offset = 0
+    for path, rows in sources.items():
+        df = pd.DataFrame(truncate_texts(rescored[offset:offset + len(rows)]))
+        offset += len(rows)
+        out_path = Path(path).parent / f"results_metrics_v{METRIC_VERSION}.csv"
+        df.to_csv(out_path, index=False)
+        frames.append(df)
+        print(f"  [OK] {out_path} ({len(df)} rows)")
+
+    # Runs are ordered oldest first, so the newest result per image wins
+    combined = pd.concat(frames, ignore_index=True).drop_duplicates(
+        subset=["model", "category", "image"], keep="last"
+    )
+    print(f"\n{'='*60}")
+    print(f"SUMMARY (metric version {METRIC_VERSION})")
+    print(f"{'='*60}")
+    summary = combined.groupby(["model", "category"]).agg(
+        avg_cer=("cer", "mean"),
+        avg_wer=("wer", "mean"),
+        avg_acc=("accuracy", "mean"),
+    ).round(3)
+    print(summary.to_string())
+
+    if args.update_results:
+        from evaluation.visualize import generate_all_visualizations
+
+        config.ensure_dirs()
+        csv_path = config.SCORES_DIR / "all_results.csv"
+        combined.to_csv(csv_path, index=False)
+        print(f"\nResults saved to {csv_path} ({len(combined)} rows)")
+        generate_all_visualizations(csv_path)
+
+
+if __name__ == "__main__":
+    main()
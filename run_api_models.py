@@ -3,10 +3,30 @@ Run API-based OCR model (Mistral Pixtral) on ALL dataset categories.
 Run this AFTER run_evaluation.py has verified all local models work.
 Results are appended to the existing CSV and visualizations regenerated.
 
+With --adaptive each category is sampled in random order and stops once the
+CER / latency intervals are narrow enough or a model already in
+all_results.csv is better on both (evaluation/sequential.py), which saves
+most of the rate-limited requests on easy categories.
+
+--pack N sends up to N images of a category per request ("Mistral OCR
+(pack N)" in the results) and reports images per request and CER against
+the unpacked "Mistral OCR" rows already in all_results.csv. To try it
+without the real API, start benchmarks/mistral_stub_server.py and point
+MISTRAL_API_URL at it.
+
+--dedup flag|reuse finds near-duplicate images across all categories first
+(evaluation/dedup.py); with reuse a duplicate gets its original's prediction
+and costs no request.
+
 Usage:
     MISTRAL_API_KEY=xxx python run_api_models.py
+    MISTRAL_API_KEY=xxx python run_api_models.py --adaptive
+    MISTRAL_API_KEY=xxx python run_api_models.py --pack 4
+    MISTRAL_API_KEY=xxx python run_api_models.py --dedup reuse
 """
 
+import argparse
+import json
 import os
 import sys
 import time
@@ -22,56 +42,175 @@ import pandas as pd
 from tqdm import tqdm
 
 import config
-from evaluation.metrics import compute_cer, compute_wer, compute_accuracy
-from evaluation.visualize import generate_all_visualizations
-from models.mistral_ocr import MistralOCR
-
-
-def get_dataset_pairs(images_dir: Path, gt_dir: Path) -> list[tuple[Path, str]]:
-    pairs = []
-    for img_path in sorted(images_dir.glob("*.png")):
-        gt_path = gt_dir / f"{img_path.stem}.txt"
-        if gt_path.exists():
-            gt_text = gt_path.read_text(encoding="utf-8").strip()
-            pairs.append((img_path, gt_text))
-    return pairs
+from evaluation.aggregate import summarize_frame, summary_table
+from evaluation.dataset import get_dataset_pairs, sample_key
+from evaluation.dedup import Deduplicator, print_dedup_report
+from evaluation.metrics import METRIC_VERSION, score_prediction
+from evaluation.sequential import (
+    SequentialEstimator, adaptive_order, default_settings, print_adaptive_report,
+    reference_estimates,
+)
+from evaluation.store import save_run, truncate_texts
+from evaluation.watchdog import STATUS_ERROR, STATUS_OK, STATUS_REUSED
+from models import create_model
 
 
 def evaluate_model(
     model, dataset: list[tuple[Path, str]], category: str, desc: str = "",
+    seq: SequentialEstimator | None = None, stops: dict | None = None,
+    dedup: Deduplicator | None = None, spec: list | None = None,
 ) -> list[dict]:
-    """Run one model on one dataset, with rate-limit-friendly delays."""
+    """Run one model on one dataset, with rate-limit-friendly delays. Images
+    go to the model in groups of model.pack (one request each when packed);
+    each image is charged an equal share of its group's time. With `seq`,
+    images are visited in random order until the stopping rule holds. With
+    `dedup`, duplicates are marked and, in reuse mode, not sent. `spec`
+    ([registry name, kwargs]) is recorded as "model_spec" in every row."""
+    model_spec = json.dumps(spec) if spec is not None else None
+    if seq is not None:
+        dataset = [(img, gt) for _, img, gt in adaptive_order(
+            [(category, img, gt) for img, gt in dataset], seq.settings["seed"])]
+    size = getattr(model, "pack", 1)
     rows = []
-    for img_path, gt_text in tqdm(dataset, desc=desc, leave=False):
-        start = time.perf_counter()
-        try:
-            prediction = model.extract_text(str(img_path))
-        except Exception as e:
-            print(f"    [FAIL] Error on {img_path.name}: {e}")
-            prediction = ""
-        elapsed = time.perf_counter() - start
-
-        rows.append({
-            "model": model.get_name(),
-            "category": category,
-            "image": img_path.name,
-            "cer": round(compute_cer(prediction, gt_text), 4),
-            "wer": round(compute_wer(prediction, gt_text), 4),
-            "accuracy": round(compute_accuracy(prediction, gt_text), 2),
-            "time_sec": round(elapsed, 3),
-            "prediction": prediction[:200],
-            "ground_truth": gt_text[:200],
-        })
-        print(f"    {model.get_name()} | {category} | {img_path.name} | "
-              f"CER={rows[-1]['cer']:.3f} | {elapsed:.1f}s")
-
-        # Rate limiting: Mistral free tier allows ~2 requests/minute
-        time.sleep(30.0)
+    pending = list(dataset)
+    with tqdm(total=len(dataset), desc=desc, leave=False) as bar:
+        while pending:
+            group = []
+            while pending and len(group) < size:
+                img_path, gt_text = pending.pop(0)
+                key = sample_key(category, img_path.name)
+                reused = dedup.reusable(key) if dedup is not None else None
+                if reused is None:
+                    group.append((img_path, gt_text))
+                    continue
+                rows.append({
+                    "model": model.get_name(),
+                    "category": category,
+                    "image": img_path.name,
+                    **score_prediction(reused[0], gt_text),
+                    "time_sec": 0.0,
+                    "metric_version": METRIC_VERSION,
+                    "status": STATUS_REUSED,
+                    "prediction": reused[0],
+                    "ground_truth": gt_text,
+                    "model_spec": model_spec,
+                    **dedup.columns(key),
+                    "saved_sec": reused[1],
+                })
+                print(f"    [DEDUP] {img_path.name} reuses the prediction for "
+                      f"{rows[-1]['duplicate_of']}")
+                bar.update(1)
+            if not group:
+                continue
+            requests_before = getattr(model, "requests", 0)
+            start = time.perf_counter()
+            status = STATUS_OK
+            try:
+                predictions = model.extract_text_batch([str(img) for img, _ in group])
+            except Exception as e:
+                print(f"    [FAIL] Error on {', '.join(img.name for img, _ in group)}: {e}")
+                predictions = [""] * len(group)
+                status = STATUS_ERROR
+            elapsed = (time.perf_counter() - start) / len(group)
+            bar.update(len(group))
+
+            for (img_path, gt_text), prediction in zip(group, predictions):
+                rows.append({
+                    "model": model.get_name(),
+                    "category": category,
+                    "image": img_path.name,
+                    **score_prediction(prediction, gt_text),
+                    "time_sec": round(elapsed, 3),
+                    "metric_version": METRIC_VERSION,
+                    "status": status,
+                    "prediction": prediction,
+                    "ground_truth": gt_text,
+                    "model_spec": model_spec,
+                    **(dedup.columns(sample_key(category, img_path.name))
+                       if dedup is not None else {}),
+                })
+                if dedup is not None and status == STATUS_OK:
+                    # A failed request must not be reused for later duplicates
+                    dedup.remember(rows[-1])
+                print(f"    {model.get_name()} | {category} | {img_path.name} | "
+                      f"CER={rows[-1]['cer']:.3f} | {elapsed:.1f}s")
+
+            if seq is not None and status == STATUS_OK:
+                # Failed requests say nothing about the model's CER or latency
+                for row in rows[-len(group):]:
+                    seq.add(category, row["cer"], row["time_sec"])
+                ran = seq.count(category)
+                if any(seq.due(n) for n in range(ran - len(group) + 1, ran + 1)):
+                    reason, est = seq.check(category)
+                    if reason is not None:
+                        print(f"    [ADAPTIVE] {category}: stopped after {est['n']} images "
+                              f"({reason})")
+                        stops[(model.get_name(), category)] = reason
+                        break
+
+            # Rate limiting: Mistral free tier allows ~2 requests/minute
+            sent = getattr(model, "requests", requests_before + 1) - requests_before
+            time.sleep(config.MISTRAL_REQUEST_DELAY_SEC * max(sent, 1))
 
     return rows
 
 
+def print_packing_report(model, rows: list[dict], existing_df: pd.DataFrame,
+                         run_dir: Path) -> None:
+    """Images per request and CER of packed calls vs unpacked ones on the
+    same images (the "Mistral OCR" rows of all_results.csv)."""
+    print(f"\n{'='*60}")
+    print(f"PACKING ({model.pack} images per request max)")
+    print(f"{'='*60}")
+    # Rows reused by --dedup never went to the API
+    sent = [row for row in rows if row.get("status") != STATUS_REUSED]
+    per_request = len(sent) / model.requests if model.requests else 0.0
+    print(f"  {len(sent)} images in {model.requests} requests: "
+          f"{per_request:.2f} images/request ({model.fallbacks} fallback group(s))")
+
+    # CER is compared on images both variants actually recognized
+    packed = pd.DataFrame([row for row in sent if row["status"] == STATUS_OK],
+                          columns=["category", "image", "cer", "time_sec"])
+    if existing_df.empty or "model" not in existing_df:
+        print("  No unpacked results to compare with; run without --pack first.")
+        return
+    single = existing_df[existing_df["model"] == "Mistral OCR"]
+    if "status" in single:
+        single = single[single["status"].fillna(STATUS_OK) == STATUS_OK]
+    single = single[["category", "image", "cer", "time_sec"]]
+    paired = packed.merge(single, on=["category", "image"], suffixes=("_packed", "_single"))
+    if paired.empty:
+        print("  No unpacked results to compare with; run without --pack first.")
+        return
+    table = paired.groupby("category").agg(
+        images=("image", "count"),
+        cer_single=("cer_single", "mean"),
+        cer_packed=("cer_packed", "mean"),
+        time_single=("time_sec_single", "mean"),
+        time_packed=("time_sec_packed", "mean"),
+    ).round(3)
+    table["cer_delta"] = (table["cer_packed"] - table["cer_single"]).round(3)
+    print(table.to_string())
+    print(f"\n  Overall: CER {paired['cer_single'].mean():.3f} unpacked -> "
+          f"{paired['cer_packed'].mean():.3f} packed over {len(paired)} images")
+    path = run_dir / "packing_report.csv"
+    table.to_csv(path)
+    print(f"Report saved to {path}")
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API OCR model.")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="stop each category once its estimates are precise "
+                             "or a local model dominates")
+    parser.add_argument("--pack", type=int, default=1,
+                        help="images per API request (1 = unpacked)")
+    parser.add_argument("--dedup", choices=["off", "flag", "reuse"], default="off",
+                        help="mark near-duplicate images, or reuse their original's "
+                             "prediction instead of sending them")
+    args = parser.parse_args()
+
+    config.ensure_dirs()
     csv_path = config.SCORES_DIR / "all_results.csv"
 
     if csv_path.exists():
@@ -102,8 +241,9 @@ def main() -> None:
     print(f"\nTotal: {total_images} images across {len(all_datasets)} categories")
 
     # Load Mistral
+    spec = ["MistralOCR", {"pack": args.pack}]
     try:
-        mistral = MistralOCR()
+        mistral = create_model(spec[0], **spec[1])
         mistral.load_model()
         print("[OK] Mistral OCR ready")
     except ValueError as e:
@@ -111,10 +251,28 @@ def main() -> None:
         print("Set MISTRAL_API_KEY in your .env file.")
         sys.exit(1)
 
-    print(f"\nRunning Mistral OCR on {total_images} images ...")
-    print(f"Estimated time: ~{total_images * 30 // 60} minutes (30s delay per request)")
+    dedup = None
+    if args.dedup != "off":
+        dedup = Deduplicator([(cat, img, gt) for cat, pairs in all_datasets.items()
+                              for img, gt in pairs], args.dedup)
+        print(f"[OK] {len(dedup.duplicates)} of {dedup.total} images are near-duplicates "
+              f"(hashed in {dedup.hash_sec:.1f}s)")
+
+    delay = config.MISTRAL_REQUEST_DELAY_SEC
+    n_requests = -(-total_images // mistral.pack)
+    print(f"\nRunning {mistral.get_name()} on {total_images} images ...")
+    print(f"Estimated time: ~{n_requests * delay / 60:.0f} minutes "
+          f"({n_requests} requests, {delay:g}s delay per request)")
 
     new_results = []
+    seq, stops = None, {}
+    if args.adaptive:
+        settings = default_settings()
+        # Local models already in the CSV are the competitors
+        references = reference_estimates(existing_df, settings) if not existing_df.empty else {}
+        for found in references.values():
+            found[:] = [r for r in found if r["model"] != mistral.get_name()]
+        seq = SequentialEstimator(settings, references)
 
     print(f"\n{'='*60}")
     print(f"Running Mistral OCR ...")
@@ -124,11 +282,24 @@ def main() -> None:
         label = config.get_category_label(cat_key)
         print(f"  Mistral OCR on {label} ({len(pairs)} images) ...")
         new_results.extend(
-            evaluate_model(mistral, pairs, cat_key, desc=f"    Mistral [{cat_key}]")
+            evaluate_model(mistral, pairs, cat_key, desc=f"    Mistral [{cat_key}]",
+                           seq=seq, stops=stops, dedup=dedup,
+                           spec=spec)
         )
 
+    # Keep full texts for offline rescoring, truncated copies in the CSV
+    run_dir = save_run(new_results, "api")
+    print(f"\nRun stored in {run_dir}")
+    if args.adaptive:
+        tasks = [(cat, img, gt) for cat, pairs in all_datasets.items() for img, gt in pairs]
+        print_adaptive_report(pd.DataFrame(new_results), tasks, stops, run_dir)
+    if dedup is not None:
+        print_dedup_report(pd.DataFrame(new_results), run_dir)
+    if mistral.pack > 1:
+        print_packing_report(mistral, new_results, existing_df, run_dir)
+
     # Merge and save
-    new_df = pd.DataFrame(new_results)
+    new_df = pd.DataFrame(truncate_texts(new_results))
     combined = pd.concat([existing_df, new_df], ignore_index=True)
     combined = combined.drop_duplicates(
         subset=["model", "category", "image"], keep="last"
@@ -140,18 +311,13 @@ def main() -> None:
     print(f"\n{'='*60}")
     print("MISTRAL OCR SUMMARY")
     print(f"{'='*60}")
-    api_summary = new_df.groupby(["model", "category"]).agg(
-        avg_cer=("cer", "mean"),
-        avg_wer=("wer", "mean"),
-        avg_acc=("accuracy", "mean"),
-        avg_time=("time_sec", "mean"),
-    ).round(3)
-    print(api_summary.to_string())
+    print(summary_table(summarize_frame(new_df)).to_string())
 
     # Regenerate visualizations with all data
     print(f"\n{'='*60}")
     print("Regenerating visualizations with all models ...")
     print(f"{'='*60}")
+    from evaluation.visualize import generate_all_visualizations
     generate_all_visualizations(csv_path)
 
 
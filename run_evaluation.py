@@ -3,12 +3,65 @@ Main evaluation orchestrator.
 Runs all LOCAL models (Tesseract, EasyOCR, PaddleOCR, TrOCR, DocTR) on ALL
 dataset categories, computes metrics, saves CSVs, and generates visualizations.
 
-Each model runs in a separate subprocess to avoid memory accumulation.
+Each model runs in a separate subprocess to avoid memory accumulation. Workers
+report RSS per image; a worker whose RSS grew more than --max-rss-growth-mb
+since loading its model, or that has processed --max-images images, is
+restarted and resumes at the next image.
+
+Inside a worker, a prefetch pool decodes the next --prefetch images while
+the model runs and a writer thread scores and reports finished images.
+
+With --normalize-resolution every image is rescaled to the model's target
+text x-height (config.TARGET_X_HEIGHT) before decoding; compare a run with
+and without it using compare.py to see the effect per category.
+
+--sweep runs every model spec once per speed profile (config.SPEED_PROFILES:
+fast, balanced, accurate) and reports the CER-vs-latency Pareto frontier
+per category (also drawn as chart 12).
+
+Each image runs under a per-image time limit (config.IMAGE_TIMEOUT_SEC and
+IMAGE_TIMEOUT_OVERRIDES, or --image-timeout). A stuck image is retried up
+to config.IMAGE_MAX_RETRIES times in a fresh worker and then recorded with
+status "timeout"; images that keep timing out are quarantined in
+results/quarantine.json and skipped by later runs (--ignore-quarantine
+runs them anyway).
+
+--adaptive samples each category in random order and stops a model on a
+category once the 95% intervals on mean CER and latency are narrow enough
+(config.ADAPTIVE_*) or another model is better on both (evaluation/
+sequential.py). Models evaluated earlier in the run, and those of
+--reference RUN, are the competitors; adaptive_report.csv in the run
+directory lists the estimates and the images each pair actually used.
+
+--profile cprofile|sampling profiles model loading and inference in every
+worker; hotspot summaries (our code vs framework code), .prof files or
+collapsed stacks and flamegraphs are written to results/profiles/.
+
+--dedup flag|reuse hashes every image first (evaluation/dedup.py) and marks
+near-duplicates (within config.DEDUP_MAX_DISTANCE of 64 perceptual-hash
+bits) of an earlier image; with reuse a duplicate gets the prediction of
+its original instead of being run. The DEDUPLICATION section reports the
+duplicate rate, the model time saved and, with flag, how far duplicates'
+CER is from their original's.
+
+With --shard i/N only the images hashed into shard i are evaluated; run one
+shard per machine and combine the run directories with merge.py.
 
 Usage:
     python run_evaluation.py
+    python run_evaluation.py --max-images 200 --max-rss-growth-mb 2000 --tracemalloc
+    python run_evaluation.py --shard 0/4
+    python run_evaluation.py --image-timeout 60 --ignore-quarantine
+    python run_evaluation.py --prefetch 4
+    python run_evaluation.py --normalize-resolution
+    python run_evaluation.py --sweep
+    python run_evaluation.py --sweep --profiles fast,balanced
+    python run_evaluation.py --adaptive --reference 20240131-142501-local
+    python run_evaluation.py --profile sampling
+    python run_evaluation.py --dedup reuse
 """
 
+import argparse
 import json
 import os
 import subprocess
@@ -27,111 +80,385 @@ if sys.platform == "win32":
 import pandas as pd
 
 import config
-from evaluation.visualize import generate_all_visualizations
+from evaluation.aggregate import summarize_frame, summary_table
+from evaluation.dataset import get_tasks, parse_shard, sample_key
+from evaluation.dedup import print_dedup_report, write_known
+from evaluation.memory import linear_slope
+from evaluation.sequential import (
+    default_settings, merge_references, print_adaptive_report, reference_estimates,
+    seen_values,
+)
+from evaluation.store import load_run, save_run, truncate_texts
+from evaluation.watchdog import record_timeout, worker_time_limit
 
 
 PYTHON = str(Path(config.BASE_DIR) / "venv" / "Scripts" / "python.exe")
 WORKER = str(Path(config.BASE_DIR) / "_run_single_model.py")
 
-# Model specs: (module_path, class_name, constructor_kwargs)
+# Model specs: (registry name in models.MODEL_REGISTRY, constructor_kwargs)
+# Every local wrapper accepts {"profile": "fast" | "balanced" | "accurate"}.
 MODEL_SPECS = [
-    ("models.tesseract_ocr", "TesseractOCR", {}),
-    ("models.easy_ocr", "EasyOCRModel", {}),
-    ("models.paddle_ocr", "PaddleOCRModel", {}),
-    ("models.trocr_model", "TrOCRModel", {"variant": "printed"}),
-    ("models.trocr_model", "TrOCRModel", {"variant": "handwritten"}),
-    ("models.doctr_model", "DocTRModel", {}),
+    ("TesseractOCR", {}),
+    ("EasyOCRModel", {}),
+    ("PaddleOCRModel", {}),
+    ("TrOCRModel", {"variant": "printed"}),
+    ("TrOCRModel", {"variant": "handwritten"}),
+    ("DocTRModel", {}),
 ]
 
 
-def main() -> None:
-    csv_path = config.SCORES_DIR / "all_results.csv"
-    all_results = []
+def _parse_worker_output(stdout: str, rows: list[dict],
+                         stops: dict | None = None) -> tuple[int | None, dict | None]:
+    """Collect ROW lines into rows (STOP lines into stops), echo INFO lines;
+    return the NEXT index and the row of the image that timed out, if any."""
+    next_index = None
+    timeout_row = None
+    for line in stdout.splitlines():
+        if line.startswith("ROW:"):
+            rows.append(json.loads(line[4:]))
+        elif line.startswith("NEXT:"):
+            next_index = int(line[5:])
+        elif line.startswith("TIMEOUT:"):
+            timeout_row = json.loads(line[8:])
+        elif line.startswith("STOP:") and stops is not None:
+            stop = json.loads(line[5:])
+            stops[(stop["model"], stop["category"])] = stop["reason"]
+        elif line.startswith("INFO:"):
+            print(f"  {line[5:]}")
+    return next_index, timeout_row
 
-    # Show dataset summary first
-    print("=" * 60)
-    print("DATASET CATEGORIES")
-    print("=" * 60)
-    for cat_key in config.CATEGORIES:
-        img_dir, gt_dir = config.get_category_dirs(cat_key)
-        n_img = len(list(img_dir.glob("*.png")))
-        label = config.get_category_label(cat_key)
-        print(f"  {label}: {n_img} images")
-    print()
-
-    for module_path, class_name, kwargs in MODEL_SPECS:
-        spec_json = json.dumps({
-            "module": module_path,
-            "cls": class_name,
-            "kwargs": kwargs,
-        })
-        print(f"\n{'='*60}")
-        print(f"Running {class_name} {kwargs} in subprocess ...")
-        print(f"{'='*60}")
 
+def run_model(spec: dict, images: int, max_retries: int = config.IMAGE_MAX_RETRIES,
+              stops: dict | None = None) -> list[dict]:
+    """Run one model spec on `images` images in worker subprocesses,
+    restarting recycled workers and workers stopped by the per-image
+    watchdog. A worker that outlives worker_time_limit() is killed and the
+    model ends with the rows received so far."""
+    rows = []
+    start = 0
+    worker = 0
+    attempts = {}
+    model_stops = {}
+    known = config.CACHE_DIR / f"dedup_known_{os.getpid()}.json"
+    while True:
+        run_spec = {**spec, "start": start, "worker": worker}
+        if spec.get("adaptive"):
+            # A restarted worker continues the estimates of the earlier ones
+            run_spec["adaptive"] = {**spec["adaptive"], "seen": seen_values(rows),
+                                    "stopped": [cat for _, cat in model_stops]}
+        if spec.get("dedup") and rows:
+            # Predictions of earlier workers can still be reused
+            run_spec["dedup"] = {**spec["dedup"], "known": str(write_known(rows, known))}
+        spec_json = json.dumps(run_spec)
+        # The worker's watchdog bounds the model load and every image; this
+        # generous outer limit only catches a worker whose watchdog never fires.
+        limit = worker_time_limit(images - start, spec.get("image_timeout"))
         try:
             result = subprocess.run(
                 [PYTHON, WORKER, spec_json],
                 capture_output=True,
                 text=True,
-                timeout=900,
+                timeout=limit,
                 cwd=str(config.BASE_DIR),
                 env={**os.environ, "PYTHONIOENCODING": "utf-8",
                      "PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK": "True",
                      "FLAGS_enable_pir_api": "0",
                      "FLAGS_use_mkldnn": "0"},
             )
-            if result.stderr:
-                for line in result.stderr.splitlines():
-                    if "Error" in line or "FAIL" in line or "Traceback" in line:
-                        print(f"  {line}")
-
-            if result.returncode != 0:
-                print(f"  [FAIL] Subprocess exited with code {result.returncode}")
-                for line in result.stdout.splitlines():
-                    if line.startswith("RESULT:"):
-                        data = json.loads(line[7:])
-                        all_results.extend(data)
-                continue
-
-            for line in result.stdout.splitlines():
-                if line.startswith("RESULT:"):
-                    data = json.loads(line[7:])
-                    all_results.extend(data)
-                    print(f"  [OK] Got {len(data)} results")
-                elif line.startswith("INFO:"):
-                    print(f"  {line[5:]}")
-        except subprocess.TimeoutExpired:
-            print(f"  [FAIL] Subprocess timed out after 900s")
-        except Exception as e:
-            print(f"  [FAIL] {e}")
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout or ""
+            if isinstance(stdout, bytes):  # partial output is not decoded
+                stdout = stdout.decode("utf-8", errors="replace")
+            _parse_worker_output(stdout, rows, model_stops)
+            print(f"  [FAIL] Subprocess timed out after {limit:.0f}s")
+            break
 
-    # Save results
-    if not all_results:
-        print("\nNo results collected. Check errors above.")
-        sys.exit(1)
+        if result.stderr:
+            for line in result.stderr.splitlines():
+                if "Error" in line or "FAIL" in line or "Traceback" in line:
+                    print(f"  {line}")
+
+        next_index, timeout_row = _parse_worker_output(result.stdout, rows, model_stops)
+        if result.returncode == config.WORKER_RECYCLE_EXIT_CODE and next_index is not None:
+            print(f"  [RECYCLE] Worker {worker} stopped; restarting at image {next_index}")
+            start = next_index
+            worker += 1
+            continue
+        if result.returncode == config.WORKER_TIMEOUT_EXIT_CODE and timeout_row is not None:
+            index = timeout_row.pop("index")
+            key = sample_key(timeout_row["category"], timeout_row["image"])
+            attempts[key] = attempts.get(key, 0) + 1
+            if attempts[key] <= max_retries:
+                print(f"  [RETRY] {key} timed out; retry {attempts[key]}/{max_retries} "
+                      f"in a fresh worker")
+                start = index
+            else:
+                print(f"  [TIMEOUT] {key} gave up after {attempts[key]} attempt(s)")
+                # Quarantine counts runs that gave up, not single attempts
+                total = record_timeout(timeout_row["model"], key)
+                if total >= config.QUARANTINE_AFTER:
+                    print(f"  [WARN] {key} quarantined for {timeout_row['model']} "
+                          f"(given up in {total} runs)")
+                rows.append(timeout_row)
+                start = index + 1
+            worker += 1
+            continue
+        if result.returncode != 0:
+            print(f"  [FAIL] Subprocess exited with code {result.returncode}")
+        break
+
+    known.unlink(missing_ok=True)
+    if stops is not None:
+        stops.update(model_stops)
+    print(f"  [OK] Got {len(rows)} results from {worker + 1} worker(s)")
+    return rows
+
+
+def print_load_summary(df: pd.DataFrame) -> None:
+    """Model load time per worker start (recycled workers load again)."""
+    if "load_sec" not in df:
+        return
+    print(f"\n{'='*60}")
+    print("LOAD TIME")
+    print(f"{'='*60}")
+    loads = df.drop_duplicates(subset=["model", "worker"])
+    for model, grp in loads.groupby("model", sort=False):
+        sources = ", ".join(sorted(grp["load_source"].astype(str).unique()))
+        print(f"  {model}: {grp['load_sec'].mean():.2f}s avg over {len(grp)} load(s) "
+              f"[{sources}]")
+
+
+def print_stage_summary(df: pd.DataFrame) -> None:
+    """Average decode (prefetch stage) vs inference seconds per image."""
+    if "infer_sec" not in df:
+        return
+    print(f"\n{'='*60}")
+    print("PIPELINE STAGES (avg s/image)")
+    print(f"{'='*60}")
+    for model, grp in df.groupby("model", sort=False):
+        decode, infer = grp["decode_sec"].mean(), grp["infer_sec"].mean()
+        share = decode / (decode + infer) if decode + infer > 0 else 0.0
+        line = (f"  {model}: decode {decode:.3f}s | inference {infer:.3f}s | "
+                f"decode share {share:.0%}")
+        if "detect_sec" in grp and grp["detect_sec"].notna().any():
+            # Cached detections count as 0s, so this is the amortized cost
+            line += (f" | detect {grp['detect_sec'].mean():.3f}s + "
+                     f"recognize {grp['recognize_sec'].mean():.3f}s")
+        print(line)
+
+
+def print_memory_summary(df: pd.DataFrame) -> None:
+    """Peak / per-image RSS per model and a leak estimate (RSS slope)."""
+    if "rss_mb" not in df:
+        return
+    print(f"\n{'='*60}")
+    print("MEMORY")
+    print(f"{'='*60}")
+    for model, grp in df.groupby("model", sort=False):
+        # Slope within each worker only: a restart resets RSS
+        slopes = [linear_slope(w["rss_mb"].tolist())
+                  for _, w in grp.groupby("worker") if len(w) > 1]
+        slope = max(slopes) if slopes else 0.0
+        heap = grp["py_heap_peak_mb"].max() if grp["py_heap_peak_mb"].notna().any() else None
+        line = (f"  {model}: peak RSS {grp['peak_rss_mb'].max():.0f}MB | "
+                f"avg delta {grp['rss_delta_mb'].mean():+.2f}MB/image | "
+                f"growth {slope:+.2f}MB/image")
+        if heap is not None:
+            line += f" | max heap peak {heap:.1f}MB"
+        if slope > config.LEAK_WARN_MB_PER_IMAGE:
+            line += "  [WARN] possible leak"
+        print(line)
 
-    df = pd.DataFrame(all_results)
+
+def print_status_summary(df: pd.DataFrame) -> None:
+    """Images per model that did not finish normally."""
+    if "status" not in df:
+        return
+    bad = df[df["status"].fillna("ok") != "ok"]
+    if bad.empty:
+        return
+    print(f"\n{'='*60}")
+    print("FAILED / SKIPPED IMAGES")
+    print(f"{'='*60}")
+    for model, grp in bad.groupby("model", sort=False):
+        counts = grp["status"].value_counts()
+        print(f"  {model}: " + ", ".join(f"{n} {status}" for status, n in counts.items()))
+
+
+def finalize_run(all_results: list[dict], kind: str, **meta) -> Path:
+    """Store the run, write all_results.csv, print summaries, draw charts;
+    returns the run directory."""
+    csv_path = config.SCORES_DIR / "all_results.csv"
+    run_dir = save_run(all_results, kind, **meta)
+    print(f"\nRun stored in {run_dir}")
+
+    df = pd.DataFrame(truncate_texts(all_results))
     df.to_csv(csv_path, index=False)
-    print(f"\nResults saved to {csv_path} ({len(df)} rows)")
+    print(f"Results saved to {csv_path} ({len(df)} rows)")
 
     # Print summary
     print(f"\n{'='*60}")
     print("SUMMARY")
     print(f"{'='*60}")
-    summary = df.groupby(["model", "category"]).agg(
-        avg_cer=("cer", "mean"),
-        avg_wer=("wer", "mean"),
-        avg_acc=("accuracy", "mean"),
-        avg_time=("time_sec", "mean"),
-    ).round(3)
-    print(summary.to_string())
+    print(summary_table(summarize_frame(df)).to_string())
+    print_load_summary(df)
+    print_stage_summary(df)
+    print_memory_summary(df)
+    print_status_summary(df)
 
     # Generate visualizations
     print(f"\n{'='*60}")
     print("Generating visualizations ...")
     print(f"{'='*60}")
+    from evaluation.visualize import generate_all_visualizations
     generate_all_visualizations(csv_path)
+    return run_dir
+
+
+def print_pareto(df: pd.DataFrame, run_dir: Path) -> None:
+    """Profiles on the CER-vs-latency frontier per category."""
+    from evaluation.visualize import build_summary, pareto_table
+
+    table = pareto_table(build_summary(df)["cells"])
+    print(f"\n{'='*60}")
+    print("PARETO FRONTIER (CER vs time per image)")
+    print(f"{'='*60}")
+    for cat, grp in table.groupby("category", sort=False):
+        print(f"  {config.get_category_label(cat)}:")
+        for row in grp.itertuples():
+            print(f"    {row.time_sec:8.3f}s  CER {row.cer:.3f}  {row.model}")
+    path = run_dir / "pareto_frontier.csv"
+    table.to_csv(path, index=False)
+    print(f"\nFrontier saved to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run all local OCR models.")
+    parser.add_argument("--max-images", type=int, default=config.WORKER_MAX_IMAGES,
+                        help="restart a worker after this many images (0 = never)")
+    parser.add_argument("--max-rss-growth-mb", type=float,
+                        default=config.WORKER_MAX_RSS_GROWTH_MB,
+                        help="restart a worker once its RSS grew this much since "
+                             "loading the model (0 = never)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="track Python heap per image (slower)")
+    parser.add_argument("--shard", help="evaluate only shard i of N, e.g. 0/4")
+    parser.add_argument("--prefetch", type=int, default=config.PREFETCH_IMAGES,
+                        help="images decoded ahead of the model (0 = inline)")
+    parser.add_argument("--normalize-resolution", action="store_true",
+                        help="rescale images to each model's TARGET_X_HEIGHT")
+    parser.add_argument("--sweep", action="store_true",
+                        help="run every model spec once per speed profile")
+    parser.add_argument("--profiles", default=",".join(config.SPEED_PROFILES),
+                        help="profiles for --sweep (comma-separated)")
+    parser.add_argument("--image-timeout", type=float, default=None,
+                        help=f"seconds per image for models without an override "
+                             f"(default {config.IMAGE_TIMEOUT_SEC})")
+    parser.add_argument("--max-retries", type=int, default=config.IMAGE_MAX_RETRIES,
+                        help="retries for an image that timed out")
+    parser.add_argument("--ignore-quarantine", action="store_true",
+                        help="also run images quarantined by earlier timeouts")
+    parser.add_argument("--profile", choices=["cprofile", "sampling"],
+                        help="profile model loading and inference in each worker "
+                             "(results/profiles/)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="stop each model/category once its estimates are precise "
+                             "or it is dominated")
+    parser.add_argument("--reference",
+                        help="run ID or directory whose models also count as competitors "
+                             "for --adaptive")
+    parser.add_argument("--dedup", choices=["off", "flag", "reuse"], default="off",
+                        help="mark near-duplicate images, or reuse their original's "
+                             "prediction instead of running them")
+    parser.add_argument("--dedup-distance", type=int, default=config.DEDUP_MAX_DISTANCE,
+                        help="perceptual-hash bits (of 64) that may differ for a duplicate")
+    args = parser.parse_args()
+
+    config.ensure_dirs()
+    shard = parse_shard(args.shard)
+    tasks = get_tasks(shard)
+    all_results = []
+
+    # Show dataset summary first
+    print("=" * 60)
+    print("DATASET CATEGORIES" + (f" (shard {args.shard})" if shard else ""))
+    print("=" * 60)
+    for cat_key in config.CATEGORIES:
+        n_img = sum(1 for cat, _, _ in tasks if cat == cat_key)
+        label = config.get_category_label(cat_key)
+        print(f"  {label}: {n_img} images")
+    print()
+
+    specs = MODEL_SPECS
+    if args.sweep:
+        profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+        specs = [(name, {**kwargs, "profile": profile})
+                 for name, kwargs in MODEL_SPECS for profile in profiles]
+
+    settings = default_settings() if args.adaptive else None
+    references = {}
+    stops = {}
+    if args.adaptive and args.reference:
+        references = reference_estimates(load_run(args.reference), settings)
+        print(f"Adaptive references from {args.reference}: "
+              f"{sum(len(v) for v in references.values())} model/category estimates\n")
+
+    for model_name, kwargs in specs:
+        print(f"\n{'='*60}")
+        print(f"Running {model_name} {kwargs} in subprocess ...")
+        print(f"{'='*60}")
+
+        try:
+            rows = run_model({
+                "model": model_name,
+                "kwargs": kwargs,
+                "max_images": args.max_images,
+                "max_rss_growth_mb": args.max_rss_growth_mb,
+                "tracemalloc": args.tracemalloc,
+                "shard": list(shard) if shard else None,
+                "prefetch": args.prefetch,
+                "text_height": config.TARGET_X_HEIGHT.get(model_name)
+                if args.normalize_resolution else None,
+                "image_timeout": args.image_timeout,
+                "ignore_quarantine": args.ignore_quarantine,
+                "profiler": args.profile,
+                "adaptive": {**settings, "references": references} if settings else None,
+                "dedup": {"mode": args.dedup, "max_distance": args.dedup_distance}
+                if args.dedup != "off" else None,
+            }, len(tasks), max_retries=args.max_retries, stops=stops)
+            all_results.extend(rows)
+            if settings and rows:
+                # Later models can stop early against this one
+                references = merge_references(
+                    references, reference_estimates(pd.DataFrame(rows), settings))
+        except Exception as e:
+            print(f"  [FAIL] {e}")
+
+    # Save results
+    if not all_results:
+        print("\nNo results collected. Check errors above.")
+        sys.exit(1)
+
+    if shard:
+        # A shard only saves its self-describing run; merge.py does the rest
+        run_dir = save_run(
+            all_results, f"shard{shard[0]}of{shard[1]}",
+            expected=[sample_key(cat, img.name) for cat, img, _ in tasks],
+            shard={"index": shard[0], "count": shard[1]},
+            model_specs=[[name, kwargs] for name, kwargs in specs],
+            datasets_dir=str(config.DATASETS_DIR),
+        )
+        print(f"\nShard {args.shard} stored in {run_dir} ({len(all_results)} rows)")
+        return
+
+    kind = "adaptive" if args.adaptive else "sweep" if args.sweep else "local"
+    run_dir = finalize_run(all_results, kind)
+    if args.sweep:
+        print_pareto(pd.DataFrame(truncate_texts(all_results)), run_dir)
+    if args.adaptive:
+        print_adaptive_report(pd.DataFrame(truncate_texts(all_results)), tasks, stops, run_dir)
+    if args.dedup != "off":
+        print_dedup_report(pd.DataFrame(truncate_texts(all_results)), run_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+"""
+Train the category router (models/router.py) and build its routing table.
+
+1. Features of every dataset image are labelled with its category; the
+   classifier's accuracy is estimated with stratified k-fold cross-validation
+   before it is fitted on all images.
+2. For each category, the routing table picks the model of MODEL_SPECS (with
+   --profiles, every speed profile of each) with the lowest mean CER in the
+   results store. --max-time keeps only models at most that slow per image;
+   --cer-slack takes the fastest model within that much CER of the best one.
+   Categories without results use the model that is best over all of them.
+   Models are matched to specs by the "model_spec" column of their results,
+   so their frameworks need not be installed here.
+3. The router is compared with every single model on the images all of them
+   have results for. Each image goes to the model that its out-of-fold
+   predicted category is routed to, in a routing table built from the other
+   folds' images (the same folds as the classifier), so the comparison is
+   not biased by choosing routes on the images it scores. The router
+   appears under its RouterOCR display name; its "(oracle)" row routes by
+   the true category.
+
+The classifier and table are written to config.ROUTER_PATH, the comparison to
+router_report.csv next to it. Evaluate the router live by adding
+("RouterOCR", {}) to MODEL_SPECS in run_evaluation.py.
+
+Usage:
+    python train_router.py
+    python train_router.py --run 20240131-142501-sweep --profiles fast,balanced,accurate
+    python train_router.py --max-time 2.0
+    python train_router.py --cer-slack 0.01
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ["PYTHONIOENCODING"] = "utf-8"
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+import numpy as np
+import pandas as pd
+
+import config
+from evaluation.dataset import get_tasks
+from evaluation.store import load_run
+from models.router import CategoryClassifier, RouterOCR, image_features
+from run_evaluation import MODEL_SPECS
+
+
+def extract_features(tasks: list[tuple]) -> tuple[np.ndarray, float]:
+    """Feature matrix of the task images and the mean seconds per image."""
+    start = time.perf_counter()
+    features = np.stack([image_features(str(img)) for _, img, _ in tasks])
+    return features, (time.perf_counter() - start) / max(len(tasks), 1)
+
+
+def stratified_folds(labels: list[str], folds: int, seed: int = 0) -> np.ndarray:
+    """Fold index of every image, each category spread evenly over the folds."""
+    rng = np.random.default_rng(seed)
+    fold_of = np.zeros(len(labels), dtype=int)
+    for label in set(labels):
+        members = rng.permutation([i for i, l in enumerate(labels) if l == label])
+        fold_of[members] = np.arange(len(members)) % folds
+    return fold_of
+
+
+def cross_val_predict(features: np.ndarray, labels: list[str],
+                      fold_of: np.ndarray) -> list[str]:
+    """Out-of-fold predicted category of every image."""
+    predicted = [None] * len(labels)
+    for fold in np.unique(fold_of):
+        test = np.flatnonzero(fold_of == fold)
+        train = np.flatnonzero(fold_of != fold)
+        clf = CategoryClassifier.fit(features[train], [labels[i] for i in train])
+        for i, label in zip(test, clf.predict(features[test])):
+            predicted[i] = label
+    return predicted
+
+
+def spec_names(df: pd.DataFrame, specs: list[tuple]) -> dict[str, list | None]:
+    """Display name -> [registry name, kwargs] of the result models that run
+    one of `specs`, read from the rows' "model_spec" column (no wrapper is
+    constructed, so the frameworks need not be installed here). Models of
+    older results without a model_spec stay candidates with spec None:
+    they can be compared, but RouterOCR cannot load them."""
+    def key(name: str, kwargs: dict) -> str:
+        # The default profile may or may not be spelled out
+        kwargs = {k: v for k, v in kwargs.items() if (k, v) != ("profile", "balanced")}
+        return json.dumps([name, kwargs], sort_keys=True)
+
+    allowed = {key(name, kwargs) for name, kwargs in specs}
+    recorded = df["model_spec"] if "model_spec" in df else pd.Series(None, index=df.index)
+    names, seen, unknown = {}, set(), set()
+    for model, spec in zip(df["model"], recorded):
+        if pd.isna(spec):
+            unknown.add(model)
+            continue
+        seen.add(model)
+        spec = json.loads(spec)
+        if spec[0] != "RouterOCR" and key(*spec) in allowed:
+            names[model] = spec
+    unknown = {m for m in unknown - seen if not m.startswith("Router")}
+    if unknown:
+        print(f"  [WARN] No model_spec recorded for {', '.join(sorted(unknown))}; "
+              f"re-run run_evaluation.py so RouterOCR can load them")
+        names.update({model: None for model in unknown})
+    return names
+
+
+def build_routes(df: pd.DataFrame, names: dict, max_time: float | None,
+                 cer_slack: float, warn: bool = True) -> tuple[dict, dict]:
+    """(route per category, default route) from the candidates' mean CER and
+    time per category."""
+    ok = df[df["model"].isin(names)]
+    if "status" in ok:
+        ok = ok[ok["status"].fillna("ok") == "ok"]
+    cells = ok.groupby(["category", "model"]).agg(
+        cer=("cer", "mean"), time_sec=("time_sec", "mean"), n=("cer", "count")).reset_index()
+
+    def pick(grp: pd.DataFrame) -> dict:
+        pool = grp if max_time is None else grp[grp["time_sec"] <= max_time]
+        if pool.empty:
+            if warn:
+                print(f"  [WARN] No model within {max_time}s; using the best CER")
+            pool = grp
+        best = pool["cer"].min()
+        row = pool[pool["cer"] <= best + cer_slack].sort_values(["time_sec", "cer"]).iloc[0]
+        return {"model": row["model"], "spec": names[row["model"]],
+                "cer": round(float(row["cer"]), 4), "time_sec": round(float(row["time_sec"]), 4)}
+
+    if cells.empty:
+        return {}, {}
+    routes = {cat: pick(grp) for cat, grp in cells.groupby("category")}
+    totals = cells.assign(cer=cells["cer"] * cells["n"], time_sec=cells["time_sec"] * cells["n"]) \
+        .groupby("model")[["cer", "time_sec", "n"]].sum()
+    overall = pd.DataFrame({"model": totals.index, "cer": totals["cer"] / totals["n"],
+                            "time_sec": totals["time_sec"] / totals["n"]})
+    return routes, pick(overall)
+
+
+def compare(df: pd.DataFrame, tasks: list[tuple], predicted: list[str],
+            fold_of: np.ndarray, fold_routes: list[tuple[dict, dict]],
+            classify_sec: float, candidates: set, label: str = "Router") -> pd.DataFrame:
+    """Mean CER and time per image of every candidate model and of the router
+    (`label`; predicted and true categories) on the images all candidates
+    finished. Each image is routed by the table built without its fold
+    (fold_routes[fold] = (routes, default)), so neither the category nor
+    the route choice has seen it."""
+    rows = df[df["model"].isin(candidates)]
+    if "status" in rows:
+        rows = rows[rows["status"].fillna("ok") == "ok"]
+    table = rows.pivot_table(index=["category", "image"], columns="model",
+                             values=["cer", "time_sec"], aggfunc="first").dropna()
+    guessed = {(cat, img.name): guess for (cat, img, _), guess in zip(tasks, predicted)}
+    fold = {(cat, img.name): f for (cat, img, _), f in zip(tasks, fold_of)}
+    # Images of a fold whose training part has no results cannot be routed
+    keys = [key for key in table.index if key in guessed and fold_routes[fold[key]][1]]
+    table = table.loc[keys]
+    if table.empty:
+        return pd.DataFrame()
+
+    out = []
+    for model in table["cer"].columns:
+        out.append({"model": model, "cer": table["cer"][model].mean(),
+                    "time_sec": table["time_sec"][model].mean()})
+
+    def routed(by_guess: bool) -> tuple[float, float]:
+        cer, sec = [], []
+        for cat, img in keys:
+            routes, default = fold_routes[fold[(cat, img)]]
+            route = routes.get(guessed[(cat, img)] if by_guess else cat, default)
+            cer.append(table.loc[(cat, img), ("cer", route["model"])])
+            sec.append(table.loc[(cat, img), ("time_sec", route["model"])])
+        return float(np.mean(cer)), float(np.mean(sec))
+
+    cer, sec = routed(by_guess=False)
+    out.append({"model": f"{label} (oracle)", "cer": cer, "time_sec": sec})
+    cer, sec = routed(by_guess=True)
+    out.append({"model": label, "cer": cer, "time_sec": sec + classify_sec})
+    report = pd.DataFrame(out).sort_values("cer").reset_index(drop=True)
+    report["images"] = len(keys)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the category router.")
+    parser.add_argument("--run", help="run ID or directory with the results "
+                                      "(default: all_results.csv)")
+    parser.add_argument("--profiles", help="route among these speed profiles of every "
+                                           "spec (comma-separated)")
+    parser.add_argument("--max-time", type=float, default=None,
+                        help="only route to models at most this many seconds per image")
+    parser.add_argument("--cer-slack", type=float, default=0.0,
+                        help="fastest model within this much CER of the best")
+    parser.add_argument("--folds", type=int, default=5,
+                        help="cross-validation folds for the classifier accuracy")
+    parser.add_argument("--out", default=str(config.ROUTER_PATH))
+    args = parser.parse_args()
+
+    tasks = get_tasks()
+    if not tasks:
+        print("No datasets found. Run prepare_dataset.py first.")
+        sys.exit(1)
+    df = load_run(args.run) if args.run else pd.read_csv(config.SCORES_DIR / "all_results.csv")
+
+    # ── Classifier ──
+    print(f"{'='*60}")
+    print(f"CATEGORY CLASSIFIER ({len(tasks)} images)")
+    print(f"{'='*60}")
+    labels = [cat for cat, _, _ in tasks]
+    features, classify_sec = extract_features(tasks)
+    folds = max(2, min(args.folds, min(labels.count(cat) for cat in set(labels))))
+    fold_of = stratified_folds(labels, folds)
+    predicted = cross_val_predict(features, labels, fold_of)
+    accuracy = np.mean([p == t for p, t in zip(predicted, labels)])
+    print(f"  Features: {classify_sec * 1000:.1f}ms per image")
+    print(f"  {folds}-fold accuracy: {accuracy:.1%}")
+    for cat in config.CATEGORIES:
+        mine = [p for p, t in zip(predicted, labels) if t == cat]
+        if mine:
+            wrong = pd.Series([p for p in mine if p != cat]).value_counts()
+            note = ", ".join(f"{n} as {p}" for p, n in wrong.items())
+            print(f"    {cat}: {sum(p == cat for p in mine)}/{len(mine)}"
+                  + (f" ({note})" if note else ""))
+    classifier = CategoryClassifier.fit(features, labels)
+
+    # ── Routing table ──
+    print(f"\n{'='*60}")
+    print("ROUTING TABLE")
+    print(f"{'='*60}")
+    specs = MODEL_SPECS
+    if args.profiles:
+        profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+        specs = [(name, {**kwargs, "profile": profile})
+                 for name, kwargs in MODEL_SPECS for profile in profiles]
+    names = spec_names(df, specs)
+    routes, default = build_routes(df, names, args.max_time, args.cer_slack)
+    if not routes:
+        source = args.run or config.SCORES_DIR / "all_results.csv"
+        found = ", ".join(sorted(df["model"].dropna().unique())) or "none"
+        if names:
+            print(f"  No successful results of {', '.join(sorted(names))} in {source}.")
+        else:
+            print(f"  No results in {source} were produced by a spec of MODEL_SPECS"
+                  + (f" with profiles {args.profiles}" if args.profiles else "")
+                  + f" (models found: {found}).")
+        print("  Run run_evaluation.py with these specs first.")
+        sys.exit(1)
+    unloadable = sorted({r["model"] for r in [*routes.values(), default] if r["spec"] is None})
+    if unloadable:
+        print(f"  [WARN] Routed to {', '.join(unloadable)} without a model_spec; "
+              f"RouterOCR will refuse this table until they are re-run")
+    for cat, route in routes.items():
+        print(f"  {config.get_category_label(cat)}: {route['model']} "
+              f"(CER {route['cer']:.3f}, {route['time_sec']:.2f}s)")
+    print(f"  Default: {default['model']}")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "classifier": classifier.to_dict(),
+        "cv_accuracy": round(float(accuracy), 4),
+        "routes": routes,
+        "default": default,
+    }, indent=2), encoding="utf-8")
+    print(f"\nRouter saved to {out}")
+
+    # ── Router vs single models ──
+    # Routes are chosen again per fold, from the other folds' images only
+    fold_routes = []
+    for fold in range(folds):
+        train = {(cat, img.name) for (cat, img, _), f in zip(tasks, fold_of) if f != fold}
+        in_train = [key in train for key in zip(df["category"], df["image"])]
+        fold_routes.append(build_routes(df[in_train], names, args.max_time,
+                                        args.cer_slack, warn=False))
+    report = compare(df, tasks, predicted, fold_of, fold_routes, classify_sec, set(names),
+                     RouterOCR(str(out)).get_name())
+    if report.empty:
+        return
+    print(f"\n{'='*60}")
+    print(f"ROUTER VS SINGLE MODELS ({report['images'].iloc[0]} images, "
+          f"out-of-fold categories and routes)")
+    print(f"{'='*60}")
+    for row in report.itertuples():
+        print(f"  {row.model:<36} CER {row.cer:.3f} | {row.time_sec:.3f}s/image")
+    path = out.with_name("router_report.csv")
+    report.round(4).to_csv(path, index=False)
+    print(f"\nReport saved to {path}")
+
+
+if __name__ == "__main__":
+    main()